@@ -47,6 +47,14 @@ def run() -> int:
             from recs.ui import session_explain
 
             return session_explain.main(sys.argv[2:])
+        if len(sys.argv) > 1 and sys.argv[1] == 'transcode':
+            from recs.audio import transcode
+
+            return transcode.main(sys.argv[2:])
+        if len(sys.argv) > 1 and sys.argv[1] == 'repair':
+            from recs.ui import session_repair
+
+            return session_repair.main(sys.argv[2:])
         if len(sys.argv) > 1 and sys.argv[1] == 'manifest':
             from recs.ui import session_manifest_check
 
@@ -1,102 +1,107 @@
 # mypy: disable-error-code="no-any-return, type-arg"
 
-import numbers
-from collections.abc import Sequence
-from functools import cached_property
-
 import numpy as np
-from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 from recs.cfg.source import to_matrix
 
+from .levels import Levels, dtype_scale
+
 _EMPTY_SEEN = False
 
 
-class Block(BaseModel):
-    model_config = ConfigDict(arbitrary_types_allowed=True, frozen=True)
+class Block:
+    """A block of audio samples with one column per channel.
+
+    Statistics are computed lazily and cached.  Only the public constructor
+    checks its input: slices and blocks made by `with_levels` skip the checks,
+    because they are cut from blocks that were already checked.
+    """
+
+    __slots__ = '_amplitude', '_asfloat', '_levels', '_rms', '_scale', 'block'
 
     block: np.ndarray
 
-    @field_validator('block')
-    @classmethod
-    def validate_block(cls, block: np.ndarray) -> np.ndarray:
+    def __init__(self, block: np.ndarray) -> None:
         if not block.size:
             raise ValueError('Empty block')
-        return to_matrix(block)
+        self._set(to_matrix(block), None)
+
+    @classmethod
+    def with_levels(cls, block: np.ndarray, levels: Levels | None = None) -> 'Block':
+        b = cls.__new__(cls)
+        b._set(block, levels)
+        return b
+
+    def _set(self, block: np.ndarray, levels: Levels | None) -> None:
+        self.block = block
+        self._levels = levels
+        self._amplitude: np.ndarray | None = None
+        self._asfloat: Block | None = None
+        self._rms: np.ndarray | None = None
+        self._scale: float | None = None
 
     def __len__(self) -> int:
         return self.block.shape[0]
 
     def __getitem__(self, index: int | slice) -> 'Block':
-        return Block(block=self.block[index])
+        return Block.with_levels(to_matrix(self.block[index]))
+
+    def __repr__(self) -> str:
+        return f'Block(block={self.block!r})'
 
-    @cached_property
+    @property
     def is_float(self) -> bool:
-        return not issubclass(self.block.dtype.type, numbers.Integral)
+        return self.scale == 1
 
-    @cached_property
+    @property
     def scale(self) -> float:
-        if self.is_float:
-            return 1
-        return float(1 << (8 * self.block.dtype.itemsize - 1))
+        if self._scale is None:
+            self._scale = dtype_scale(self.block.dtype)
+        return self._scale
 
-    @cached_property
+    @property
+    def levels(self) -> Levels:
+        if self._levels is None:
+            self._levels = Levels.analyze(self.block)
+        return self._levels
+
+    @property
     def volume(self) -> float:
         return sum(self.amplitude) / len(self.amplitude)
 
-    @cached_property
+    @property
     def channel_count(self) -> int:
         return (self.block.shape + (1,))[1]
 
-    @cached_property
+    @property
     def amplitude(self) -> np.ndarray:
-        return (self.max - self.min) / (2 * self.scale)
+        if self._amplitude is None:
+            self._amplitude = self.levels.amplitude
+        return self._amplitude
 
-    @cached_property
+    @property
     def max(self) -> np.ndarray:
-        return self.block.max(0)
+        return self.levels.max
 
-    @cached_property
+    @property
     def min(self) -> np.ndarray:
-        return self.block.min(0)
+        return self.levels.min
 
-    @cached_property
+    @property
     def asfloat(self) -> 'Block':
-        if self.is_float:
-            return self
-        b = self.block.astype('double' if self.block.dtype.itemsize > 4 else 'float')
-        b /= self.scale
-        return Block(block=b)
-
-    @cached_property
+        if self._asfloat is None:
+            if self.is_float:
+                self._asfloat = self
+            else:
+                dtype = 'double' if self.block.dtype.itemsize > 4 else 'float'
+                b = self.block.astype(dtype)
+                b /= self.scale
+                self._asfloat = Block.with_levels(b)
+        return self._asfloat
+
+    @property
     def rms(self) -> np.ndarray:
-        b = self.asfloat.block
-        if b is self.block:
-            b = b * b
-        else:
-            b *= b
-        return np.sqrt(b.mean(0))
-
-
-class Blocks(BaseModel):
-    blocks: list[Block] = Field(default_factory=list)
-    duration: int = 0
-
-    def append(self, block: Block) -> None:
-        self.blocks.append(block)
-        self.duration += len(block)
-
-    def clear(self) -> None:
-        self.duration = 0
-        self.blocks.clear()
-
-    def clip(self, sample_length: int, from_start: bool) -> Sequence[Block]:
-        clipped = []
-        assert sample_length >= 0
-        while self.duration > sample_length:
-            clipped.append(self.blocks.pop(0 if from_start else -1))
-            self.duration -= len(clipped[-1])
-        return clipped
-
-    def __getitem__(self, i: int) -> Block:
-        return self.blocks[i]
+        if self._rms is None:
+            b = self.asfloat.block
+            self._rms = np.sqrt((b * b).mean(0))
+        return self._rms
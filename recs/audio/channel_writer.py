@@ -1,12 +1,15 @@
 import contextlib
 import time
-from collections.abc import Iterable, Sequence
+from collections.abc import Callable, Sequence
+from concurrent import futures
+from concurrent.futures import Future
 from datetime import datetime
 from functools import partial
 from pathlib import Path
 from threading import Lock
-from typing import Any
+from typing import Any, NamedTuple
 
+import numpy as np
 from numpy.typing import NDArray
 from overrides import override
 from soundfile import SoundFile
@@ -20,9 +23,14 @@ from recs.cfg.track import Track
 from recs.cfg.track_names import SourceTrackNames
 from recs.misc import counter, file_list
 
-from .block import Block, Blocks
+from .block import Block
+from .disk_writer import DiskWriter
 from .file_opener import FileOpener
 from .header_size import header_size
+from .levels import Levels
+from .ring_buffer import RingBuffer
+from .transcode import split_formats
+from .write_buffer import WriteBuffer
 
 URL = 'https://github.com/rec/recs'
 
@@ -37,6 +45,24 @@ ITEMSIZE = {
 
 BLOCK_FUZZ = 2
 
+# Open the next file this long before a file reaches its size or length limit
+ROLLOVER_LEAD_SECONDS = 5
+OPEN_LANE = 'open'
+# Retroactive captures are written apart from the live recording
+CAPTURE_LANE = 'capture'
+
+# With --preallocate, reserve disk space this far ahead of the writes
+PREALLOCATE_SECONDS = 60
+
+
+class _NextFile(NamedTuple):
+    """Files opened in the background for the segment after the current one"""
+
+    path: Path
+    index: int
+    metadata: dict[str, str]  # Without the date, which is set on use
+    sfs: Future[list[SoundFile]]
+
 
 class ChannelWriter(Runnable):
     bytes_in_file: int = 0
@@ -50,13 +76,25 @@ class ChannelWriter(Runnable):
     timestamp: float = 0
     timeline_frame: int = 0
     max_write_seconds: float = 0.0
+    max_rollover_seconds: float = 0.0
+    max_checkpoint_seconds: float = 0.0
     quiet_frames: int = 0
+    quiet_tail: int = 0  # Frames written after the last loud one
+    reserved_bytes: int = 0
+    checkpoint_timestamp: float = 0
 
     _sfs: Sequence[SoundFile] = ()
+    _next: _NextFile | None = None
+    _buffer: WriteBuffer | None = None
+    _buffered_since: float = 0.0
+
+    # The start of a take which isn't yet long enough to be kept
+    _held: list[NDArray] | None = None
+    _take_start: tuple[float, int] = (0.0, 0)
 
     @property
     def active(self) -> Active:
-        return Active.active if self._sfs else Active.inactive
+        return Active.active if self._recording else Active.inactive
 
     def __init__(
         self,
@@ -64,13 +102,15 @@ class ChannelWriter(Runnable):
         times: time_settings.TimeSettings[int],
         track: Track,
         session_directory: Path | None = None,
+        disk_writer: DiskWriter | None = None,
+        meter_only: bool = False,
     ) -> None:
         super().__init__()
 
         self.cfg = cfg
-        self.do_not_record = (
-            cfg.general.dry_run or cfg.general.calibrate or cfg.general.silence_preview
-        )
+        self.disk_writer = disk_writer
+        self.meter_only = meter_only
+        self.do_not_record = _do_not_record(cfg, meter_only)
         self.metadata = cfg.metadata_dict
         self.session_directory = session_directory
         self.output_path_pattern = _output_path_pattern(cfg, session_directory)
@@ -79,23 +119,35 @@ class ChannelWriter(Runnable):
         self.noise_floor = _noise_floor(cfg, track)
         self.track_names: SourceTrackNames = {}
 
-        self._blocks = Blocks()
+        self._quiet = RingBuffer(_quiet_frames(times))
         self._lock = Lock()
 
         if track.source.format is None or 'formats' in cfg.model_fields_set:
             self.formats = cfg.audio.formats
         else:
             self.formats = [track.source.format]
+        # The formats to make from each file once it closes
+        self.deferred_formats: list[Format] = []
+        if cfg.audio.defer_transcoding:
+            primary, self.deferred_formats = split_formats(self.formats)
+            self.formats = [primary]
 
         subtype = cfg.audio.subtype
         sdtype = cfg.audio.sdtype or SDTYPE
 
         self.files_written = file_list.FileList()
+        self.files_closed: list[Path] = []
         self.file_end_frames: dict[Path, int] = {}
         self.file_end_timestamps: dict[Path, float] = {}
         self.file_start_frames: dict[Path, int] = {}
         self.file_start_timestamps: dict[Path, float] = {}
         self.frame_size = ITEMSIZE[sdtype] * len(track.channels)
+        recording = cfg.recording
+        if buffer_frames := min(
+            round(recording.write_buffer_seconds * track.source.samplerate),
+            recording.write_buffer_bytes // self.frame_size,
+        ):
+            self._buffer = WriteBuffer(buffer_frames)
         self.longest_file_frames = _longest_file_frames(times)
 
         opener = partial(
@@ -103,17 +155,19 @@ class ChannelWriter(Runnable):
             channels=len(track.channels),
             samplerate=track.source.samplerate,
             subtype=subtype,
+            rf64_continuation=cfg.recording.rf64_continuation,
+            preallocate=cfg.recording.preallocate,
+            page_cache=cfg.recording.page_cache,
         )
 
         self.openers = [opener(format=f) for f in self.formats]
         self._volume = counter.MovingBlock(times.moving_average_time)
 
+        recording = self.cfg.recording
+        unlimited = recording.infinite_length or recording.rf64_continuation
+
         def size(f: str) -> int:
-            return (
-                MAX_WAV_SIZE
-                if f == Format.wav and not self.cfg.recording.infinite_length
-                else 0
-            )
+            return MAX_WAV_SIZE if f == Format.wav and not unlimited else 0
 
         self.largest_file_size = max(0, *(size(f) for f in self.formats))
 
@@ -122,21 +176,22 @@ class ChannelWriter(Runnable):
 
     def set_cfg(self, cfg: Cfg, times: time_settings.TimeSettings[int]) -> None:
         self.cfg = cfg
-        self.do_not_record = (
-            cfg.general.dry_run or cfg.general.calibrate or cfg.general.silence_preview
-        )
+        self.do_not_record = _do_not_record(cfg, self.meter_only)
         self.metadata = cfg.metadata_dict
         self.output_path_pattern = _output_path_pattern(cfg, self.session_directory)
         self.times = times
         self.noise_floor = _noise_floor(cfg, self.track)
         self.longest_file_frames = _longest_file_frames(times)
+        self._quiet.capacity = _quiet_frames(times)
 
     def set_session_directory(self, session_directory: Path) -> None:
         self.session_directory = session_directory
         self.output_path_pattern = _output_path_pattern(self.cfg, session_directory)
 
-    def to_block(self, array: NDArray) -> Block:
-        return Block(block=array[:, self.track.slice])
+    def to_block(self, array: NDArray, levels: Levels | None = None) -> Block:
+        if levels is not None:
+            levels = levels.select(self.track.slice)
+        return Block.with_levels(array[:, self.track.slice], levels)
 
     def receive_update(
         self,
@@ -145,10 +200,44 @@ class ChannelWriter(Runnable):
         should_record: bool | None = None,
         timeline_frame: int = 0,
     ) -> ChannelState:
+        saved_state = self._state(
+            max_amp=max(block.max) / block.scale,
+            min_amp=min(block.min) / block.scale,
+        )
+        self.receive(block, timestamp, should_record, timeline_frame)
+        return self._state() - saved_state
+
+    def receive(
+        self,
+        block: Block,
+        timestamp: float,
+        should_record: bool | None = None,
+        timeline_frame: int = 0,
+    ) -> None:
         with self._lock:
             if should_record is None:
                 should_record = self.should_record(block)
-            return self._receive_block(block, timestamp, should_record, timeline_frame)
+            self._receive_block(block, timestamp, should_record, timeline_frame)
+
+    def counters(self) -> tuple[int, int, float]:
+        """The file count, file size and recorded time: the summed columns"""
+        return (
+            len(self.files_written),
+            self.files_written.cached_total_size,
+            self.frames_written / self.track.source.samplerate,
+        )
+
+    def row(self) -> tuple[float, ...]:
+        """This track's row of `ChannelStates.table`, without the amplitudes"""
+        return (
+            *self.counters(),
+            self._recording,
+            self.timestamp,
+            self.max_write_seconds,
+        )
+
+    def volume(self) -> list[float]:
+        return list(self._volume.mean())
 
     def should_record(self, block: Block) -> bool:
         return (
@@ -156,6 +245,33 @@ class ChannelWriter(Runnable):
             or block.volume >= time_settings.db_to_amplitude(self.noise_floor)
         )
 
+    def write_capture(self, array: NDArray, timestamp: float, start_frame: int) -> None:
+        """Write audio from before now, starting at `timestamp`, to new files"""
+        if self.do_not_record or not len(array):
+            return
+
+        with self._lock:
+            index = 1 + len(self.files_written)
+            metadata = self._metadata(timestamp, index)
+            path = self._path(timestamp, index)
+            sfs = [o.create(metadata, path) for o in self.openers]
+            paths = [Path(sf.name) for sf in sfs]
+            end_frame = start_frame + len(array)
+            end_timestamp = timestamp + len(array) / self.track.source.samplerate
+            self.file_start_frames.update(dict.fromkeys(paths, start_frame))
+            self.file_start_timestamps.update(dict.fromkeys(paths, timestamp))
+            self.file_end_frames.update(dict.fromkeys(paths, end_frame))
+            self.file_end_timestamps.update(dict.fromkeys(paths, end_timestamp))
+            self.files_written.extend(paths)
+
+        array = np.ascontiguousarray(array)
+        for opener, sf in zip(self.openers, sfs):
+            # Not counted against the write queue: the audio is already in memory
+            self._submit(
+                partial(self._write_file, opener, sf, array), lane=CAPTURE_LANE
+            )
+            self._submit(partial(self._close_file, opener, sf, True), lane=CAPTURE_LANE)
+
     @override
     def stop(self) -> None:
         with self._lock:
@@ -164,40 +280,56 @@ class ChannelWriter(Runnable):
             self.stopped = True
 
     def _close(self) -> None:
+        # A take too short to keep never touches the disk
+        self._held = None
+        self._flush()
         sfs, self._sfs = self._sfs, ()
-        for sf in sfs:
-            if self.times.record_everything or (
-                sf.frames and sf.frames >= self.times.shortest_file_time
-            ):
-                sf.close()
-            else:
-                with contextlib.suppress(OSError, RuntimeError):
-                    sf.close()
-                with contextlib.suppress(OSError):
-                    Path(sf.name).unlink()
+        if not sfs:
+            return
+
+        keep = self.times.record_everything or (
+            self.frames_in_file and self.frames_in_file >= self.times.shortest_file_time
+        )
+        for format, opener, sf in zip(self.formats, self.openers, sfs):
+            if not keep:
                 self._discard_file(Path(sf.name))
+            close = partial(self._close_file, opener, sf, bool(keep))
+            self._submit(close, lane=format)
+
+    def _start(self, offset: int) -> None:
+        self._take_start = self._position(offset)
+        times = self.times
+        if (
+            times.shortest_file_time
+            and not times.record_everything
+            and self.cfg.recording.defer_open_bytes
+        ):
+            self.frames_in_file = self.bytes_in_file = 0
+            self._held = []
+        else:
+            self._sfs = self._open(*self._take_start)
 
-    def _open(self, offset: int) -> Sequence[SoundFile]:
+    def _position(self, offset: int) -> tuple[float, int]:
+        """The timestamp and timeline frame `offset` frames from this block's end"""
         timestamp = self.timestamp + offset / self.track.source.samplerate
-        date = datetime.fromtimestamp(timestamp).isoformat()
+        return timestamp, self.timeline_frame + offset
+
+    def _open(self, timestamp: float, start_frame: int) -> Sequence[SoundFile]:
         index = 1 + len(self.files_written)
-        metadata = {'date': date, 'software': URL, 'tracknumber': str(index)}
-        metadata |= self.metadata
+        metadata = self._metadata(timestamp, index)
 
-        self.bytes_in_file = max(header_size(metadata, f) for f in self.formats)
+        self.bytes_in_file = max(
+            header_size(metadata, o.format, o.rf64_continuation) for o in self.openers
+        )
         self.frames_in_file = 0
+        self.reserved_bytes = 0
+        self.checkpoint_timestamp = timestamp
 
-        if name := track_names.track_name(self.track_names, self.track):
-            path = self.output_path_pattern.make_track_name_path(
-                name, self.track, self.cfg.aliases, timestamp, index
-            )
-        else:
-            path = self.output_path_pattern.make_path(
-                self.track, self.cfg.aliases, timestamp, index
-            )
-        sfs = [o.create(metadata, path) for o in self.openers]
+        path = self._path(timestamp, index)
+        sfs = self._take_next(path, index, metadata)
+        if sfs is None:
+            sfs = [o.create(metadata, path) for o in self.openers]
         paths = [Path(sf.name) for sf in sfs]
-        start_frame = self.timeline_frame + offset
         self.file_start_frames.update(dict.fromkeys(paths, start_frame))
         self.file_start_timestamps.update(dict.fromkeys(paths, timestamp))
         self.file_end_frames.update(dict.fromkeys(paths, start_frame))
@@ -205,6 +337,80 @@ class ChannelWriter(Runnable):
         self.files_written.extend(paths)
         return sfs
 
+    def _metadata(self, timestamp: float, index: int) -> dict[str, str]:
+        date = datetime.fromtimestamp(timestamp).isoformat()
+        metadata = {'date': date, 'software': URL, 'tracknumber': str(index)}
+        return metadata | self.metadata
+
+    def _path(self, timestamp: float, index: int) -> Path:
+        if name := track_names.track_name(self.track_names, self.track):
+            return self.output_path_pattern.make_track_name_path(
+                name, self.track, self.cfg.aliases, timestamp, index
+            )
+        return self.output_path_pattern.make_path(
+            self.track, self.cfg.aliases, timestamp, index
+        )
+
+    def _prepare_next(self, block_frames: int) -> None:
+        """Start opening the next file in the background, if one will be needed soon"""
+        if self.disk_writer is None or self._next is not None or not self._sfs:
+            return
+        samplerate = self.track.source.samplerate
+        remains = self._remains()
+        if remains is None or remains > ROLLOVER_LEAD_SECONDS * samplerate:
+            return
+
+        # _write_blocks moves to a new file at the first block which doesn't fit
+        blocks = max(0, -(-remains // block_frames) - 1)
+        timestamp = self.timestamp + blocks * block_frames / samplerate
+        index = 1 + len(self.files_written)
+        metadata = self._metadata(timestamp, index)
+        del metadata['date']
+        path = self._path(timestamp, index)
+        openers = self.openers
+        sfs: Future[list[SoundFile]] = Future()
+
+        def create() -> None:
+            try:
+                sfs.set_result([o.create(metadata, path) for o in openers])
+            except (OSError, RuntimeError) as e:
+                sfs.set_exception(e)
+
+        self._next = _NextFile(path, index, metadata, sfs)
+        self._submit(create, lane=OPEN_LANE)
+
+    def _take_next(
+        self, path: Path, index: int, metadata: dict[str, str]
+    ) -> list[SoundFile] | None:
+        """Return the files opened by _prepare_next, if they are ready and right"""
+        prepared, self._next = self._next, None
+        if prepared is None:
+            return None
+        if prepared.path == path:
+            # Opening the same path here could race the open lane past the
+            # exists() check in FileOpener.open, and the discard of the
+            # prepared files would then delete the file being recorded
+            futures.wait((prepared.sfs,))
+
+        undated = {k: v for k, v in metadata.items() if k != 'date'}
+        if prepared[:3] == (path, index, undated) and _opened(prepared.sfs):
+            sfs = prepared.sfs.result()
+            for opener, sf in zip(self.openers, sfs):
+                opener.set_metadata(sf, {'date': metadata['date']})
+            return sfs
+
+        self._discard_next(prepared)
+        return None
+
+    def _discard_next(self, prepared: _NextFile) -> None:
+        def discard() -> None:
+            if _opened(prepared.sfs):
+                for opener, sf in zip(self.openers, prepared.sfs.result()):
+                    self._close_file(opener, sf, False)
+
+        # Runs after the files are opened, because it is on the same lane
+        self._submit(discard, lane=OPEN_LANE)
+
     def _discard_file(self, path: Path) -> None:
         self.files_written.remove_path(path)
         self.file_start_frames.pop(path, None)
@@ -218,12 +424,7 @@ class ChannelWriter(Runnable):
         timestamp: float,
         should_record: bool,
         timeline_frame: int = 0,
-    ) -> ChannelState:
-        saved_state = self._state(
-            max_amp=max(block.max) / block.scale,
-            min_amp=min(block.min) / block.scale,
-        )
-
+    ) -> None:
         previous_timestamp = self.timestamp
         dt = timestamp - previous_timestamp
         self.timestamp = timestamp
@@ -231,7 +432,7 @@ class ChannelWriter(Runnable):
             self.timeline_frame = timeline_frame
         self._volume.accumulate(block)
 
-        if not self.do_not_record and (self._sfs or not self.stopped):
+        if not self.do_not_record and (self._recording or not self.stopped):
             expected_dt = len(block) / self.track.source.samplerate
 
             if (
@@ -241,94 +442,274 @@ class ChannelWriter(Runnable):
             ):
                 self._write_and_close()
 
-            self._blocks.append(block)
-
+            exact = self._exact_gate
             if should_record:
-                if not self._sfs:  # Record some quiet before the first block
-                    length = self.times.quiet_before_start + len(self._blocks[-1])
-                    self._blocks.clip(length, from_start=True)
-
-                self._write_blocks(self._blocks.blocks)
-                self._blocks.clear()
+                array = block.block
+                if exact:
+                    first, last = self._loud_frames(block)
+                    self.quiet_tail = len(block) - 1 - last
+                    if not self._recording:
+                        before = self.times.quiet_before_start - first
+                        self._quiet.clip(max(0, before), from_start=True, exact=True)
+                        array = array[max(0, -before) :]
+                elif not self._recording:  # Record some quiet before the first block
+                    self._quiet.clip(self.times.quiet_before_start, from_start=True)
+
+                self._write_blocks((*self._quiet_views(), array))
+                self._quiet.clear()
                 self.quiet_frames = 0
+                self._prepare_next(len(block))
             else:
+                self._quiet.append(block.block)
                 self.quiet_frames += len(block)
-                self._blocks.clip(
+                self._quiet.clip(
                     self.times.quiet_after_end
-                    if self._sfs
+                    if self._recording
                     else self.times.quiet_before_start,
                     from_start=True,
+                    exact=exact,
                 )
 
             if self.stopped or self.quiet_frames > self.times.stop_after_quiet:
                 self._write_and_close()
-
-        return self._state() - saved_state
+            elif self._buffer and (
+                self.timestamp - self._buffered_since
+                >= self.cfg.recording.write_buffer_seconds
+            ):
+                # Don't hold on to audio through a quiet stretch
+                self._flush()
 
     def _state(self, **kwargs: Any) -> ChannelState:
+        file_count, file_size, recorded_time = self.counters()
         return ChannelState(
-            file_count=len(self.files_written),
-            file_size=self.files_written.cached_total_size,
-            is_active=bool(self._sfs),
+            file_count=file_count,
+            file_size=file_size,
+            is_active=self._recording,
             max_write_seconds=self.max_write_seconds,
-            recorded_time=self.frames_written / self.track.source.samplerate,
+            recorded_time=recorded_time,
             timestamp=self.timestamp,
-            volume=list(self._volume.mean()),
+            volume=self.volume(),
             **kwargs,
         )
 
+    @property
+    def _recording(self) -> bool:
+        return bool(self._sfs) or self._held is not None
+
+    @property
+    def _exact_gate(self) -> bool:
+        return self.times.sample_accurate_gate and not self.times.record_everything
+
+    def _loud_frames(self, block: Block) -> tuple[int, int]:
+        """Return the first and last frames where a channel crosses the noise floor"""
+        level = time_settings.db_to_amplitude(self.noise_floor) * block.scale
+        b = block.block
+        loud = ((b >= level) | (b <= -level)).any(1)
+        if not loud.any():
+            return 0, len(loud) - 1
+        return int(loud.argmax()), len(loud) - 1 - int(loud[::-1].argmax())
+
     def _write_and_close(self) -> None:
-        # Record some quiet after the last block
-        self._blocks.clip(self.times.quiet_after_end, from_start=False)
+        if self._recording and self._exact_gate:
+            after = max(0, self.times.quiet_after_end - self.quiet_tail)
+            self._quiet.clip(after, from_start=False, exact=True)
+        else:
+            # Record some quiet after the last block
+            self._quiet.clip(self.times.quiet_after_end, from_start=False)
 
-        if self._sfs:
-            if self._blocks.blocks:
-                self._write_blocks(self._blocks.blocks)
-            self._blocks.clear()
+        if self._recording:
+            if self._quiet:
+                self._write_blocks(self._quiet_views())
+            self._quiet.clear()
 
         self._close()
+        if self._next is not None:
+            prepared, self._next = self._next, None
+            self._discard_next(prepared)
+
+    def _quiet_views(self) -> tuple[NDArray, ...]:
+        views = self._quiet.views()
+        if self.disk_writer is None or self._buffer is not None:
+            return views
+        # The ring buffer is reused, so a queued write needs its own copy
+        # unless the WriteBuffer has already copied it
+        return tuple(v.copy() for v in views)
+
+    def _submit(self, job: Callable[[], None], frames: int = 0, lane: str = '') -> None:
+        if self.disk_writer is None:
+            job()
+        else:
+            seconds = frames / self.track.source.samplerate
+            self.disk_writer.submit(job, seconds, lane)
 
-    def _write_blocks(self, blox: Iterable[Block]) -> None:
-        blocks = list(blox)
-
-        # The last block in the list ends at self.timestamp so
+    def _write_blocks(self, arrays: Sequence[NDArray]) -> None:
+        # The last array in the list ends at self.timestamp so
         # we keep track of the sample offset before that
-        offset = -sum(len(b) for b in blocks)
-
-        for b in blocks:
-            # Check if this block will overrun the file size or length
-            remains: list[int] = []
+        offset = -sum(len(a) for a in arrays)
+
+        for array in arrays:
+            while len(array):
+                # Check if this array will overrun the file size or length
+                remains = self._remains()
+                if self._sfs and remains is not None and remains <= len(array):
+                    start = time.monotonic()
+                    self._close()
+                    self._sfs = self._open(*self._position(offset))
+                    self.max_rollover_seconds = max(
+                        self.max_rollover_seconds, time.monotonic() - start
+                    )
+
+                if not self._recording:
+                    self._start(offset)
+
+                # Only a long run of stored quiet can overrun an empty file
+                length = len(array)
+                if (remains := self._remains()) is not None and remains <= length:
+                    length = max(1, remains - 1)
+
+                self._write(array[:length], offset)
+                offset += length
+                array = array[length:]
+
+    def _remains(self) -> int | None:
+        remains: list[int] = []
+
+        if self.longest_file_frames:
+            remains.append(self.longest_file_frames - self.frames_in_file)
+
+        if self._recording and self.largest_file_size:
+            file_bytes = self.largest_file_size - self.bytes_in_file
+            remains.append(file_bytes // self.frame_size)
+
+        return min(remains, default=None)
+
+    def _write(self, array: NDArray, offset: int) -> None:
+        if self.cfg.recording.preallocate:
+            self._reserve()
+        if self._held is not None:
+            self._hold(array)
+        elif self._buffer is None:
+            self._write_files(array)
+        else:
+            if not self._buffer:
+                self._buffered_since = self.timestamp
+            for ready in self._buffer.append(array):
+                self._write_files(ready)
+        end = offset + len(array)
+        end_frame = self.timeline_frame + end
+        end_timestamp = self.timestamp + end / self.track.source.samplerate
+        self.file_end_frames.update(
+            dict.fromkeys((Path(sf.name) for sf in self._sfs), end_frame)
+        )
+        self.file_end_timestamps.update(
+            dict.fromkeys((Path(sf.name) for sf in self._sfs), end_timestamp)
+        )
 
-            if self.longest_file_frames:
-                remains.append(self.longest_file_frames - self.frames_in_file)
+        self.frames_in_file += len(array)
+        self.frames_written += len(array)
+        self.bytes_in_file += len(array) * self.frame_size
+
+    def _hold(self, array: NDArray) -> None:
+        assert self._held is not None
+        self._held.append(array.copy())
+        frames = self.frames_in_file + len(array)
+        if (
+            frames < self.times.shortest_file_time
+            and frames * self.frame_size < self.cfg.recording.defer_open_bytes
+        ):
+            return
+
+        # The take is long enough, or too big to hold: write it all out
+        held, self._held = self._held, None
+        held_frames = self.frames_in_file
+        self._sfs = self._open(*self._take_start)
+        self.frames_in_file = held_frames
+        self.bytes_in_file += held_frames * self.frame_size
+        if self.cfg.recording.preallocate:
+            self._reserve()
+        self._write_files(np.concatenate(held))
+
+    def _reserve(self) -> None:
+        step = PREALLOCATE_SECONDS * self.track.source.samplerate * self.frame_size
+        if self.reserved_bytes - self.bytes_in_file > step // 2:
+            return
+
+        end = self.bytes_in_file + step
+        if self.longest_file_frames:
+            frames = self.longest_file_frames - self.frames_in_file
+            end = min(end, self.bytes_in_file + frames * self.frame_size)
+        if self.largest_file_size:
+            end = min(end, self.largest_file_size)
+
+        if end > self.reserved_bytes:
+            self.reserved_bytes = end
+            for format, opener, sf in zip(self.formats, self.openers, self._sfs):
+                self._submit(partial(opener.reserve, sf, end), lane=format)
+
+    def _write_files(self, array: NDArray) -> None:
+        for format, opener, sf in zip(self.formats, self.openers, self._sfs):
+            write = partial(self._write_file, opener, sf, array)
+            self._submit(write, len(array), format)
+
+        interval = self.cfg.recording.header_checkpoint_seconds
+        if interval and self.timestamp - self.checkpoint_timestamp >= interval:
+            self.checkpoint_timestamp = self.timestamp
+            for format, opener, sf in zip(self.formats, self.openers, self._sfs):
+                self._submit(partial(self._checkpoint, opener, sf), lane=format)
+
+    def _flush(self) -> None:
+        if self._buffer is not None:
+            for ready in self._buffer.take():
+                self._write_files(ready)
+
+    def _write_file(self, opener: FileOpener, sf: SoundFile, array: NDArray) -> None:
+        start = time.monotonic()
+        sf.write(array)
+        opener.written(sf)
+        self.max_write_seconds = max(self.max_write_seconds, time.monotonic() - start)
+
+    def _checkpoint(self, opener: FileOpener, sf: SoundFile) -> None:
+        start = time.monotonic()
+        with contextlib.suppress(OSError):
+            opener.checkpoint(sf)
+        elapsed = time.monotonic() - start
+        self.max_checkpoint_seconds = max(self.max_checkpoint_seconds, elapsed)
+
+    def _close_file(self, opener: FileOpener, sf: SoundFile, keep: bool) -> None:
+        if keep:
+            opener.close(sf)
+            # Runs on a disk writer thread: list.append is atomic
+            self.files_closed.append(Path(sf.name))
+        else:
+            with contextlib.suppress(OSError, RuntimeError):
+                sf.close()
+            with contextlib.suppress(OSError):
+                Path(sf.name).unlink()
+
+    def take_files_closed(self) -> list[Path]:
+        count = len(self.files_closed)
+        closed = self.files_closed[:count]
+        del self.files_closed[:count]
+        for path in closed:
+            self.file_start_frames.pop(path, None)
+            self.file_start_timestamps.pop(path, None)
+        return closed
+
+    def take_file_ends(self) -> tuple[dict[Path, int], dict[Path, float]]:
+        """Return the file ends which moved since the last call, and forget them"""
+        with self._lock:
+            frames, self.file_end_frames = self.file_end_frames, {}
+            timestamps, self.file_end_timestamps = self.file_end_timestamps, {}
+        return frames, timestamps
 
-            if self._sfs and self.largest_file_size:
-                file_bytes = self.largest_file_size - self.bytes_in_file
-                remains.append(file_bytes // self.frame_size)
 
-            if remains and min(remains) <= len(b):
-                self._close()
+def _opened(sfs: Future[list[SoundFile]]) -> bool:
+    return sfs.done() and sfs.exception() is None
 
-            self._sfs = self._sfs or self._open(offset)
-            for sf in self._sfs:
-                start = time.monotonic()
-                sf.write(b.block)
-                self.max_write_seconds = max(
-                    self.max_write_seconds, time.monotonic() - start
-                )
-            offset += len(b)
-            end_frame = self.timeline_frame + offset
-            end_timestamp = self.timestamp + offset / self.track.source.samplerate
-            self.file_end_frames.update(
-                dict.fromkeys((Path(sf.name) for sf in self._sfs), end_frame)
-            )
-            self.file_end_timestamps.update(
-                dict.fromkeys((Path(sf.name) for sf in self._sfs), end_timestamp)
-            )
 
-            self.frames_in_file += len(b)
-            self.frames_written += len(b)
-            self.bytes_in_file += len(b) * self.frame_size
+def _do_not_record(cfg: Cfg, meter_only: bool) -> bool:
+    general = cfg.general
+    return meter_only or general.dry_run or general.calibrate or general.silence_preview
 
 
 def _noise_floor(cfg: Cfg, track: Track) -> float:
@@ -356,3 +737,7 @@ def _longest_file_frames(times: time_settings.TimeSettings[int]) -> int:
     if times.record_everything:
         return 0
     return times.longest_file_time
+
+
+def _quiet_frames(times: time_settings.TimeSettings[int]) -> int:
+    return max(times.quiet_before_start, times.quiet_after_end)
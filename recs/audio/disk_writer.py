@@ -0,0 +1,175 @@
+import threading
+from collections import deque
+from collections.abc import Callable
+from time import monotonic
+from typing import NamedTuple
+
+from threa import Runnable
+
+
+class _Job(NamedTuple):
+    function: Callable[[], None]
+    seconds: float
+    submitted: float
+
+
+class _Lane:
+    """An ordered queue of jobs with its own thread"""
+
+    busy: bool = False
+    max_job_seconds: float = 0.0
+    queued_seconds: float = 0.0
+    thread: threading.Thread | None = None
+
+    def __init__(self) -> None:
+        self.jobs: deque[_Job] = deque()
+
+    @property
+    def pending(self) -> bool:
+        return bool(self.jobs) or self.busy
+
+
+class DiskWriter(Runnable):
+    """Runs the file writes for one source on background threads.
+
+    Jobs are submitted to named lanes, one per output format, so slow
+    encoders run alongside fast ones.  Each lane runs its jobs in order on
+    its own thread, and is bounded in seconds of audio: if a lane falls that
+    far behind, `submit` waits for it to catch up.
+
+    Every track of the source submits its own writes for the same audio, so
+    the seconds of each job are divided by `tracks`, and the bound is in
+    seconds of the source, the same as the input buffer.
+
+    Before `start` and after `stop`, jobs run immediately on the caller's
+    thread.
+    """
+
+    max_latency_seconds: float = 0.0
+    max_queued_seconds: float = 0.0
+
+    def __init__(
+        self, max_seconds: float, name: str = 'DiskWriter', tracks: int = 1
+    ) -> None:
+        super().__init__()
+        self.max_seconds = max_seconds
+        self.tracks = tracks
+        self.name = name
+        self.error: Exception | None = None
+        self.lanes: dict[str, _Lane] = {}
+        self._closing = False
+        self._condition = threading.Condition()
+        self._fence_lock = threading.Lock()
+
+    @property
+    def queued_jobs(self) -> int:
+        return sum(len(lane.jobs) for lane in self.lanes.values())
+
+    @property
+    def queued_seconds(self) -> float:
+        return max((lane.queued_seconds for lane in self.lanes.values()), default=0.0)
+
+    @property
+    def max_job_seconds(self) -> dict[str, float]:
+        return {name: lane.max_job_seconds for name, lane in self.lanes.items()}
+
+    def submit(
+        self, function: Callable[[], None], seconds: float = 0.0, lane: str = ''
+    ) -> None:
+        self._raise_error()
+        if not self.running or self._closing:
+            function()
+            return
+
+        seconds /= max(1, self.tracks)
+        with self._condition:
+            ln = self._lane(lane)
+            while ln.pending and ln.queued_seconds + seconds > self.max_seconds:
+                self._condition.wait()
+            self._append(ln, _Job(function, seconds, monotonic()))
+
+    def after(self, function: Callable[[], None]) -> None:
+        """Run `function` once every lane has finished its jobs so far"""
+        self._raise_error()
+        with self._condition:
+            lanes = [ln for ln in self.lanes.values() if ln.pending]
+            if lanes and not self._closing:
+                remaining = [len(lanes)]
+
+                def countdown() -> None:
+                    with self._fence_lock:
+                        remaining[0] -= 1
+                        if remaining[0]:
+                            return
+                    function()
+
+                for ln in lanes:
+                    self._append(ln, _Job(countdown, 0.0, monotonic()))
+                return
+        function()
+
+    def flush(self) -> None:
+        with self._condition:
+            while any(lane.pending for lane in self.lanes.values()):
+                self._condition.wait()
+        self._raise_error()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        for lane in self.lanes.values():
+            t = lane.thread
+            if t is not None and t.is_alive() and t is not threading.current_thread():
+                t.join()
+        self.running = False
+        self.stopped = True
+
+    def _lane(self, name: str) -> _Lane:
+        if (lane := self.lanes.get(name)) is None:
+            lane = self.lanes[name] = _Lane()
+            lane.thread = threading.Thread(
+                target=self._run,
+                args=(lane,),
+                daemon=True,
+                name=f'{self.name}-{name}' if name else self.name,
+            )
+            lane.thread.start()
+        return lane
+
+    def _append(self, lane: _Lane, job: _Job) -> None:
+        lane.jobs.append(job)
+        lane.queued_seconds += job.seconds
+        self.max_queued_seconds = max(self.max_queued_seconds, lane.queued_seconds)
+        self._condition.notify_all()
+
+    def _run(self, lane: _Lane) -> None:
+        while True:
+            with self._condition:
+                while not lane.jobs and not self._closing:
+                    self._condition.wait()
+                if not lane.jobs:
+                    return
+                job = lane.jobs.popleft()
+                lane.busy = True
+
+            start = monotonic()
+            try:
+                job.function()
+            except Exception as e:  # noqa: BLE001 - raised on the next submit
+                self.error = self.error or e
+
+            end = monotonic()
+            with self._condition:
+                lane.busy = False
+                lane.queued_seconds -= job.seconds
+                lane.max_job_seconds = max(lane.max_job_seconds, end - start)
+                self.max_latency_seconds = max(
+                    self.max_latency_seconds, end - job.submitted
+                )
+                self._condition.notify_all()
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
@@ -1,19 +1,46 @@
+import contextlib
+import ctypes
 import itertools
+import os
+import sys
 from collections.abc import Mapping
 from pathlib import Path
 
 import soundfile
 from pydantic import BaseModel
 
-from recs.base.types import Format, Subtype
+from recs.base.types import Format, PageCache, Subtype
 from recs.cfg.metadata import ALLOWS_METADATA
 
+from . import wav_header
+
+# From sndfile.h: write RF64, but rewrite it as WAV on close if it fits
+SFC_RF64_AUTO_DOWNGRADE = 0x1210
+
+# From linux/falloc.h: allocate disk space but leave the file size alone
+FALLOC_FL_KEEP_SIZE = 1
+
+# Formats whose size can be predicted from the number of frames
+UNCOMPRESSED = Format.raw, Format.rf64, Format.wav
+
+# From sndfile.h, and the encoders' own limits, which libsndfile only reports
+# as "Format not recognised" when the file is opened
+SF_MAX_CHANNELS = 1024
+MAX_CHANNELS = {Format.flac: 8, Format.mp3: 2, Format.ogg: 255}
+
+
+def max_channels(format: Format) -> int:
+    return MAX_CHANNELS.get(format, SF_MAX_CHANNELS)
+
 
 class FileOpener(BaseModel):
     format: Format
     channels: int = 1
     samplerate: int = 48_000
     subtype: Subtype | None = None
+    rf64_continuation: bool = False
+    preallocate: bool = False
+    page_cache: PageCache = PageCache.keep
 
     def open(
         self, path: Path | str, metadata: Mapping[str, str], overwrite: bool = False
@@ -26,20 +53,51 @@ class FileOpener(BaseModel):
         if subtype is None and soundfile.check_format(self.format, Subtype.float):
             subtype = Subtype.float
 
+        continuation = self.rf64_continuation and self.format == Format.wav
         fp = soundfile.SoundFile(
             channels=self.channels,
             file=path,
-            format=self.format,
+            format=Format.rf64 if continuation else self.format,
             mode='w',
             samplerate=self.samplerate,
             subtype=subtype,
         )
+        if continuation:
+            _auto_downgrade(fp)
+
+        self.set_metadata(fp, metadata)
+        return fp
 
+    def set_metadata(
+        self, fp: soundfile.SoundFile, metadata: Mapping[str, str]
+    ) -> None:
+        """Set metadata on a file which has not been written to yet"""
         if self.format in ALLOWS_METADATA:
             for k, v in metadata.items():
                 setattr(fp, k, v)
 
-        return fp
+    def reserve(self, fp: soundfile.SoundFile, size: int) -> None:
+        """Reserve disk space for the first `size` bytes of a file"""
+        if self.preallocate and self.format in UNCOMPRESSED:
+            _fallocate(fp.name, size)
+
+    def checkpoint(self, fp: soundfile.SoundFile) -> None:
+        """Make the header of a file match the audio written so far"""
+        if self.format in (Format.rf64, Format.wav):
+            wav_header.checkpoint(fp.name)
+
+    def written(self, fp: soundfile.SoundFile) -> None:
+        """Called after each write to a file"""
+        if self.page_cache == PageCache.drop:
+            _drop_cache(fp.name)
+
+    def close(self, fp: soundfile.SoundFile) -> None:
+        fp.close()
+        if self.preallocate and self.format in UNCOMPRESSED:
+            # Give back whatever was reserved but never written
+            with contextlib.suppress(OSError):
+                os.truncate(fp.name, os.path.getsize(fp.name))
+        self.written(fp)
 
     def create(self, metadata: Mapping[str, str], path: Path) -> soundfile.SoundFile:
         path.parent.mkdir(exist_ok=True, parents=True)
@@ -51,3 +109,39 @@ class FileOpener(BaseModel):
             except FileExistsError:
                 pass
         raise FileNotFoundError
+
+
+def _auto_downgrade(fp: soundfile.SoundFile) -> None:
+    # soundfile has no public wrapper for sf_command
+    snd, ffi = soundfile._snd, soundfile._ffi
+    snd.sf_command(fp._file, SFC_RF64_AUTO_DOWNGRADE, ffi.NULL, 1)
+
+
+def _fallocate(path: str, size: int) -> None:
+    # libsndfile computes its header from the file size, so the space is
+    # reserved without changing it, which os.posix_fallocate can't do
+    if not sys.platform.startswith('linux'):
+        return
+
+    with contextlib.suppress(AttributeError, OSError):
+        fallocate = ctypes.CDLL(None).fallocate
+        fd = os.open(path, os.O_WRONLY)
+        try:
+            # Failure only means the space is allocated as it is written
+            length = ctypes.c_int64(size)
+            fallocate(fd, FALLOC_FL_KEEP_SIZE, ctypes.c_int64(0), length)
+        finally:
+            os.close(fd)
+
+
+def _drop_cache(path: str) -> None:
+    if not hasattr(os, 'posix_fadvise'):
+        return
+
+    with contextlib.suppress(OSError):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            # Starts writing back dirty pages, and drops the clean ones
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
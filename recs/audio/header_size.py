@@ -2,9 +2,16 @@ from collections.abc import Mapping
 
 from recs.base.types import Format
 
+# RF64 adds a ds64 chunk and an extensible fmt chunk.  A .wav file which can
+# turn into RF64 reserves the same space, plus a little more, in a JUNK chunk.
+RF64_EXTRA = 60
+RF64_CONTINUATION_EXTRA = 68
 
-def header_size(metadata: Mapping[str, str], format: Format) -> int:
-    if format != Format.wav:
+
+def header_size(
+    metadata: Mapping[str, str], format: Format, rf64_continuation: bool = False
+) -> int:
+    if format not in (Format.wav, Format.rf64):
         return 0
 
     tag = 9
@@ -13,4 +20,7 @@ def header_size(metadata: Mapping[str, str], format: Format) -> int:
     values = (software * (k == 'software') + tag + len(v) for k, v in metadata.items())
     values = (v + v % 2 for v in values)
 
-    return base + first * bool(metadata) + sum(values)
+    size = base + first * bool(metadata) + sum(values)
+    if format == Format.rf64:
+        return size + RF64_EXTRA
+    return size + RF64_CONTINUATION_EXTRA * rf64_continuation
@@ -0,0 +1,33 @@
+import numbers
+from typing import NamedTuple
+
+import numpy as np
+
+
+class Levels(NamedTuple):
+    """Per-channel peak statistics for a block of audio.
+
+    A whole source is analyzed with one reduction per statistic, and each
+    track selects its own channels from the result.
+    """
+
+    max: np.ndarray
+    min: np.ndarray
+    scale: float
+
+    @classmethod
+    def analyze(cls, array: np.ndarray) -> 'Levels':
+        return cls(array.max(0), array.min(0), dtype_scale(array.dtype))
+
+    def select(self, index: slice) -> 'Levels':
+        return Levels(self.max[index], self.min[index], self.scale)
+
+    @property
+    def amplitude(self) -> np.ndarray:
+        return (self.max.astype(float) - self.min) / (2 * self.scale)
+
+
+def dtype_scale(dtype: np.dtype) -> float:
+    if not issubclass(dtype.type, numbers.Integral):
+        return 1
+    return float(1 << (8 * dtype.itemsize - 1))
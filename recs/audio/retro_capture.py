@@ -0,0 +1,78 @@
+import numpy as np
+
+from recs.base import memory
+
+from .ring_buffer import RingBuffer
+
+SAMPLE_BYTES = 2
+
+
+class RetroCapture:
+    """Keeps the last few minutes of a source's input, to save after the fact.
+
+    The audio is held as 16-bit integers in a RingBuffer sized once, when the
+    source starts, and shrunk to leave `memory_reserve_megabytes` free.
+
+    The ring has room for `max_append_seconds` past the capture, and longer
+    appends go in pieces that size, so the ring is never grown and copied.
+    """
+
+    end_frame: int = 0
+    end_timestamp: float = 0.0
+
+    def __init__(
+        self,
+        seconds: float,
+        samplerate: int,
+        channels: int,
+        reserve_bytes: int,
+        max_append_seconds: float = 0.0,
+    ) -> None:
+        self.samplerate = samplerate
+        self.warnings: list[str] = []
+        self.frames = round(seconds * samplerate)
+        self.headroom = round(max_append_seconds * samplerate)
+
+        frame_bytes = channels * SAMPLE_BYTES
+        available = memory.available_bytes()
+        if (
+            self.frames
+            and available is not None
+            and (self.frames + self.headroom) * frame_bytes > available - reserve_bytes
+        ):
+            fits = max(0, available - reserve_bytes) // frame_bytes
+            self.frames = max(0, fits - self.headroom)
+            self.warnings.append(
+                f'Only {self.frames / samplerate:.0f} of {seconds:.0f} seconds '
+                'of retroactive capture fit in memory'
+            )
+        self.ring = RingBuffer(self.frames + self.headroom)
+
+    def append(self, array: np.ndarray, end_timestamp: float, end_frame: int) -> None:
+        if not self.frames:
+            return
+        step = self.headroom or max(1, len(array))
+        for i in range(0, len(array), step):
+            self.ring.append(to_int16(array[i : i + step]))
+            self.ring.clip(self.frames, from_start=True, exact=True)
+        self.end_timestamp, self.end_frame = end_timestamp, end_frame
+
+    def take(self) -> tuple[np.ndarray, float, int] | None:
+        """Return a copy of the audio held, with its start timestamp and frame"""
+        if not (views := self.ring.views()):
+            return None
+        array = np.concatenate(views)
+        start_timestamp = self.end_timestamp - len(array) / self.samplerate
+        return array, start_timestamp, self.end_frame - len(array)
+
+    def take_warnings(self) -> list[str]:
+        warnings, self.warnings = self.warnings, []
+        return warnings
+
+
+def to_int16(array: np.ndarray) -> np.ndarray:
+    if array.dtype == np.int16:
+        return array
+    if array.dtype.kind == 'f':
+        return (np.clip(array, -1, 1) * 0x7FFF).astype(np.int16)
+    return (array >> (8 * array.dtype.itemsize - 16)).astype(np.int16)
@@ -0,0 +1,91 @@
+from collections import deque
+
+import numpy as np
+
+
+class RingBuffer:
+    """A preallocated queue of audio frames, trimmed at block boundaries.
+
+    Appending copies a block into a fixed numpy array, so holding pre-roll
+    and post-roll quiet allocates nothing once the buffer has been sized.
+    The contents come out as at most two contiguous views.
+    """
+
+    _array: np.ndarray | None = None
+
+    def __init__(self, capacity: int = 0) -> None:
+        self.capacity = capacity
+        self._lengths: deque[int] = deque()
+        self._start = 0
+        self._frames = 0
+
+    def __len__(self) -> int:
+        return self._frames
+
+    def append(self, block: np.ndarray) -> None:
+        frames = len(block)
+        array = self._reserve(frames, block)
+        size = len(array)
+
+        end = (self._start + self._frames) % size
+        head = min(frames, size - end)
+        array[end : end + head] = block[:head]
+        array[: frames - head] = block[head:]
+
+        self._frames += frames
+        self._lengths.append(frames)
+
+    def clip(self, frames: int, from_start: bool, exact: bool = False) -> None:
+        """Drop whole blocks from one end until at most `frames` remain.
+
+        If `exact` is true, the last block dropped is cut so exactly `frames`
+        remain.
+        """
+        assert frames >= 0
+        index = 0 if from_start else -1
+        while self._frames > frames:
+            excess = self._frames - frames
+            length = self._lengths[index]
+            if exact and length > excess:
+                self._lengths[index] = length - excess
+                length = excess
+            else:
+                del self._lengths[index]
+            if from_start:
+                self._start = (self._start + length) % len(self._array)
+            self._frames -= length
+
+    def clear(self) -> None:
+        self._lengths.clear()
+        self._start = self._frames = 0
+
+    def views(self) -> tuple[np.ndarray, ...]:
+        if self._array is None or not self._frames:
+            return ()
+        end = self._start + self._frames
+        if end <= len(self._array):
+            return (self._array[self._start : end],)
+        return self._array[self._start :], self._array[: end - len(self._array)]
+
+    def _reserve(self, frames: int, block: np.ndarray) -> np.ndarray:
+        array = self._array
+        needed = self._frames + frames
+        if (
+            array is not None
+            and needed <= len(array)
+            and array.dtype == block.dtype
+            and array.shape[1:] == block.shape[1:]
+        ):
+            return array
+
+        # Leave room for the block that goes in before the next trim
+        size = max(needed, self.capacity + 2 * frames)
+        resized = np.empty((size, *block.shape[1:]), dtype=block.dtype)
+        views = self.views()
+        if views and array is not None and array.shape[1:] == block.shape[1:]:
+            resized[: self._frames] = np.concatenate(views)
+        else:
+            self.clear()
+        self._array = resized
+        self._start = 0
+        return resized
@@ -0,0 +1,45 @@
+from collections import deque
+
+import numpy as np
+
+
+class SlabPool:
+    """A fixed set of preallocated audio buffers, shared between two threads.
+
+    The audio callback copies each block into a free slab with `put`, and the
+    slab goes back to the pool with `release` once its last reader has
+    finished.  `put` returns None when every slab is in use.
+
+    `deque.append` and `deque.popleft` are atomic, so no lock is needed.
+    """
+
+    def __init__(self, count: int, shape: tuple[int, ...], dtype: np.dtype) -> None:
+        self.slabs = np.empty((count, *shape), dtype=dtype)
+        self._free = deque(range(count))
+
+    @property
+    def frames(self) -> int:
+        return self.slabs.shape[1]
+
+    @property
+    def free(self) -> int:
+        return len(self._free)
+
+    def fits(self, array: np.ndarray) -> bool:
+        return (
+            len(array) <= self.frames
+            and array.shape[1:] == self.slabs.shape[2:]
+            and array.dtype == self.slabs.dtype
+        )
+
+    def put(self, array: np.ndarray) -> tuple[int, np.ndarray] | None:
+        try:
+            index = self._free.popleft()
+        except IndexError:
+            return None
+        slab = self.slabs[index, : len(array)]
+        slab[:] = array
+        return index, slab
+
+    def release(self, index: int) -> None:
+        self._free.append(index)
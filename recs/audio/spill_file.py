@@ -0,0 +1,195 @@
+import contextlib
+import os
+import tempfile
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Generic, NamedTuple, TypeVar
+
+import numpy as np
+
+from .slab_pool import SlabPool
+
+T = TypeVar('T')
+
+
+class _Record(NamedTuple):
+    offset: int
+    shape: tuple[int, ...]
+    dtype: np.dtype
+    info: Any
+
+
+class SpillFile(Generic[T]):
+    """A preallocated scratch file which holds blocks of audio in order.
+
+    One thread calls `put` and another calls `get`.  The file is used as a
+    ring: a block which won't fit before the end goes back to the start, if
+    the blocks there have been read.  The file is deleted once it's closed.
+
+    `deque.append` and `deque.popleft` are atomic, and a block is only
+    removed after it has been read, so no lock is needed.
+    """
+
+    def __init__(self, directory: Path, capacity: int) -> None:
+        self.capacity = capacity
+        self._records: deque[_Record] = deque()
+        self._tail = 0
+        with contextlib.ExitStack() as stack:
+            # The file stays open until close(), unless it can't be allocated
+            self._file = stack.enter_context(
+                tempfile.TemporaryFile(prefix='recs-spill-', dir=directory)
+            )
+            self._fd = self._file.fileno()
+            if hasattr(os, 'posix_fallocate'):
+                os.posix_fallocate(self._fd, 0, capacity)
+            else:
+                os.ftruncate(self._fd, capacity)
+            stack.pop_all()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def put(self, array: np.ndarray, info: T) -> bool:
+        """Write a block to the file, or return False if there is no room"""
+        array = np.ascontiguousarray(array)
+        if (offset := self._reserve(array.nbytes)) is None:
+            return False
+        _pwrite(self._fd, memoryview(array).cast('B'), offset)
+        self._tail = offset + array.nbytes
+        self._records.append(_Record(offset, array.shape, array.dtype, info))
+        return True
+
+    def get(self) -> tuple[np.ndarray, T] | None:
+        """Read back the oldest block, or return None if there are none"""
+        try:
+            record = self._records[0]
+        except IndexError:
+            return None
+        array = np.empty(record.shape, record.dtype)
+        _pread(self._fd, memoryview(array).cast('B'), record.offset)
+        self._records.popleft()
+        return array, record.info
+
+    def close(self) -> None:
+        self._records.clear()
+        self._file.close()
+
+    def _reserve(self, size: int) -> int | None:
+        try:
+            head = self._records[0].offset
+        except IndexError:
+            # Everything has been read, so start again at the beginning
+            return 0 if size <= self.capacity else None
+
+        if head < self._tail:
+            if self._tail + size <= self.capacity:
+                return self._tail
+            return 0 if size <= head else None
+        return self._tail if self._tail + size <= head else None
+
+
+class SpillWriter(Generic[T]):
+    """Spills blocks to a SpillFile from its own thread.
+
+    `put` is called from the audio callback, so it only copies the block into
+    a small pool of slabs holding up to `stage_frames`.  A thread writes the
+    staged blocks to the file in order, and `get` returns the oldest block,
+    from the file or, if the thread has not written it yet, from the stage.
+
+    The thread and `get` take turns under a lock, so a block is never both
+    read from the stage and written to the file.  `put` takes no lock.
+    """
+
+    def __init__(self, spill: SpillFile[T], stage_frames: int) -> None:
+        self.spill = spill
+        self.stage_frames = stage_frames
+        self.pool: SlabPool | None = None
+        self._staged: deque[tuple[int | None, np.ndarray, T]] = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name='Spill')
+        self._thread.start()
+
+    def __len__(self) -> int:
+        # A block moving to the file is in the file before it leaves the stage
+        return len(self.spill) + len(self._staged)
+
+    def put(self, array: np.ndarray, info: T) -> bool:
+        """Stage a copy of a block, or return False if the stage is full"""
+        if self.pool is None:
+            count = max(2, -(-self.stage_frames // len(array)))
+            self.pool = SlabPool(count, array.shape, array.dtype)
+        if not self.pool.fits(array):
+            # Blocks larger than the first one are rare enough to allocate
+            self._staged.append((None, array.copy(), info))
+        elif (copied := self.pool.put(array)) is None:
+            return False
+        else:
+            self._staged.append((*copied, info))
+        self._wake.set()
+        return True
+
+    def get(self) -> tuple[np.ndarray, T] | None:
+        """Read back the oldest block, or return None if there are none"""
+        with self._lock:
+            if (spilled := self.spill.get()) is not None:
+                self._wake.set()  # There may be room for staged blocks now
+                return spilled
+            try:
+                slab, array, info = self._staged.popleft()
+            except IndexError:
+                return None
+            array = array.copy()
+        self._release(slab)
+        return array, info
+
+    def close(self) -> None:
+        self._closing = True
+        self._wake.set()
+        self._thread.join()
+        self._staged.clear()
+        self.spill.close()
+
+    def _run(self) -> None:
+        while not self._closing:
+            self._wake.wait()
+            self._wake.clear()
+            while self._staged and not self._closing:
+                with self._lock:
+                    if not self._staged:
+                        break  # get() took the last one
+                    slab, array, info = self._staged[0]
+                    if not self.spill.put(array, info):
+                        break  # The file is full until get() reads some back
+                    self._staged.popleft()
+                self._release(slab)
+
+    def _release(self, slab: int | None) -> None:
+        if slab is not None and self.pool is not None:
+            self.pool.release(slab)
+
+
+def _pwrite(fd: int, view: memoryview, offset: int) -> None:
+    while view:
+        if hasattr(os, 'pwrite'):
+            written = os.pwrite(fd, view, offset)
+        else:
+            os.lseek(fd, offset, os.SEEK_SET)
+            written = os.write(fd, view)
+        view, offset = view[written:], offset + written
+
+
+def _pread(fd: int, view: memoryview, offset: int) -> None:
+    while view:
+        if hasattr(os, 'preadv'):
+            read = os.preadv(fd, [view], offset)
+        else:
+            os.lseek(fd, offset, os.SEEK_SET)
+            data = os.read(fd, len(view))
+            view[: len(data)] = data
+            read = len(data)
+        if not read:
+            raise OSError(f'Spill file ended at byte {offset}')
+        view, offset = view[read:], offset + read
@@ -0,0 +1,73 @@
+"""
+Make compressed copies of a closed recording.
+
+Run as `recs transcode`, usually by a low-priority subprocess of the
+recorder, which prints the path of each file it writes.
+"""
+
+import argparse
+import sys
+from collections.abc import Sequence
+from pathlib import Path
+
+import soundfile
+
+from recs.base.types import Format, Subtype
+
+from .file_opener import FileOpener
+
+# Formats which are cheap enough to write from the audio process
+PRIMARY_FORMATS = Format.wav, Format.rf64
+BLOCKSIZE = 0x10000
+
+
+def split_formats(formats: Sequence[Format]) -> tuple[Format, list[Format]]:
+    """Split formats into one to record, and the rest to transcode later"""
+    primary = next((f for f in formats if f in PRIMARY_FORMATS), Format.wav)
+    return primary, [f for f in formats if f != primary]
+
+
+def transcode(
+    path: Path, formats: Sequence[Format], subtype: Subtype | None = None
+) -> list[Path]:
+    written: list[Path] = []
+    with soundfile.SoundFile(path) as source:
+        metadata = {k: v for k, v in source.copy_metadata().items() if v}
+        for format in formats:
+            ok = subtype and soundfile.check_format(format, subtype)
+            opener = FileOpener(
+                format=format,
+                channels=source.channels,
+                samplerate=source.samplerate,
+                subtype=subtype if ok else None,
+            )
+            # mp3 and float32 crashes every time on my machine
+            dtype = 'float64' if format == Format.mp3 else 'float32'
+            source.seek(0)
+            with opener.open(path, metadata) as sf:
+                for block in source.blocks(BLOCKSIZE, dtype=dtype, always_2d=True):
+                    sf.write(block)
+                written.append(Path(sf.name))
+    return written
+
+
+def main(argv: list[str]) -> int:
+    args = _parser().parse_args(argv)
+    try:
+        paths = transcode(args.path, args.format, args.subtype)
+    except (OSError, RuntimeError, soundfile.LibsndfileError) as e:
+        print(f'{args.path}: {e}', file=sys.stderr)
+        return 1
+    for path in paths:
+        print(path)
+    return 0
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='recs transcode')
+    parser.add_argument('path', type=Path)
+    parser.add_argument(
+        '--format', action='append', default=[], required=True, type=Format
+    )
+    parser.add_argument('--subtype', type=Subtype)
+    return parser
@@ -0,0 +1,139 @@
+"""
+Find and rewrite the size fields in the header of a .wav or RF64 file.
+
+libsndfile only fills in these sizes when a file is closed, so a file cut
+off by a crash or a power failure has a header which says it is empty.
+Patching the sizes while the file is being written means that it opens
+with everything up to the last checkpoint.
+"""
+
+import os
+import struct
+from pathlib import Path
+from typing import NamedTuple
+
+CHUNK = struct.Struct('<4sI')
+HEADER_BYTES = 0x1000  # Much more than any header recs writes
+UNKNOWN = 0xFFFF_FFFF
+
+
+class Layout(NamedTuple):
+    rf64: bool
+    block_align: int
+    data: int  # The offset of the first byte of audio
+    ds64: int = 0  # The offset of the body of the ds64 chunk in an RF64 file
+    fact: int = 0  # The offset of the body of the fact chunk, if there is one
+    channels: int = 0
+    samplerate: int = 0
+
+
+def read_layout(header: bytes) -> Layout | None:
+    """Return the layout of a .wav or RF64 header, or None if it isn't one"""
+    if header[:4] not in (b'RIFF', b'RF64') or header[8:12] != b'WAVE':
+        return None
+
+    offsets: dict[bytes, int] = {}
+    offset = 12
+    while offset + CHUNK.size <= len(header):
+        chunk, size = CHUNK.unpack_from(header, offset)
+        offsets[chunk] = offset + CHUNK.size
+        if chunk == b'data':
+            break
+        offset += CHUNK.size + size + size % 2
+
+    if b'data' not in offsets or b'fmt ' not in offsets:
+        return None
+
+    channels, samplerate, _, block_align = struct.unpack_from(
+        '<HIIH', header, offsets[b'fmt '] + 2
+    )
+    rf64 = header[:4] == b'RF64'
+    if not block_align or (rf64 and b'ds64' not in offsets):
+        return None
+
+    return Layout(
+        rf64=rf64,
+        block_align=block_align,
+        data=offsets[b'data'],
+        ds64=offsets.get(b'ds64', 0),
+        fact=offsets.get(b'fact', 0),
+        channels=channels,
+        samplerate=samplerate,
+    )
+
+
+def size_fields(layout: Layout, file_size: int) -> list[tuple[int, bytes]]:
+    """Return the writes which make a header match a file of `file_size` bytes"""
+    data_size = file_size - layout.data
+    frames = data_size // layout.block_align
+    if layout.rf64:
+        return [(layout.ds64, struct.pack('<QQQ', file_size - 8, data_size, frames))]
+
+    def size(offset: int, value: int) -> tuple[int, bytes]:
+        # A .wav file over 4G is marked as having an unknown size
+        return offset, struct.pack('<I', min(value, UNKNOWN))
+
+    fields = [size(4, file_size - 8), size(layout.data - 4, data_size)]
+    if layout.fact:
+        fields.append(size(layout.fact, frames))
+    return fields
+
+
+def checkpoint(path: Path | str) -> bool:
+    """Make the sizes in a header match the file as it is now.
+
+    Returns False if the file isn't a .wav or RF64 file.
+    """
+    return _patch(path) is not None
+
+
+def repair(
+    path: Path | str, channels: int | None = None, samplerate: int | None = None
+) -> bool:
+    """Fix the sizes in a header, writing only the bytes which are wrong.
+
+    Returns True if anything needed fixing.  Raises ValueError, and changes
+    nothing, if the file isn't a .wav or RF64 file, or if its header doesn't
+    match the expected channels and sample rate.
+    """
+    if (changed := _patch(path, channels, samplerate)) is None:
+        raise ValueError(f'{path}: not a .wav or RF64 file')
+    return changed
+
+
+def _patch(
+    path: Path | str, channels: int | None = None, samplerate: int | None = None
+) -> bool | None:
+    fd = os.open(path, os.O_RDWR | getattr(os, 'O_BINARY', 0))
+    try:
+        header = _pread(fd, HEADER_BYTES, 0)
+        if (layout := read_layout(header)) is None:
+            return None
+
+        for name, expected in ('channels', channels), ('samplerate', samplerate):
+            actual = getattr(layout, name)
+            if expected is not None and actual != expected:
+                raise ValueError(f'{path}: {name} is {actual}, expected {expected}')
+
+        fields = size_fields(layout, os.fstat(fd).st_size)
+        wrong = [(o, d) for o, d in fields if header[o : o + len(d)] != d]
+        for offset, data in wrong:
+            _pwrite(fd, data, offset)
+        return bool(wrong)
+    finally:
+        os.close(fd)
+
+
+def _pread(fd: int, size: int, offset: int) -> bytes:
+    if hasattr(os, 'pread'):
+        return os.pread(fd, size, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, size)
+
+
+def _pwrite(fd: int, data: bytes, offset: int) -> None:
+    if hasattr(os, 'pwrite'):
+        os.pwrite(fd, data, offset)
+    else:
+        os.lseek(fd, offset, os.SEEK_SET)
+        os.write(fd, data)
@@ -0,0 +1,43 @@
+import numpy as np
+
+
+class WriteBuffer:
+    """Gathers small blocks of audio into larger writes.
+
+    Blocks are copied in, so the caller may reuse them at once.  Each array
+    that comes out is new, so it can wait in a DiskWriter queue.
+    """
+
+    _array: np.ndarray | None = None
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._frames = 0
+
+    def __len__(self) -> int:
+        return self._frames
+
+    def append(self, block: np.ndarray) -> list[np.ndarray]:
+        """Add a block, and return any arrays which are ready to write"""
+        ready: list[np.ndarray] = []
+        if self._frames + len(block) > self.capacity:
+            ready.extend(self.take())
+        if len(block) >= self.capacity:
+            ready.append(block.copy())
+            return ready
+
+        if self._array is None:
+            self._array = np.empty((self.capacity, *block.shape[1:]), block.dtype)
+        self._array[self._frames : self._frames + len(block)] = block
+        self._frames += len(block)
+        if self._frames == self.capacity:
+            ready.extend(self.take())
+        return ready
+
+    def take(self) -> list[np.ndarray]:
+        """Return everything gathered so far"""
+        if not self._frames or self._array is None:
+            return []
+        array, self._array = self._array[: self._frames], None
+        self._frames = 0
+        return [array]
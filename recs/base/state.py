@@ -1,6 +1,9 @@
 import time
+from collections.abc import Iterator, Mapping, Sequence
 
+import numpy as np
 from pydantic import BaseModel, Field
+from typing_extensions import Self
 
 from recs.cfg.time_settings import amplitude_to_db
 
@@ -71,3 +74,116 @@ class ChannelState(BaseModel):
         x = self.model_copy()
         x -= m
         return x
+
+
+# The columns of ChannelStates.table
+COLUMNS = (
+    'file_count',
+    'file_size',
+    'recorded_time',
+    'is_active',
+    'timestamp',
+    'max_write_seconds',
+    'max_amp',
+    'min_amp',
+)
+SUMMED = slice(0, 3)
+COPIED = slice(3, 5)
+MAXED = slice(5, 7)
+MAX_AMP = 6
+MIN_AMP = 7
+
+
+class ChannelStates(Mapping[str, ChannelState]):
+    """The states of all the tracks of one source, one row per track.
+
+    Adding two tables combines whole columns at once, with the same rules as
+    `ChannelState.__iadd__`.  Looking up a track by name makes a ChannelState.
+    """
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        table: np.ndarray | None = None,
+        volumes: list[list[float]] | None = None,
+        condition: str = 'running',
+    ) -> None:
+        self.names = tuple(names)
+        if table is None:
+            table = np.zeros((len(self.names), len(COLUMNS)))
+            table[:, COLUMNS.index('timestamp')] = time.time()
+            table[:, MAX_AMP] = -INF
+            table[:, MIN_AMP] = INF
+        self.table = table
+        self.volumes = volumes if volumes is not None else [[] for _ in self.names]
+        self.condition = condition
+        self._index = {name: i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def from_states(cls, states: Mapping[str, ChannelState]) -> 'ChannelStates':
+        if isinstance(states, ChannelStates):
+            return states
+        rows = [[getattr(s, c) for c in COLUMNS] for s in states.values()]
+        values = np.array(rows, dtype=float).reshape(len(rows), len(COLUMNS))
+        volumes = [list(s.volume) for s in states.values()]
+        condition = next((s.condition for s in states.values()), 'running')
+        return cls(list(states), values, volumes, condition)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.table[:, COLUMNS.index(name)]
+
+    def active(self) -> dict[str, bool]:
+        return dict(zip(self.names, self.column('is_active').astype(bool).tolist()))
+
+    def deactivate(self) -> None:
+        self.column('is_active')[:] = 0
+        self.volumes = [[] for _ in self.names]
+
+    def __getitem__(self, name: str) -> ChannelState:
+        i = self._index[name]
+        row = dict(zip(COLUMNS, self.table[i].tolist()))
+        return ChannelState(
+            condition=self.condition,
+            file_count=int(row.pop('file_count')),
+            file_size=int(row.pop('file_size')),
+            is_active=bool(row.pop('is_active')),
+            volume=list(self.volumes[i]),
+            **row,
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iadd__(self, m: 'ChannelStates') -> Self:
+        if m.names == self.names:
+            rows: slice | list[int] = slice(None)
+        else:
+            rows = [self._index[name] for name in m.names]
+
+        values = self.table[rows]
+        values[:, SUMMED] += m.table[:, SUMMED]
+        values[:, COPIED] = m.table[:, COPIED]
+        values[:, MAXED] = np.maximum(values[:, MAXED], m.table[:, MAXED])
+        values[:, MIN_AMP] = np.minimum(values[:, MIN_AMP], m.table[:, MIN_AMP])
+        self.table[rows] = values
+
+        for name, volume in zip(m.names, m.volumes):
+            self.volumes[self._index[name]] = volume
+        self.condition = m.condition
+        return self
+
+    def __add__(self, m: 'ChannelStates') -> 'ChannelStates':
+        x = ChannelStates(
+            self.names, self.table.copy(), list(self.volumes), self.condition
+        )
+        x += m
+        return x
+
+    def __sub__(self, m: 'ChannelStates') -> 'ChannelStates':
+        """Subtract the counters of an earlier table with the same tracks"""
+        values = self.table.copy()
+        values[:, SUMMED] -= m.table[:, SUMMED]
+        return ChannelStates(self.names, values, list(self.volumes), self.condition)
@@ -27,6 +27,11 @@ class MidiTiming(StrEnum):
     system = auto()
 
 
+class PageCache(StrEnum):
+    keep = auto()
+    drop = auto()
+
+
 class SdType(StrEnum):
     float32 = auto()
     int16 = auto()
@@ -20,6 +20,7 @@ from recs.base.types import (
     Format,
     MidiTiming,
     Mutable,
+    PageCache,
     RecordKeys,
     SdType,
     Subtype,
@@ -129,6 +130,35 @@ class Device(BaseModel):
         tyro.conf.arg(help='A JSON file with per-device default profiles'),
     ] = Path()
 
+    #
+    # The input stream for each device
+    #
+    blocksize: Annotated[
+        int,
+        tyro.conf.arg(help='Frames in each audio callback: 0 lets the host API choose'),
+    ] = 0
+
+    latency: Annotated[
+        float,
+        cli_metadata.TIME_SPEC,
+        tyro.conf.arg(help='Input latency to ask for: 0 uses the host API default'),
+    ] = 0.0
+
+    tune_stream: Annotated[
+        bool,
+        tyro.conf.arg(
+            help='Raise --blocksize and --latency for a device after input '
+            'overflows or buffer pressure, and save them for later runs'
+        ),
+    ] = False
+
+    @field_validator('blocksize', 'latency')
+    @classmethod
+    def validate_stream(cls, value: float) -> float:
+        if value < 0:
+            raise ValueError('must be non-negative')
+        return value
+
     @field_validator('devices')
     @classmethod
     def validate_devices_file(cls, devices: Path) -> Path:
@@ -188,6 +218,42 @@ class Audio(BaseModel):
         tyro.conf.arg(aliases=('-u',), help='Audio file subtype'),
     ] = None
 
+    defer_transcoding: Annotated[
+        bool,
+        tyro.conf.arg(
+            help='Record only wav or rf64, and make the other formats after '
+            'each file closes'
+        ),
+    ] = False
+
+    transcode_workers: Annotated[
+        int,
+        tyro.conf.arg(help='How many files to transcode at once'),
+    ] = 1
+
+    transcode_timeout: Annotated[
+        float,
+        cli_metadata.TIME_SPEC,
+        tyro.conf.arg(
+            help='How long to wait for transcoding once recording stops: '
+            'files not done by then are listed in the manifest, to transcode later'
+        ),
+    ] = 60.0
+
+    @field_validator('transcode_workers')
+    @classmethod
+    def validate_transcode_workers(cls, value: int) -> int:
+        if value <= 0:
+            raise ValueError('must be positive')
+        return value
+
+    @field_validator('transcode_timeout')
+    @classmethod
+    def validate_transcode_timeout(cls, value: float) -> float:
+        if value < 0:
+            raise ValueError('must be non-negative')
+        return value
+
     @model_validator(mode='after')
     def configure_audio_types(self) -> Self:
         fields_set = set(self.model_fields_set)
@@ -335,6 +401,13 @@ class Key(BaseModel):
         tyro.conf.arg(help='Record key events from all applications when supported'),
     ] = None
 
+    capture_key: Annotated[
+        str,
+        tyro.conf.arg(
+            help='Save the audio kept by --retro-seconds when this key is pressed'
+        ),
+    ] = ''
+
     @field_validator('key_label')
     @classmethod
     def validate_key_label(cls, key_label: list[str]) -> list[str]:
@@ -365,17 +438,70 @@ class Recording(BaseModel):
         ),
     ] = 10.0
 
+    write_queue_seconds: Annotated[
+        float,
+        cli_metadata.TIME_SPEC,
+        tyro.conf.arg(help='Seconds of audio to queue for the disk before waiting'),
+    ] = 5.0
+
+    write_buffer_seconds: Annotated[
+        float,
+        cli_metadata.TIME_SPEC,
+        tyro.conf.arg(
+            help='Gather up to this much audio for each track before writing it: '
+            '0 writes every block'
+        ),
+    ] = 0.25
+
+    write_buffer_bytes: Annotated[
+        int,
+        tyro.conf.arg(
+            help='Gather up to this many bytes for each track before writing'
+        ),
+    ] = 0x10_0000
+
+    defer_open_bytes: Annotated[
+        int,
+        tyro.conf.arg(
+            help='Hold up to this many bytes of each take in memory until it is '
+            'longer than --shortest-file-time, so short takes never touch the '
+            'disk: 0 opens a file at once'
+        ),
+    ] = 0x100_0000
+
     memory_reserve_megabytes: Annotated[
         int,
         tyro.conf.arg(help='Free system memory to reserve while buffering audio'),
     ] = 200
 
+    spill_directory: Annotated[
+        Path,
+        tyro.conf.arg(
+            help='When processing falls behind, spill input to a scratch file '
+            'in this directory instead of dropping it'
+        ),
+    ] = Path()
+
+    spill_megabytes: Annotated[
+        int,
+        tyro.conf.arg(help='The size of each scratch file in --spill-directory'),
+    ] = 1024
+
     memory_check_period: Annotated[
         float,
         cli_metadata.TIME_SPEC,
         tyro.conf.arg(help='How often to check available system memory'),
     ] = 2.0
 
+    retro_seconds: Annotated[
+        float,
+        cli_metadata.TIME_SPEC,
+        tyro.conf.arg(
+            help='Keep this much of each input in memory as 16-bit audio, '
+            'to save after the fact with a capture command: 0 means none'
+        ),
+    ] = 0.0
+
     band_mode: Annotated[
         bool,
         Mutable,
@@ -384,6 +510,14 @@ class Recording(BaseModel):
         ),
     ] = False
 
+    poly_file: Annotated[
+        bool,
+        tyro.conf.arg(
+            help='Write all the tracks of a source to one multichannel file '
+            'per take, instead of one file per track'
+        ),
+    ] = False
+
     channel_noise_floors: Annotated[
         dict[str, dict[str, float | None]],
         Mutable,
@@ -394,6 +528,38 @@ class Recording(BaseModel):
         bool, tyro.conf.arg(help='Ignore file size limit: 4G on .wav')
     ] = False
 
+    rf64_continuation: Annotated[
+        bool,
+        tyro.conf.arg(
+            help='Let .wav files grow past 4G by turning into RF64, '
+            'instead of splitting them'
+        ),
+    ] = False
+
+    header_checkpoint_seconds: Annotated[
+        float,
+        cli_metadata.TIME_SPEC,
+        tyro.conf.arg(
+            help='Update the sizes in the header of a .wav file this often, '
+            'so it survives a crash: 0 means only on close'
+        ),
+    ] = 10.0
+
+    preallocate: Annotated[
+        bool,
+        tyro.conf.arg(
+            help='Reserve disk space for each new .wav, .rf64 or .raw file, '
+            'up to --longest-file-time'
+        ),
+    ] = False
+
+    page_cache: Annotated[
+        PageCache,
+        tyro.conf.arg(
+            help='drop: ask the system not to keep recorded audio in its page cache'
+        ),
+    ] = PageCache.keep
+
     longest_file_time: Annotated[
         float,
         Mutable,
@@ -482,6 +648,15 @@ class Recording(BaseModel):
         ),
     ] = False
 
+    sample_accurate_gate: Annotated[
+        bool,
+        Mutable,
+        tyro.conf.arg(
+            help='Measure quiet before and after a recording from the exact '
+            'sample that crosses the noise floor'
+        ),
+    ] = False
+
     shortest_file_time: Annotated[
         float,
         Mutable,
@@ -519,20 +694,40 @@ class Recording(BaseModel):
         ),
     ] = 0.0
 
-    @field_validator('audio_buffer_seconds', 'disk_poll_seconds', 'memory_check_period')
+    @field_validator(
+        'audio_buffer_seconds',
+        'disk_poll_seconds',
+        'memory_check_period',
+        'write_queue_seconds',
+    )
     @classmethod
     def validate_positive(cls, value: float) -> float:
         if value <= 0:
             raise ValueError('must be positive')
         return value
 
-    @field_validator('memory_reserve_megabytes', 'minimum_free_space')
+    @field_validator(
+        'memory_reserve_megabytes', 'minimum_free_space', 'spill_megabytes'
+    )
     @classmethod
     def validate_minimum_free_space(cls, value: int) -> int:
         if value < 0:
             raise ValueError('must be non-negative')
         return value
 
+    @field_validator(
+        'defer_open_bytes',
+        'header_checkpoint_seconds',
+        'retro_seconds',
+        'write_buffer_bytes',
+        'write_buffer_seconds',
+    )
+    @classmethod
+    def validate_write_buffer(cls, value: float) -> float:
+        if value < 0:
+            raise ValueError('must be non-negative')
+        return value
+
     @field_validator(
         'disk_alert_thresholds',
         'disk_removable_emergency',
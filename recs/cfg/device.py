@@ -5,6 +5,7 @@ from typing import Any, cast
 
 import numpy as np
 from overrides import override
+from pydantic import BaseModel, ConfigDict
 from threa import Runnable, Wrapper
 
 from recs.base import app_command, times
@@ -18,6 +19,15 @@ DEVICE_QUERY_TIMEOUT = 5.0
 STABLE_DEVICE_ID_FIELDS = ('uid', 'unique_id', 'persistent_id', 'guid', 'identifier')
 
 
+class StreamSettings(BaseModel):
+    """The block size and latency to open a device's input stream with"""
+
+    blocksize: int
+    latency: float
+
+    model_config = ConfigDict(frozen=True)
+
+
 class InputDevice(Source):
     def __init__(self, info: DeviceDict) -> None:
         self.info = info
@@ -30,7 +40,11 @@ class InputDevice(Source):
 
     @override
     def input_stream(
-        self, sdtype: SdType, update_callback: Callable[[Update], None]
+        self,
+        sdtype: SdType,
+        update_callback: Callable[[Update], None],
+        blocksize: int = 0,
+        latency: float = 0.0,
     ) -> Runnable:
         import sounddevice
 
@@ -43,9 +57,13 @@ class InputDevice(Source):
             status: int,
         ) -> None:
             timestamp = times.timestamp() - (time.currentTime - time.inputBufferAdcTime)
-            update_callback(
-                Update(indata.copy(), timestamp, str(status) if status else '')
-            )
+            # indata is reused by PortAudio: the callback copies what it keeps
+            update_callback(Update(indata, timestamp, str(status) if status else ''))
+
+        # Zero leaves the choice to PortAudio and the host API
+        tuning: dict[str, Any] = {'blocksize': blocksize} if blocksize else {}
+        if latency:
+            tuning['latency'] = latency
 
         stream = sounddevice.InputStream(
             callback=callback,
@@ -53,6 +71,7 @@ class InputDevice(Source):
             device=self.name,
             dtype=sdtype,
             samplerate=self.samplerate,
+            **tuning,
         )
         return Wrapper(stream)
 
@@ -34,8 +34,13 @@ class FileSource(Source):
 
     @override
     def input_stream(
-        self, sdtype: SdType, update_callback: Callable[[Update], None]
+        self,
+        sdtype: SdType,
+        update_callback: Callable[[Update], None],
+        blocksize: int = 0,
+        latency: float = 0.0,
     ) -> Runnable:
+        # Files are read in fixed blocks, with no deadline to meet
         result: Runnable
 
         def input_stream() -> None:
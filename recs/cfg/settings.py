@@ -9,6 +9,7 @@ from reccy import settings
 from recs.base.errors import RecsError
 
 from .cfg import Cfg
+from .device import StreamSettings
 from .track_names import SourceTrackNames, validate_track_names
 
 
@@ -20,6 +21,7 @@ class TrackSettings(BaseModel):
 
 class Settings(BaseModel):
     attributes: dict[str, object] = Field(default_factory=dict)
+    streams: dict[str, StreamSettings] = Field(default_factory=dict)
     track_names: SourceTrackNames = Field(default_factory=dict)
     tracks: dict[str, list[TrackSettings]] = Field(default_factory=dict)
 
@@ -28,6 +30,7 @@ class Settings(BaseModel):
 
 class LoadedSettings(BaseModel):
     cfg: Cfg
+    streams: dict[str, StreamSettings] = Field(default_factory=dict)
     track_names: SourceTrackNames = Field(default_factory=dict)
     tracks: dict[str, list[TrackSettings]] = Field(default_factory=dict)
 
@@ -55,6 +58,7 @@ def load(cfg: Cfg, overrides: set[str] | None = None) -> LoadedSettings:
         raise RecsError(f'Invalid settings in {path}: {e}') from None
     return LoadedSettings(
         cfg=cfg,
+        streams=settings.streams,
         track_names={source: dict(names) for source, names in track_names.items()},
         tracks=settings.tracks,
     )
@@ -64,10 +68,12 @@ def save(
     cfg: Cfg,
     track_names: SourceTrackNames,
     tracks: dict[str, list[TrackSettings]],
+    streams: dict[str, StreamSettings] | None = None,
 ) -> None:
     attributes = {address: cfg.get_attr(address) for address in cfg.mutable_attributes}
     saved_settings = Settings(
         attributes=attributes,
+        streams=streams or {},
         track_names=track_names,
         tracks=tracks,
     )
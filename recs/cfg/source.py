@@ -41,6 +41,10 @@ class Source(hash_cmp.HashCmp, abc.ABC):
 
     @abc.abstractmethod
     def input_stream(
-        self, sdtype: SdType, update_callback: Callable[[Update], None]
+        self,
+        sdtype: SdType,
+        update_callback: Callable[[Update], None],
+        blocksize: int = 0,
+        latency: float = 0.0,
     ) -> Runnable:
         pass
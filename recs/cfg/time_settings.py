@@ -6,7 +6,7 @@ from pydantic import BaseModel, ConfigDict, model_validator
 from typing_extensions import Self
 
 T = TypeVar('T', float, int)
-NO_SCALE = ('noise_floor', 'record_everything')
+NO_SCALE = ('noise_floor', 'record_everything', 'sample_accurate_gate')
 
 
 def db_to_amplitude(db: float) -> float:
@@ -50,6 +50,9 @@ class TimeSettings(BaseModel, Generic[T]):
     #: Ignore noise_floor, record everything immediately until the end
     record_everything: bool = False
 
+    #: Trim quiet before and after a recording to the exact sample
+    sample_accurate_gate: bool = False
+
     #: Amount of total time to run.  0 or less means "run forever"
     total_run_time: T = cast(T, 0)
 
@@ -40,6 +40,11 @@ class Capabilities(BaseModel):
     type: Literal['capabilities']
 
 
+class Capture(BaseModel):
+    type: Literal['capture']
+    label: str = ''
+
+
 class DiskStatusRequest(BaseModel):
     type: Literal['disk_status']
 
@@ -129,6 +134,12 @@ class CapabilitiesResult(BaseModel):
     version: int
 
 
+class Captured(BaseModel):
+    type: Literal['captured']
+    label: str
+    seconds: float
+
+
 class CfgSet(BaseModel):
     type: Literal['cfg_set']
     address: str
@@ -229,6 +240,7 @@ class Error(ipc.Error):
 Request = (
     Calibrate
     | Capabilities
+    | Capture
     | DiskStatusRequest
     | GetCfg
     | GetTrackNames
@@ -249,6 +261,7 @@ Request = (
 Response = (
     Calibrated
     | CapabilitiesResult
+    | Captured
     | CfgSet
     | CfgValue
     | DiskStatus
@@ -1,26 +1,164 @@
+import itertools
 from collections import deque
 
 import numpy as np
 
 from recs.audio.block import Block
 
+# Recompute running sums from scratch after this many windows, so that
+# rounding errors from subtracting old entries can't build up
+REFRESH_WINDOWS = 64
+
+
+class RunningSum:
+    """The weighted mean of the latest arrays, updated as arrays arrive and leave.
+
+    Each array comes with a weight, and old arrays leave while the arrays
+    weigh more than `window` in all, so with weights of one, the last
+    `window` arrays are kept.  The newest array always stays.
+    """
+
+    def __init__(self, window: float) -> None:
+        self.window = window
+        self.arrays: deque[tuple[np.ndarray, float]] = deque()
+        self.sum: np.ndarray | None = None
+        self.weight = 0.0
+        self._updates = 0
+
+    def __len__(self) -> int:
+        return len(self.arrays)
+
+    def append(self, array: np.ndarray, weight: float = 1) -> None:
+        if not self.window:
+            return
+        weighted = array if weight == 1 else array * weight
+        if self.sum is None:
+            self.sum = weighted.astype(float)
+        else:
+            self.sum += weighted
+        arrays = self.arrays
+        arrays.append((weighted, weight))
+        self.weight += weight
+        while len(arrays) > 1 and self.weight > self.window:
+            old, old_weight = arrays.popleft()
+            self.sum -= old
+            self.weight -= old_weight
+
+        self._updates += 1
+        if self._updates >= REFRESH_WINDOWS * len(self.arrays):
+            self._updates = 0
+            self.sum = np.sum([a for a, _ in self.arrays], axis=0, dtype=float)
+            self.weight = sum(w for _, w in self.arrays)
+
+    def mean(self) -> np.ndarray:
+        if self.sum is None:
+            return np.array([0])
+        return self.sum / self.weight
+
+
+class RunningMax:
+    """The elementwise maximum of the latest arrays, in a window like RunningSum's.
+
+    The window is a queue made of two stacks.  New arrays go on one, which
+    keeps the maximum of everything on it.  Old arrays leave from the other,
+    each entry holding the maximum of itself and every newer entry below it;
+    when it runs out, the first stack is moved over in one pass.  Each array
+    is moved once, so an append costs O(channels) amortized.
+    """
+
+    def __init__(self, window: float) -> None:
+        self.window = window
+        self.weight = 0.0
+        self._newer: list[tuple[np.ndarray, float]] = []
+        self._newer_max: np.ndarray | None = None
+        self._older: list[tuple[np.ndarray, float]] = []
+
+    def __len__(self) -> int:
+        return len(self._newer) + len(self._older)
+
+    @property
+    def max(self) -> np.ndarray | None:
+        if not self._older:
+            return self._newer_max
+        if self._newer_max is None:
+            return self._older[-1][0]
+        return np.maximum(self._older[-1][0], self._newer_max)
+
+    def append(self, array: np.ndarray, weight: float = 1) -> None:
+        if not self.window:
+            return
+        self._newer.append((array, weight))
+        self.weight += weight
+        if self._newer_max is None:
+            self._newer_max = array
+        else:
+            self._newer_max = np.maximum(self._newer_max, array)
+        while len(self) > 1 and self.weight > self.window:
+            self._evict()
+
+    def _evict(self) -> None:
+        if not self._older:
+            arrays = [a for a, _ in reversed(self._newer)]
+            weights = [w for _, w in reversed(self._newer)]
+            self._older = list(zip(itertools.accumulate(arrays, np.maximum), weights))
+            self._newer = []
+            self._newer_max = None
+        _, weight = self._older.pop()
+        self.weight -= weight
+
 
 class MovingBlock:
-    _dq: deque[np.ndarray] | None = None
+    """Moving averages of amplitude and RMS, and a peak hold, for a track.
 
-    def __init__(self, moving_average_time: int):
+    Each costs O(channels) per block, however long the window.  Only the
+    amplitude is kept unless RMS or the peak are asked for, since each adds
+    work to every block.
+
+    Blocks are weighted by their length, in units of the first block, so a
+    batch of blocks joined while catching up fills as much of the window as
+    the blocks would have.
+    """
+
+    _amplitude: RunningSum | None = None
+    _peak: RunningMax | None = None
+    _squares: RunningSum | None = None
+
+    def __init__(
+        self, moving_average_time: int, rms: bool = False, peak: bool = False
+    ) -> None:
         self.moving_average_time = moving_average_time
+        self.rms_enabled = rms
+        self.peak_enabled = peak
 
     def accumulate(self, b: Block) -> None:
-        if self._dq is None:
-            maxlen = int(0.5 + self.moving_average_time / len(b))
-            self._dq = deque((), maxlen)
+        if self._amplitude is None:
+            self.block_frames = len(b)
+            window = int(0.5 + self.moving_average_time / self.block_frames)
+            self._amplitude = RunningSum(window)
+            if self.peak_enabled:
+                self._peak = RunningMax(window)
+            if self.rms_enabled:
+                self._squares = RunningSum(window)
 
-        self._dq.append(b.amplitude)
+        weight = len(b) / self.block_frames
+        self._amplitude.append(b.amplitude, weight)
+        if self._peak is not None:
+            peak = np.maximum(b.max.astype(float), -b.min.astype(float)) / b.scale
+            self._peak.append(peak, weight)
+        if self._squares is not None:
+            self._squares.append(b.rms * b.rms, weight)
 
     def mean(self) -> np.ndarray:
-        if not self._dq:
+        if not self._amplitude:
             return np.array([0])
+        return self._amplitude.mean()
 
-        it = (d for i, d in enumerate(self._dq) if i)
-        return sum(it, start=self._dq[0]) / len(self._dq)
+    def peak(self) -> np.ndarray:
+        if self._peak is None or self._peak.max is None:
+            return np.array([0])
+        return self._peak.max
+
+    def rms(self) -> np.ndarray:
+        if not self._squares:
+            return np.array([0])
+        return np.sqrt(self._squares.mean())
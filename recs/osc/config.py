@@ -60,6 +60,7 @@ class Node(BaseModel):
     commands: list[Command] = Field(default_factory=list)
     polls: list[Poll] = Field(default_factory=list)
     subscriptions: list[Subscription] = Field(default_factory=list)
+    capture_path: str | None = None  # An inbound message which saves retro audio
 
     model_config = ConfigDict(frozen=True)
 
@@ -70,6 +71,13 @@ class Node(BaseModel):
             raise ValueError('must be a non-empty filename')
         return value
 
+    @field_validator('capture_path')
+    @classmethod
+    def validate_capture_path(cls, value: str | None) -> str | None:
+        if value is not None and not value.startswith('/'):
+            raise ValueError('must start with /')
+        return value
+
     @field_validator('port', 'bind_port')
     @classmethod
     def validate_port(cls, value: int | None) -> int | None:
@@ -29,11 +29,13 @@ class OscRecorder(Runnable):
         session_directory: Path,
         warning: Callable[[str], None],
         write_record: Callable[[ManifestRecord], None],
+        capture: Callable[[], None] | None = None,
     ) -> None:
         self.cfg = cfg
         self.session_directory = session_directory
         self.warning = warning
         self.write_record = write_record
+        self.capture = capture
         self.nodes: dict[str, OscNodeRecorder] = {}
         super().__init__()
 
@@ -53,6 +55,7 @@ class OscRecorder(Runnable):
                 self.session_directory,
                 self.warning,
                 self.write_record,
+                self.capture,
             )
             self.nodes[node.name] = recorder
             recorder.start()
@@ -87,11 +90,13 @@ class OscNodeRecorder:
         session_directory: Path,
         warning: Callable[[str], None],
         write_record: Callable[[ManifestRecord], None],
+        capture: Callable[[], None] | None = None,
     ) -> None:
         self.node = node
         self.directory = session_directory / 'osc'
         self.warning = warning
         self.write_record = write_record
+        self.capture = capture
         self.socket: socket.socket | None = None
         self.output: BinaryIO | None = None
         self.path: Path | None = None
@@ -170,6 +175,9 @@ class OscNodeRecorder:
                     'source': [source[0], source[1]],
                 }
             )
+            path = self.node.capture_path
+            if path and self.capture and any(m.get('path') == path for m in decoded):
+                self.capture()
 
     def status(self) -> dict[str, object]:
         return {
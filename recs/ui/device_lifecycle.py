@@ -1,14 +1,18 @@
 from collections.abc import Callable, Mapping, Sequence
 from multiprocessing import connection
 from pathlib import Path
-from typing import cast
 
 from recs.base import times
 from recs.base.errors import RecsError
 from recs.cfg import settings
 from recs.cfg.aliases import Aliases
 from recs.cfg.cfg import Cfg
-from recs.cfg.device import DeviceDict, InputDevice, get_input_devices
+from recs.cfg.device import (
+    DeviceDict,
+    InputDevice,
+    StreamSettings,
+    get_input_devices,
+)
 from recs.cfg.file_source import FileSource
 from recs.cfg.source import Source
 from recs.cfg.track import Track
@@ -17,8 +21,9 @@ from recs.cfg.track_names import SourceTrackNames
 from .device_poller import DevicePoller
 from .full_state import FullState
 from .source_process import SourceProcess
-from .source_recorder import BufferStats, SourceFailure, SourceUpdate
 from .source_tracks import input_device_tracks, source_tracks
+from .source_update import BufferStats, SourceFailure, SourceUpdate
+from .source_wire import decode
 
 FRAME_CLOCK_GRACE = 5.0
 MIN_FRAME_CLOCK_RATIO = 0.5
@@ -41,6 +46,7 @@ class DeviceLifecycle:
         state: FullState,
         session_directory: Path,
         saved_tracks: dict[str, list[settings.TrackSettings]],
+        saved_streams: dict[str, StreamSettings],
         track_names: SourceTrackNames,
         initial_tracks: list[tuple[Source, Sequence[Track]]],
         warning: Callable[[str], None],
@@ -48,6 +54,7 @@ class DeviceLifecycle:
         file_update: Callable[[SourceUpdate, SourceProcess], None],
         calibration_update: Callable[[str, dict[str, float]], None],
         buffer_update: Callable[[str, BufferStats], None],
+        stream_update: Callable[[str, StreamSettings], None],
         source_process: Callable[..., SourceProcess],
         device_poller: Callable[[float], DevicePoller],
     ) -> None:
@@ -55,12 +62,14 @@ class DeviceLifecycle:
         self.state = state
         self.session_directory = session_directory
         self.saved_tracks = saved_tracks
+        self.saved_streams = saved_streams
         self.track_names = track_names
         self.warning = warning
         self.event = event
         self.file_update = file_update
         self.calibration_update = calibration_update
         self.buffer_update = buffer_update
+        self.stream_update = stream_update
         self.source_process = source_process
         self.device_poller = device_poller
         self.source_processes = {
@@ -69,6 +78,8 @@ class DeviceLifecycle:
             )
             for source, tracks in initial_tracks
         }
+        for name, process in self.source_processes.items():
+            process.stream = saved_streams.get(name)
         self.hardware_sources = {
             name: source
             for name, source in self.source_processes.items()
@@ -83,6 +94,7 @@ class DeviceLifecycle:
         self.buffer_stats: dict[str, BufferStats] = {}
         self.buffer_drops_reported = dict.fromkeys(self.source_processes, 0)
         self.buffer_pressure_reported = dict.fromkeys(self.source_processes, 0.0)
+        self.write_pressure_reported = dict.fromkeys(self.source_processes, 0.0)
         self.source_frames_at_start = dict.fromkeys(self.source_processes, 0)
         self.source_start_times = dict.fromkeys(self.source_processes, state.start_time)
         self.source_last_updates = dict.fromkeys(
@@ -191,6 +203,7 @@ class DeviceLifecycle:
             source.join(timeout=0)
             for update in source.take_updates():
                 self.receive_message(update)
+            self._read_meters(name, source)
             if (
                 name in self.hardware_sources
                 and not expected
@@ -212,16 +225,21 @@ class DeviceLifecycle:
                 self.failed_sources.add(name)
 
     def receive_pending_updates(self) -> None:
-        for source in self.source_processes.values():
+        for name, source in self.source_processes.items():
             for update in source.take_updates():
                 self.receive_message(update)
+            self._read_meters(name, source)
+
+    def read_meters(self) -> None:
+        for name, source in self.source_processes.items():
+            self._read_meters(name, source)
 
     def receive_connection(self, conn: connection.Connection) -> bool:
         try:
-            message = conn.recv()
+            message = decode(conn.recv_bytes())
         except (EOFError, OSError):
             return False
-        self.receive_message(cast(SourceUpdate | SourceFailure, message))
+        self.receive_message(message)
         return True
 
     def receive_message(self, message: SourceUpdate | SourceFailure) -> None:
@@ -244,12 +262,7 @@ class DeviceLifecycle:
         self._record_buffer_status(update)
         source = self.source_processes[update.source_name]
         self.file_update(update, source)
-        previous = {
-            track_name: channel_state.is_active
-            for track_name, channel_state in self.state.state[
-                update.source_name
-            ].items()
-        }
+        previous = self.state.state[update.source_name].active()
         self.state.update({update.source_name: update.channels})
         self._record_track_activity(
             update.source_name,
@@ -262,6 +275,9 @@ class DeviceLifecycle:
         self.source_last_updates[update.source_name] = now
         if update.calibration is not None:
             self.calibration_update(update.source_name, update.calibration)
+        if update.stream is not None:
+            source.stream = self.saved_streams[update.source_name] = update.stream
+            self.stream_update(update.source_name, update.stream)
         for revision in update.config_revisions_applied or []:
             self.event('cfg_applied', source=update.source_name, value=revision)
         if source.running and not self._frame_clock_valid(source, now):
@@ -270,6 +286,21 @@ class DeviceLifecycle:
         elif source.running and self._source_time_expired(source):
             source.stop()
 
+    def _read_meters(self, name: str, source: SourceProcess) -> None:
+        if (reading := source.read_meters()) is None:
+            return
+        previous = self.state.state[name].active()
+        if not self.state.update_meters(name, reading):
+            return
+        self.buffer_stats[name] = reading.buffer_stats
+        self._record_track_activity(
+            name,
+            previous,
+            reading.channels,
+            reading.frame_count,
+            reading.timestamp,
+        )
+
     def _add_detected_hardware(self, snapshot: dict[str, DeviceDict]) -> None:
         if self.cfg.device.devices.name:
             return
@@ -290,11 +321,13 @@ class DeviceLifecycle:
             self.session_directory,
             track_names=self.track_names,
         )
+        process.stream = self.saved_streams.get(source.key)
         self.source_processes[source.key] = process
         self.hardware_sources[source.key] = process
         self.source_frames[source.key] = 0
         self.buffer_drops_reported[source.key] = 0
         self.buffer_pressure_reported[source.key] = 0.0
+        self.write_pressure_reported[source.key] = 0.0
         self.source_frames_at_start[source.key] = 0
         self.source_start_times[source.key] = self.state.start_time
         self.source_last_updates[source.key] = self.state.start_time
@@ -319,8 +352,8 @@ class DeviceLifecycle:
                 start_frame=self.source_frames_at_start[name],
             )
         for name in sorted(self.present_hardware - compatible):
-            for track_name, channel_state in self.state.state[name].items():
-                if channel_state.is_active:
+            for track_name, active in self.state.state[name].active().items():
+                if active:
                     self.event('track_stopped', source=name, track=track_name)
             self.event('source_offline', source=name)
 
@@ -330,9 +363,9 @@ class DeviceLifecycle:
             reported = self.buffer_drops_reported[update.source_name]
             if update.buffer_stats.dropped_frames > reported:
                 self.buffer_update(update.source_name, update.buffer_stats)
-                self.buffer_drops_reported[
-                    update.source_name
-                ] = update.buffer_stats.dropped_frames
+                self.buffer_drops_reported[update.source_name] = (
+                    update.buffer_stats.dropped_frames
+                )
             pressure = self.buffer_pressure_reported[update.source_name]
             threshold = self.cfg.recording.audio_buffer_seconds * 0.8
             if (
@@ -340,9 +373,19 @@ class DeviceLifecycle:
                 and update.buffer_stats.max_queued_seconds >= threshold
             ):
                 self.buffer_update(update.source_name, update.buffer_stats)
-                self.buffer_pressure_reported[
-                    update.source_name
-                ] = update.buffer_stats.max_queued_seconds
+                self.buffer_pressure_reported[update.source_name] = (
+                    update.buffer_stats.max_queued_seconds
+                )
+            pressure = self.write_pressure_reported[update.source_name]
+            threshold = self.cfg.recording.write_queue_seconds * 0.8
+            if (
+                update.buffer_stats.max_write_queue_seconds > pressure
+                and update.buffer_stats.max_write_queue_seconds >= threshold
+            ):
+                self.buffer_update(update.source_name, update.buffer_stats)
+                self.write_pressure_reported[update.source_name] = (
+                    update.buffer_stats.max_write_queue_seconds
+                )
         for warning in update.buffer_warnings or []:
             self.warning(warning)
 
@@ -379,8 +422,9 @@ class DeviceLifecycle:
         frame_count: int | None,
         timestamp: float | None,
     ) -> None:
+        current = self.state.state[source].active()
         for track_name in updates:
-            active = self.state.state[source][track_name].is_active
+            active = current[track_name]
             if active != previous[track_name]:
                 self.event(
                     'track_started' if active else 'track_stopped',
@@ -1,12 +1,16 @@
 from collections.abc import Iterable, Iterator, Mapping, Sequence
 from typing import Any
 
+import numpy as np
+
 from recs.base import state, times
 from recs.base.types import Active
 from recs.cfg.aliases import Aliases
 from recs.cfg.source import Source
 from recs.cfg.track import Track
 
+from .meter_board import MeterReading
+
 
 class FullState:
     def __init__(
@@ -14,10 +18,11 @@ class FullState:
         tracks: Sequence[tuple[Source, Sequence[Track]]],
         aliases: Aliases | None = None,
     ) -> None:
-        self.state: dict[str, dict[str, state.ChannelState]] = {}
+        self.state: dict[str, state.ChannelStates] = {}
         self.source_names: dict[str, str] = {}
         self.track_names: dict[tuple[str, str], str] = {}
         self.online: set[str] = set()
+        self.meter_readings: dict[str, MeterReading] = {}
         self.total = state.ChannelState()
         self.start_time = times.timestamp()
         for source, source_tracks in tracks:
@@ -29,10 +34,7 @@ class FullState:
         tracks: Sequence[Track],
         aliases: Aliases | None = None,
     ) -> None:
-        def track_state(tr: Sequence[Track]) -> dict[str, state.ChannelState]:
-            return {i.name: state.ChannelState() for i in tr}
-
-        self.state[source.key] = track_state(tracks)
+        self.state[source.key] = state.ChannelStates([t.name for t in tracks])
         self.source_names[source.key] = (
             aliases.display_name(source) if aliases else source.name
         )
@@ -56,6 +58,7 @@ class FullState:
             for key, value in self.track_names.items()
             if key[0] != source.key
         }
+        self.meter_readings.pop(source.key, None)
         self.add_source(source, tracks, aliases)
 
     def set_track_names(self, names: dict[str, dict[str, int]]) -> None:
@@ -70,21 +73,45 @@ class FullState:
     def elapsed_time(self) -> float:
         return times.timestamp() - self.start_time
 
-    def update(self, state: Mapping[str, Mapping[str, state.ChannelState]]) -> None:
-        for source_key, source_state in state.items():
-            for channel_name, channel_state in source_state.items():
-                self.state[source_key][channel_name] += channel_state
-                self.total += channel_state
-                if '-' in channel_name:
-                    # This is a stereo channel, so count it again
-                    self.total.recorded_time += channel_state.recorded_time
+    def update(self, states: Mapping[str, Mapping[str, state.ChannelState]]) -> None:
+        for source_key, source_state in states.items():
+            table = state.ChannelStates.from_states(source_state)
+            self.state[source_key] += table
+            self._add_total(table)
+
+    def update_meters(self, source_key: str, reading: MeterReading) -> bool:
+        """Add whatever has changed since the last reading of a meter board"""
+        last = self.meter_readings.pop(source_key, None)
+        if reading.channels.names != self.state[source_key].names:
+            return False  # This track layout hasn't reached us yet
+
+        channels = reading.since(last)
+        self.state[source_key] += channels
+        self._add_total(channels)
+        self.meter_readings[source_key] = reading
+        return True
+
+    def _add_total(self, table: state.ChannelStates) -> None:
+        if not table:
+            return
+        # Stereo channels are counted twice
+        stereo = np.array(['-' in name for name in table.names])
+        recorded_time = table.column('recorded_time')
+
+        total = self.total
+        total.file_count += int(table.column('file_count').sum())
+        total.file_size += int(table.column('file_size').sum())
+        total.recorded_time += float(recorded_time.sum() + recorded_time[stereo].sum())
+        total.max_write_seconds = max(
+            total.max_write_seconds, float(table.column('max_write_seconds').max())
+        )
+        total.max_amp = max(total.max_amp, float(table.column('max_amp').max()))
+        total.min_amp = min(total.min_amp, float(table.column('min_amp').min()))
 
     def set_online(self, source_keys: Iterable[str]) -> None:
         self.online = set(source_keys) & self.state.keys()
         for source_key in self.state.keys() - self.online:
-            for channel_state in self.state[source_key].values():
-                channel_state.is_active = False
-                channel_state.volume = []
+            self.state[source_key].deactivate()
 
     def rows(self) -> Iterator[dict[str, Any]]:
         yield {
@@ -98,14 +125,22 @@ class FullState:
             active = Active.active if source_key in self.online else Active.offline
             yield {'device': self.source_names[source_key], 'on': active}
 
-            for c, s in source_state.items():
-                volume = len(s.volume) and sum(s.volume) / len(s.volume)
+            columns = zip(
+                source_state.names,
+                source_state.column('is_active').tolist(),
+                source_state.column('recorded_time').tolist(),
+                source_state.column('file_size').tolist(),
+                source_state.column('file_count').tolist(),
+                source_state.volumes,
+            )
+            for c, is_active, recorded, file_size, file_count, v in columns:
+                volume = len(v) and sum(v) / len(v)
                 yield {
                     'channel': self.track_names[(source_key, c)],
-                    'on': Active.active if s.is_active else Active.inactive,
-                    'recorded': s.recorded_time,
-                    'file_size': s.file_size,
-                    'file_count': s.file_count,
+                    'on': Active.active if is_active else Active.inactive,
+                    'recorded': recorded,
+                    'file_size': int(file_size),
+                    'file_count': int(file_count),
                     'signal': volume,
                     'volume': volume,
                 }
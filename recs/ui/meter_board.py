@@ -0,0 +1,171 @@
+"""
+Live meters shared between a source process and the Recorder.
+
+Each SourceProcess owns a block of shared memory holding, for each track, the
+columns of ChannelStates totalled since the track layout last changed, the
+track's volumes, and the numeric BufferStats for the source.  The source
+process writes it every block and the Recorder reads it at UI refresh rate,
+so pipe messages are only needed for discrete events.
+
+There is no peak column: the displays only show volumes, and a track's
+MovingBlock only holds a peak when one is asked for.
+
+Writes are guarded by a seqlock: the writer makes the sequence number odd
+before it writes and even afterwards, and a reader retries until it sees the
+same even sequence number before and after its copy.
+"""
+
+import math
+from collections.abc import Iterable
+from multiprocessing import shared_memory
+from typing import NamedTuple
+
+import numpy as np
+
+from recs.base.state import COLUMNS, ChannelStates
+
+from . import source_wire
+from .source_update import BufferStats
+
+READ_TRIES = 8
+NAME_SIZE = 8  # Bytes in a track name, unless the board is made with more
+VOLUMES = 2  # Tracks are mono or stereo
+
+# The header is six uint64s and the timestamp of the last block
+SEQUENCE, GENERATION, CAPACITY, ROWS, FRAME_COUNT, NAME_BYTES = range(6)
+HEADER_COUNT = 6
+HEADER_SIZE = (HEADER_COUNT + 1) * 8
+
+
+class MeterReading(NamedTuple):
+    board: str
+    generation: int
+    channels: ChannelStates
+    buffer_stats: BufferStats
+    frame_count: int
+    timestamp: float
+
+    def since(self, last: 'MeterReading | None') -> ChannelStates:
+        """Return the change since an earlier reading with the same track layout"""
+        if last and (last.board, last.generation) == (self.board, self.generation):
+            return self.channels - last.channels
+        return self.channels
+
+
+class MeterBoard:
+    def __init__(
+        self, capacity: int = 0, name: str | None = None, name_size: int = NAME_SIZE
+    ) -> None:
+        """Create a board for `capacity` tracks with names of up to `name_size`
+        bytes, or attach to the board `name`"""
+        if name is None:
+            size = _size(capacity, name_size, len(source_wire.stats_fields()))
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+            header = np.ndarray(HEADER_COUNT, np.uint64, self.memory.buf)
+            header[CAPACITY], header[NAME_BYTES] = capacity, name_size
+        else:
+            self.memory = shared_memory.SharedMemory(name)
+
+        buf = self.memory.buf
+        self.header = np.ndarray(HEADER_COUNT, np.uint64, buf)
+        self.timestamp = np.ndarray(1, np.float64, buf, HEADER_COUNT * 8)
+        self.capacity = capacity = int(self.header[CAPACITY])
+        self.name_size = int(self.header[NAME_BYTES])
+
+        offset = HEADER_SIZE
+        self.names = np.ndarray(capacity, f'S{self.name_size}', buf, offset)
+        offset += self.names.nbytes
+        self.values = np.ndarray((capacity, len(COLUMNS)), np.float64, buf, offset)
+        offset += self.values.nbytes
+        self.volumes = np.ndarray((capacity, VOLUMES), np.float64, buf, offset)
+        offset += self.volumes.nbytes
+        stats = len(source_wire.stats_fields())
+        self.stats = np.ndarray(stats, np.float64, buf, offset)
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def write(
+        self,
+        channels: ChannelStates,
+        stats: BufferStats,
+        generation: int,
+        frame_count: int,
+        timestamp: float,
+    ) -> None:
+        rows = len(channels)
+        header = self.header
+        names = None
+        if header[GENERATION] != generation:
+            # numpy would silently cut a name which is too long
+            names = [n.encode() for n in channels.names]
+            if too_long := [n for n in names if len(n) > self.name_size]:
+                msg = f'Track names longer than {self.name_size} bytes: {too_long}'
+                raise ValueError(msg)
+
+        header[SEQUENCE] += 1
+        if names is not None:
+            header[GENERATION] = generation
+            self.names[:rows] = names
+        header[ROWS] = rows
+        header[FRAME_COUNT] = frame_count
+        self.timestamp[0] = timestamp
+        self.values[:rows] = channels.table
+        self.volumes[:rows] = np.nan
+        for row, volume in zip(self.volumes, channels.volumes):
+            row[: len(volume)] = volume
+        self.stats[:] = [getattr(stats, f) for f in source_wire.stats_fields()]
+        header[SEQUENCE] += 1
+
+    def read(self) -> MeterReading | None:
+        """Return a consistent copy of the board, or None if none is available"""
+        header = self.header
+        for _ in range(READ_TRIES):
+            sequence = int(header[SEQUENCE])
+            if sequence % 2:
+                continue
+            generation, rows = int(header[GENERATION]), int(header[ROWS])
+            if not generation:
+                return None  # Nothing written yet
+            frame_count, timestamp = int(header[FRAME_COUNT]), float(self.timestamp[0])
+            names = self.names[:rows].tolist()
+            values = self.values[:rows].copy()
+            volumes = self.volumes[:rows].tolist()
+            stats = self.stats.tolist()
+            if int(header[SEQUENCE]) == sequence:
+                channels = ChannelStates(
+                    [n.decode() for n in names],
+                    values,
+                    [[v for v in vol if not math.isnan(v)] for vol in volumes],
+                )
+                fields = source_wire.stats_fields()
+                buffer_stats = BufferStats.model_construct(
+                    **{f: t(v) for (f, t), v in zip(fields.items(), stats)}
+                )
+                return MeterReading(
+                    self.name,
+                    generation,
+                    channels,
+                    buffer_stats,
+                    frame_count,
+                    timestamp,
+                )
+        return None
+
+    def close(self, unlink: bool = False) -> None:
+        del self.header, self.timestamp, self.names, self.values, self.volumes
+        del self.stats
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+
+def name_size(names: Iterable[str]) -> int:
+    """The bytes needed to hold the longest of `names`"""
+    return max((len(n.encode()) for n in names), default=NAME_SIZE)
+
+
+def _size(capacity: int, name_size: int, stats: int) -> int:
+    row = name_size + 8 * (len(COLUMNS) + VOLUMES)
+    return HEADER_SIZE + capacity * row + 8 * stats
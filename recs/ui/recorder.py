@@ -15,10 +15,11 @@ from recs.base.errors import ErrorRecord
 from recs.base.signals import raise_keyboard_interrupt_on_signal
 from recs.cfg import settings
 from recs.cfg.cfg import Cfg
+from recs.cfg.device import StreamSettings
 from recs.cfg.file_source import FileSource
 from recs.cfg.source import Source
 from recs.cfg.track import Track
-from recs.daemon import external_ipc, gui_ipc
+from recs.daemon import external_ipc, gui_ipc, gui_protocol
 from recs.midi.recorder import MidiRecorder
 from recs.osc.recorder import OscRecorder
 
@@ -34,12 +35,14 @@ from . import (
     recording_paths,
     recording_session,
     session_manifest,
+    transcoder,
 )
 from .device_poller import DevicePoller
 from .full_state import FullState
 from .key_events import KeyEvent, make_key_recorder
 from .source_process import SourceProcess
-from .source_recorder import POLL_TIMEOUT, BufferStats, SourceFailure, SourceUpdate
+from .source_recorder import POLL_TIMEOUT
+from .source_update import BufferStats, SourceFailure, SourceUpdate
 
 LOGGER = logging.get_logger(__name__)
 SOURCE_STALL_TIMEOUT = device_lifecycle.SOURCE_STALL_TIMEOUT
@@ -59,6 +62,7 @@ class Recorder(Runnables):
         self.saved_tracks = {
             name: list(tracks) for name, tracks in saved_settings.tracks.items()
         }
+        self.saved_streams = dict(saved_settings.streams)
         all_tracks = device_lifecycle.DeviceLifecycle.initial_tracks(
             cfg, self.saved_tracks
         )
@@ -111,14 +115,21 @@ class Recorder(Runnables):
             self.session_directory,
             self._record_warning,
             lambda record: self._write_manifest_record(record),
+            lambda: self._capture('osc'),
         )
         self.key_recorder = make_key_recorder(cfg)
+        self._transcoder = (
+            transcoder.Transcoder(self.cfg)
+            if self.cfg.audio.defer_transcoding and not self.cfg.general.dry_run
+            else None
+        )
         self._disk_space_policy = disk_space_policy.DiskSpacePolicy(self.cfg)
         self._devices = device_lifecycle.DeviceLifecycle(
             self.cfg,
             self.state,
             self.session_directory,
             self.saved_tracks,
+            self.saved_streams,
             track_names,
             all_tracks,
             self._record_warning,
@@ -126,12 +137,14 @@ class Recorder(Runnables):
             self._record_device_file_update,
             self._record_calibration_result,
             self._record_device_buffer_update,
+            self._record_stream_update,
             SourceProcess,
             DevicePoller,
         )
         self._control = recording_control.RecordingControl(
             self.cfg,
             self.saved_tracks,
+            self.saved_streams,
             track_names,
             self.state,
             self.session,
@@ -209,6 +222,9 @@ class Recorder(Runnables):
                 if isinstance(source.source, FileSource)
                 else None,
             )
+        if self._transcoder is not None:
+            for path, formats in (update.files_closed or {}).items():
+                self._transcoder.submit(path, formats)
         if update.track_layout is not None:
             self.state.replace_source(source.source, source.tracks, self.cfg.aliases)
             self.state.set_track_names(self._control.track_names)
@@ -226,10 +242,19 @@ class Recorder(Runnables):
                 dropped_frames=stats.dropped_frames,
                 max_queued_seconds=stats.max_queued_seconds,
                 max_write_seconds=stats.max_write_seconds or None,
+                max_write_queue_seconds=stats.max_write_queue_seconds or None,
+                max_write_latency_seconds=stats.max_write_latency_seconds or None,
+                max_rollover_seconds=stats.max_rollover_seconds or None,
+                max_checkpoint_seconds=stats.max_checkpoint_seconds or None,
+                max_spilled_seconds=stats.max_spilled_seconds or None,
                 queued_seconds=stats.queued_seconds,
             )
         )
 
+    def _record_stream_update(self, source: str, stream: StreamSettings) -> None:
+        self._record_event('stream_tuned', source=source, value=stream.model_dump())
+        self._control.save_settings()
+
     def start(self) -> None:
         if self.external is not None:
             try:
@@ -291,6 +316,8 @@ class Recorder(Runnables):
                 if self.external is not None:
                     self.external.close()
                 self._receive_pending_updates()
+                if self._transcoder is not None:
+                    self._transcoder.finish()
                 self._finish_manifest()
                 if self.cfg.general.silence_preview:
                     print(json.dumps(self._silence_preview_report(), indent=2))
@@ -342,9 +369,11 @@ class Recorder(Runnables):
                     self._receive_control_requests()
                     self._midi.poll()
                     self._osc.poll()
+                    self._record_transcoded_files()
                     self._poll_devices()
                     self._reap_sources()
                     self._stop_stalled_sources()
+                    self._read_meters()
                     sources = [
                         source
                         for source in self._devices.sources.values()
@@ -411,6 +440,9 @@ class Recorder(Runnables):
     def _stop_stalled_sources(self) -> None:
         self._devices.stop_stalled()
 
+    def _read_meters(self) -> None:
+        self._devices.read_meters()
+
     def _receive_pending_updates(self) -> None:
         self._receive_key_events()
         self._devices.receive_pending_updates()
@@ -481,6 +513,13 @@ class Recorder(Runnables):
                 label=self.cfg.keys.labels.get(event.key),
             )
         )
+        capture_key = self.cfg.keys.capture_key
+        if capture_key and event.type == 'key_pressed' and event.key == capture_key:
+            self._capture(event.key)
+
+    def _capture(self, label: str) -> None:
+        if self.cfg.recording.retro_seconds:
+            self._control.capture(gui_protocol.Capture(type='capture', label=label))
 
     def _start_manifest(self) -> None:
         self.session.start(
@@ -490,7 +529,17 @@ class Recorder(Runnables):
         )
         self._osc.open_session(self.session_directory)
 
+    def _record_transcoded_files(self) -> None:
+        if self._transcoder is None:
+            return
+        for record in self._transcoder.take_records():
+            if isinstance(record, str):
+                self._record_warning(record)
+            else:
+                self._write_manifest_record(record)
+
     def _finish_manifest(self) -> None:
+        self._record_transcoded_files()
         self._osc.close_session()
         self.session.finish(times.timestamp())
 
@@ -25,6 +25,24 @@ def mark(
     return gui_protocol.Marked(type='marked', label=request.label)
 
 
+def capture(
+    control: 'RecordingControl', request: gui_protocol.Capture
+) -> gui_protocol.Captured:
+    if not (seconds := control.cfg.recording.retro_seconds):
+        raise RecsError('Cannot capture without --retro-seconds')
+    for source in control.devices.hardware.values():
+        if source.running:
+            source.capture()
+    control.write_record(
+        ManifestEvent(
+            timestamp=timestamp_to_json(times.timestamp()),
+            type='retro_capture',
+            label=request.label,
+        )
+    )
+    return gui_protocol.Captured(type='captured', label=request.label, seconds=seconds)
+
+
 def pause_recording(
     control: 'RecordingControl',
     reason: str,
@@ -7,6 +7,7 @@ from pydantic import BaseModel
 from recs.base.errors import ErrorRecord
 from recs.cfg import settings
 from recs.cfg.cfg import Cfg
+from recs.cfg.device import StreamSettings
 from recs.cfg.track import Track
 from recs.cfg.track_names import SourceTrackNames
 from recs.daemon import gui_protocol
@@ -38,6 +39,7 @@ class RecordingControl:
         self,
         cfg: Cfg,
         saved_tracks: dict[str, list[settings.TrackSettings]],
+        saved_streams: dict[str, StreamSettings],
         track_names: SourceTrackNames,
         state: FullState,
         session: recording_session.RecordingSession,
@@ -55,6 +57,7 @@ class RecordingControl:
     ) -> None:
         self.cfg = cfg
         self.saved_tracks = saved_tracks
+        self.saved_streams = saved_streams
         self.track_names = track_names
         self.state = state
         self.session = session
@@ -92,6 +95,9 @@ class RecordingControl:
     def shutdown_started(self, value: bool) -> None:
         self.runtime_state.shutdown_started = value
 
+    def capture(self, request: gui_protocol.Capture) -> gui_protocol.Captured:
+        return recording_commands.capture(self, request)
+
     def mark(self, request: gui_protocol.Mark) -> gui_protocol.Marked:
         return recording_commands.mark(self, request)
 
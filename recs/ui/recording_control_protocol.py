@@ -10,6 +10,7 @@ from recs.daemon import external_ipc, gui_ipc, gui_protocol
 API_COMMANDS = [
     'calibrate',
     'capabilities',
+    'capture',
     'disk_status',
     'get_cfg',
     'get_track_names',
@@ -42,6 +43,9 @@ class RecordingControlTarget(Protocol):
     def calibrate(self, request: gui_protocol.Calibrate) -> gui_protocol.Calibrated:
         ...
 
+    def capture(self, request: gui_protocol.Capture) -> gui_protocol.Captured:
+        ...
+
     def device_status(self) -> list[dict[str, object]]:
         ...
 
@@ -146,6 +150,8 @@ class RecordingControlProtocol:
                 commands=API_COMMANDS,
                 version=gui_protocol.VERSION,
             )
+        if isinstance(request, gui_protocol.Capture):
+            return self.control.capture(request)
         if isinstance(request, gui_protocol.DiskStatusRequest):
             return self.control.disk_status()
         if isinstance(request, gui_protocol.GetCfg):
@@ -1,7 +1,7 @@
 from pathlib import Path
 
 from recs.ui import recording_paths, session_manifest
-from recs.ui.source_recorder import SourceFile
+from recs.ui.source_update import SourceFile
 
 
 class RecordingSession:
@@ -85,6 +85,7 @@ class RecordingSession:
             channels=file.channels,
             sample_rate=file.sample_rate,
             bit_depth=file.bit_depth,
+            tracks=file.tracks,
         )
         self.files[file.path] = record
         self.write(record)
@@ -249,7 +249,12 @@ def set_cfg_value(
 def save_settings(control: 'RecordingControl') -> None:
     if control.cfg.save_settings:
         try:
-            settings.save(control.cfg, control.track_names, control.saved_tracks)
+            settings.save(
+                control.cfg,
+                control.track_names,
+                control.saved_tracks,
+                control.saved_streams,
+            )
         except RecsError as e:
             control.write_record(
                 ManifestWarning(
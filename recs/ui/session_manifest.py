@@ -34,6 +34,11 @@ class ManifestEvent(BaseModel):
     value: object | None = None
     max_queued_seconds: float | None = None
     max_write_seconds: float | None = None
+    max_write_queue_seconds: float | None = None
+    max_write_latency_seconds: float | None = None
+    max_rollover_seconds: float | None = None
+    max_checkpoint_seconds: float | None = None
+    max_spilled_seconds: float | None = None
     queued_seconds: float | None = None
     path: str | None = None
     disk: str | None = None
@@ -67,6 +72,7 @@ class ManifestFile(BaseModel):
     channels: int | None = None
     sample_rate: int | None = None
     bit_depth: int | None = None
+    tracks: dict[str, list[int]] | None = None
     source: str | None = None
     message_count: int | None = None
     timing_source: str | None = None
@@ -75,6 +81,7 @@ class ManifestFile(BaseModel):
     inbound_count: int | None = None
     outbound_count: int | None = None
     decode_error_count: int | None = None
+    transcoded_from: str | None = None
 
 
 class ManifestWarning(BaseModel):
@@ -223,7 +230,7 @@ def _parse_record(
     record_type = data.get('type')
     if record_type == 'header':
         return ManifestHeader.model_validate(data)
-    if record_type in {'file_finished', 'file_started'}:
+    if record_type in {'file_finished', 'file_started', 'file_transcoded'}:
         return ManifestFile.model_validate(data)
     if record_type == 'footer':
         return ManifestFooter.model_validate(data)
@@ -0,0 +1,95 @@
+"""
+Fix the headers of .wav and RF64 files which were open during a crash.
+
+Run as `recs repair [SESSION_DIRECTORY]`.  Each audio file in the
+file_started records of a session manifest has the sizes in its header made
+to match its length.  Only the header bytes are written, so even a file of
+many gigabytes takes milliseconds.
+"""
+
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+from recs.audio import wav_header
+
+from . import session_manifest
+from .session_browser import MANIFEST_NAME
+
+SUFFIXES = '.rf64', '.wav'
+
+
+class Repair(NamedTuple):
+    path: Path
+    repaired: bool = False
+    error: str = ''
+
+
+def main(argv: list[str]) -> int:
+    args = _parser().parse_args(argv)
+    results = repair(args.path, args.jobs)
+    for r in results:
+        if r.error:
+            print(r.error, file=sys.stderr)
+        elif r.repaired:
+            print(r.path)
+    return int(any(r.error for r in results))
+
+
+def repair(root: Path, jobs: int | None = None) -> list[Repair]:
+    if not (files := _started_files(root)):
+        return []
+    paths, channels, samplerates = zip(*files)
+    with ProcessPoolExecutor(jobs) as executor:
+        return list(executor.map(_repair, paths, channels, samplerates))
+
+
+def _repair(path: Path, channels: int | None, samplerate: int | None) -> Repair:
+    try:
+        return Repair(path, wav_header.repair(path, channels, samplerate))
+    except (OSError, ValueError) as e:
+        return Repair(path, error=str(e))
+
+
+def _started_files(root: Path) -> list[tuple[Path, int | None, int | None]]:
+    if root.name == MANIFEST_NAME:
+        manifests = [root]
+    else:
+        manifests = sorted(root.glob(f'**/{MANIFEST_NAME}'))
+
+    files: dict[Path, tuple[int | None, int | None]] = {}
+    for manifest_path in manifests:
+        try:
+            manifest = session_manifest.read(manifest_path)
+        except OSError as e:
+            print(f'{manifest_path}: {e}', file=sys.stderr)
+            continue
+        for f in manifest.files:
+            path = _file_path(manifest_path, f.path)
+            if (
+                f.type == 'file_started'
+                and f.kind == 'audio'
+                and path.suffix in SUFFIXES
+                and path.exists()
+            ):
+                files[path] = f.channels, f.sample_rate
+
+    return [(path, *expected) for path, expected in files.items()]
+
+
+def _file_path(manifest_path: Path, path: str) -> Path:
+    result = Path(path)
+    if result.is_absolute():
+        return result
+    return manifest_path.parent / result
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='recs repair')
+    parser.add_argument('path', type=Path, nargs='?', default=Path())
+    parser.add_argument(
+        '--jobs', type=int, help='Files to repair at once: default is one per CPU'
+    )
+    return parser
@@ -5,15 +5,17 @@ import threading
 from collections.abc import Sequence
 from multiprocessing import connection
 from pathlib import Path
-from typing import Any, cast
+from typing import Any
 
 from threa import Runnable
 
 from recs.cfg.cfg import Cfg
+from recs.cfg.device import StreamSettings
 from recs.cfg.track import Track
 from recs.cfg.track_names import SourceTrackNames
 
-from . import source_recorder
+from . import source_recorder, source_wire
+from .meter_board import MeterBoard, MeterReading, name_size
 
 STOP_TIMEOUT = 2.0
 LINUX_PROCESS_NAME_LIMIT = 15
@@ -63,6 +65,7 @@ class SourceControlTransport:
                 tracks=control.tracks
                 if control.tracks is not None
                 else self.control.tracks,
+                capture=control.capture or self.control.capture,
             )
             self.available.set()
 
@@ -88,7 +91,10 @@ class SourceProcess(Runnable):
     connection: connection.Connection
     control_connection: connection.Connection
     control_transport: SourceControlTransport
+    final_meters: MeterReading | None = None
+    meter_board: MeterBoard | None = None
     process: mp.Process
+    stream: StreamSettings | None = None
     stop_event: Any
 
     def __init__(
@@ -121,6 +127,15 @@ class SourceProcess(Runnable):
     @property
     def recorder_cfg(self) -> Cfg:
         cfg = self.cfg.with_device_profile(self.source.name)
+        if self.stream is not None:
+            # Tuning only ever raises the configured values
+            device = cfg.device.model_copy(
+                update={
+                    'blocksize': max(cfg.device.blocksize, self.stream.blocksize),
+                    'latency': max(cfg.device.latency, self.stream.latency),
+                }
+            )
+            cfg = cfg.model_copy(update={'device': device})
         console = cfg.console.model_copy(update={'gui': False})
         return cfg.model_copy(update={'console': console})
 
@@ -129,10 +144,18 @@ class SourceProcess(Runnable):
         self.connection, child_updates = mp.Pipe(duplex=False)
         child_controls, self.control_connection = mp.Pipe(duplex=False)
         self.stop_event = mp.Event()
+        self.final_meters = None
+        channels = self.source.channels
+        self.meter_board = _meter_board(
+            max(channels, len(self.tracks)),
+            # Any later layout has no name longer than the last stereo pair's
+            name_size([*(t.name for t in self.tracks), f'{channels - 1}-{channels}']),
+        )
         process_name = _source_process_name(self.source.name)
         kwargs = {
             'cfg': self.recorder_cfg,
             'control_connection': child_controls,
+            'meter_board_name': self.meter_board and self.meter_board.name,
             'process_name': process_name,
             'session_directory': self.session_directory,
             'stop_event': self.stop_event,
@@ -162,6 +185,13 @@ class SourceProcess(Runnable):
     def finish(self) -> None:
         self.stop()
 
+    def read_meters(self) -> MeterReading | None:
+        if self.meter_board is not None:
+            return self.meter_board.read()
+        # The last reading from a finished process is only returned once
+        reading, self.final_meters = self.final_meters, None
+        return reading
+
     def set_track_names(self, track_names: SourceTrackNames) -> None:
         self.track_names = track_names
         if self.started:
@@ -202,6 +232,11 @@ class SourceProcess(Runnable):
                 source_recorder.SourceControl(calibration_tracks=tracks)
             )
 
+    def capture(self) -> None:
+        """Save the audio kept in memory by --retro-seconds"""
+        if self.started:
+            self.control_transport.publish(source_recorder.SourceControl(capture=True))
+
     def join(self, timeout: float | None = None) -> None:
         if not self.started:
             return
@@ -214,15 +249,14 @@ class SourceProcess(Runnable):
         self.pending_updates = []
         while _connection_ready(self.connection):
             try:
-                update = self.connection.recv()
+                update = source_wire.decode(self.connection.recv_bytes())
             except (EOFError, OSError):
                 break
-            self.pending_updates.append(
-                cast(
-                    source_recorder.SourceUpdate | source_recorder.SourceFailure,
-                    update,
-                )
-            )
+            self.pending_updates.append(update)
+        if self.meter_board is not None:
+            self.final_meters = self.meter_board.read()
+            self.meter_board.close(unlink=True)
+            self.meter_board = None
         self._record_exit_failure(forced)
         self.control_transport.stop()
         self.control_connection.close()
@@ -279,6 +313,7 @@ def _run_source_recorder(
     update_connection: connection.Connection,
     track_names: SourceTrackNames | None = None,
     process_name: str | None = None,
+    meter_board_name: str | None = None,
 ) -> None:
     _set_process_name(process_name)
     transport = source_recorder.SourceUpdateTransport(update_connection)
@@ -292,6 +327,7 @@ def _run_source_recorder(
             tracks=tracks,
             track_names=track_names,
             update_transport=transport,
+            meter_board_name=meter_board_name,
         )
     except Exception as e:
         source_name = tracks[0].source.key
@@ -307,6 +343,13 @@ def _run_source_recorder(
         transport.finish()
 
 
+def _meter_board(capacity: int, name_size: int) -> MeterBoard | None:
+    try:
+        return MeterBoard(capacity, name_size=name_size)
+    except OSError:
+        return None  # Meters will go over the pipe
+
+
 def _connection_ready(conn: connection.Connection) -> bool:
     try:
         return conn.poll()
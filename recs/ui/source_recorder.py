@@ -1,6 +1,7 @@
 import contextlib
 import threading
-from collections.abc import Callable, Sequence
+from collections.abc import Callable, Mapping, Sequence
+from functools import partial
 from multiprocessing.connection import Connection
 from pathlib import Path
 from queue import Empty, Queue
@@ -8,65 +9,48 @@ from time import monotonic
 from typing import Any, NamedTuple, TypeVar, cast
 
 import numpy as np
-from pydantic import BaseModel
 from threa import Runnables
 
 from recs.audio.block import Block
 from recs.audio.channel_writer import ChannelWriter
+from recs.audio.disk_writer import DiskWriter
+from recs.audio.file_opener import max_channels
+from recs.audio.levels import Levels
+from recs.audio.retro_capture import RetroCapture
+from recs.audio.slab_pool import SlabPool
+from recs.audio.spill_file import SpillFile, SpillWriter
 from recs.base import memory
 from recs.base.signals import raise_keyboard_interrupt_on_signal
-from recs.base.state import ChannelState
+from recs.base.state import (
+    COLUMNS,
+    SUMMED,
+    ChannelState,
+    ChannelStates,
+)
 from recs.base.types import Active, Format, SdType
 from recs.cfg import time_settings
 from recs.cfg.cfg import Cfg
+from recs.cfg.device import InputDevice
 from recs.cfg.source import Update
 from recs.cfg.track import Track
 from recs.cfg.track_names import SourceTrackNames
 
+from . import meter_board, source_wire
+from .source_update import BufferStats, SourceFailure, SourceFile, SourceUpdate
+from .stream_tuner import StreamTuner
+
 POLL_TIMEOUT = 0.05
+# With a meter board, routine updates are held and sent this often
+HEARTBEAT_SECONDS = 0.25
+CATCH_UP_SECONDS = 0.5
+MAX_BATCH_SECONDS = 0.5
+# Audio held in memory while it waits to be written to the spill file
+SPILL_STAGE_SECONDS = 1.0
 MAX_MERGED_WARNINGS = 64
 MAX_MERGED_FILES = 512
 _N = TypeVar('_N', int, float)
-
-
-class BufferStats(BaseModel):
-    queued_blocks: int = 0
-    queued_seconds: float = 0.0
-    max_queued_seconds: float = 0.0
-    dropped_blocks: int = 0
-    dropped_frames: int = 0
-    last_drop_timestamp: float = 0.0
-    max_write_seconds: float = 0.0
-    source_update_age_seconds: float = 0.0
-    max_source_update_age_seconds: float = 0.0
-    max_source_update_send_seconds: float = 0.0
-
-
-class SourceUpdate(NamedTuple):
-    channels: dict[str, ChannelState]
-    files: list[Path]
-    frames: int
-    source_name: str
-    timestamp: float | None = None
-    buffer_stats: BufferStats | None = None
-    buffer_warnings: list[str] | None = None
-    file_records: list['SourceFile'] | None = None
-    file_end_frames: dict[Path, int] | None = None
-    file_end_timestamps: dict[Path, float] | None = None
-    frame_count: int | None = None
-    calibration: dict[str, float] | None = None
-    track_layout: list[str] | None = None
-    config_revisions_applied: list[int] | None = None
-
-
-class SourceFailure(NamedTuple):
-    message: str
-    source_name: str
-    exception_type: str | None = None
-    exitcode: int | None = None
-    final_frame_count: int | None = None
-    last_callback_timestamp: float | None = None
-    stop_kind: str | None = None
+# Stands in for the array of an update while it waits in a spill file
+_SPILLED = np.empty(0)
 
 
 class SourceControl(NamedTuple):
@@ -76,6 +60,7 @@ class SourceControl(NamedTuple):
     track_names: SourceTrackNames | None = None
     calibration_tracks: list[str] | None = None
     tracks: list[Track] | None = None
+    capture: bool | None = None
 
 
 class SourceControlHandler:
@@ -87,6 +72,7 @@ class SourceControlHandler:
         set_track_names: Callable[[SourceTrackNames], None],
         start_calibration: Callable[[list[str]], None],
         set_tracks: Callable[[list[Track], SourceTrackNames], None],
+        capture: Callable[[], None],
     ) -> None:
         self.connection = connection
         self.set_cfg = set_cfg
@@ -94,6 +80,7 @@ class SourceControlHandler:
         self.set_track_names = set_track_names
         self.start_calibration = start_calibration
         self.set_tracks = set_tracks
+        self.capture = capture
 
     def receive(self) -> None:
         while self.connection.poll():
@@ -113,6 +100,8 @@ class SourceControlHandler:
                 self.start_calibration(message.calibration_tracks)
             if message.tracks is not None:
                 self.set_tracks(message.tracks, message.track_names or {})
+            if message.capture:
+                self.capture()
 
 
 class SourceUpdateTransport:
@@ -169,7 +158,7 @@ class SourceUpdateTransport:
             message = self._with_transport_stats(message, message_timestamp)
             try:
                 start = monotonic()
-                self.connection.send(message)
+                self.connection.send_bytes(source_wire.encode(message))
                 self.max_send_seconds = max(self.max_send_seconds, monotonic() - start)
             except (BrokenPipeError, EOFError, OSError):
                 return
@@ -200,21 +189,11 @@ class SourceUpdateTransport:
         )
 
 
-class SourceFile(NamedTuple):
-    path: Path
-    source_name: str
-    track: int
-    channels: int
-    sample_rate: int
-    bit_depth: int
-    start_frame: int | None = None
-    start_timestamp: float | None = None
-
-
 class BufferedUpdate(NamedTuple):
     update: Update
     start_frame: int
     end_frame: int
+    slab: int | None = None
 
 
 class SourceCalibration:
@@ -256,18 +235,26 @@ class SourceCalibration:
 
 
 class SourceFileEvents:
-    def __init__(self, writers: Sequence['ChannelWriter']) -> None:
+    def __init__(
+        self,
+        writers: Sequence['ChannelWriter'],
+        tracks: dict[str, list[int]] | None = None,
+    ) -> None:
         self.file_counts = [0] * len(writers)
+        self.tracks = tracks
         self.pending_file_end_frames: dict[Path, int] = {}
         self.pending_file_end_timestamps: dict[Path, float] = {}
 
-    def reset_writers(self, writers: Sequence['ChannelWriter']) -> None:
+    def reset_writers(
+        self,
+        writers: Sequence['ChannelWriter'],
+        tracks: dict[str, list[int]] | None = None,
+    ) -> None:
         self.file_counts = [0] * len(writers)
+        self.tracks = tracks
 
     def remember_finished_files(self, writers: Sequence['ChannelWriter']) -> None:
-        for writer in writers:
-            self.pending_file_end_frames.update(writer.file_end_frames)
-            self.pending_file_end_timestamps.update(writer.file_end_timestamps)
+        self._take_file_ends(writers)
 
     def new_files(
         self, writers: Sequence['ChannelWriter'], bit_depth: int
@@ -290,6 +277,7 @@ class SourceFileEvents:
                     bit_depth=bit_depth,
                     start_frame=writer.file_start_frames[path],
                     start_timestamp=writer.file_start_timestamps[path],
+                    tracks=self.tracks,
                 )
                 for path in new_files
             )
@@ -297,21 +285,22 @@ class SourceFileEvents:
         return result, records
 
     def end_frames(self, writers: Sequence['ChannelWriter']) -> dict[Path, int]:
-        result = self.pending_file_end_frames | {
-            p: frame for w in writers for p, frame in w.file_end_frames.items()
-        }
-        self.pending_file_end_frames = {}
+        """Return the end frames of files which grew since the last call"""
+        self._take_file_ends(writers)
+        result, self.pending_file_end_frames = self.pending_file_end_frames, {}
         return result
 
     def end_timestamps(self, writers: Sequence['ChannelWriter']) -> dict[Path, float]:
-        result = self.pending_file_end_timestamps | {
-            p: timestamp
-            for w in writers
-            for p, timestamp in w.file_end_timestamps.items()
-        }
-        self.pending_file_end_timestamps = {}
+        self._take_file_ends(writers)
+        result, self.pending_file_end_timestamps = self.pending_file_end_timestamps, {}
         return result
 
+    def _take_file_ends(self, writers: Sequence['ChannelWriter']) -> None:
+        for writer in writers:
+            frames, timestamps = writer.take_file_ends()
+            self.pending_file_end_frames.update(frames)
+            self.pending_file_end_timestamps.update(timestamps)
+
 
 class InputBuffer:
     def __init__(self, cfg: Cfg, samplerate: int) -> None:
@@ -319,14 +308,26 @@ class InputBuffer:
         self.samplerate = samplerate
         self.block_frames = 0
         self.queue: Queue[BufferedUpdate] | None = None
+        self.pool: SlabPool | None = None
         self.queue_ready = threading.Event()
         self.stats = BufferStats()
         self.timeline_frames = 0
         self.reported_dropped_frames = 0
         self.memory_low = False
         self.last_memory_check = float('-inf')
+        self.spill: SpillWriter[BufferedUpdate] | None = None
+        self.spill_warnings: list[str] = []
+        if (directory := cfg.recording.spill_directory).name:
+            try:
+                megabytes = cfg.recording.spill_megabytes
+                spill = SpillFile(directory, megabytes * 1_000_000)
+                stage_frames = round(SPILL_STAGE_SECONDS * samplerate)
+                self.spill = SpillWriter(spill, stage_frames)
+            except OSError as e:
+                self.spill_warnings.append(f'Cannot create a spill file: {e}')
 
     def put(self, update: Update) -> None:
+        """Queue a copy of `update`, whose array is only valid during the call"""
         frames = len(update.array)
         if not frames:
             return
@@ -334,7 +335,7 @@ class InputBuffer:
         start_frame = self.timeline_frames
         self.timeline_frames += frames
         if self._memory_low():
-            self._drop(update, frames)
+            self._spill_or_drop(update, start_frame)
             return
         if self.queue is None:
             maxsize = max(
@@ -343,15 +344,28 @@ class InputBuffer:
                     self.cfg.recording.audio_buffer_seconds * self.samplerate / frames
                 ),
             )
+            self.pool = self._make_pool(update.array)
             self.queue = Queue(maxsize=maxsize)
             self.queue_ready.set()
-        if self.queue.full():
-            self._drop(update, frames)
+        if (
+            # Once anything is spilled, the rest follows it until it's read
+            self.spill
+            or self.queue.full()
+            or (copied := self._copy(update.array)) is None
+        ):
+            self._spill_or_drop(update, start_frame)
             return
-        buffered = BufferedUpdate(update, start_frame, self.timeline_frames)
+        slab, array = copied
+        buffered = BufferedUpdate(
+            update._replace(array=array), start_frame, self.timeline_frames, slab
+        )
         self.queue.put_nowait(buffered)
         self._update_queue_stats()
 
+    def release(self, buffered: BufferedUpdate) -> None:
+        if buffered.slab is not None and self.pool is not None:
+            self.pool.release(buffered.slab)
+
     def get(
         self, timeout: float | None = None, *, block: bool = True
     ) -> BufferedUpdate:
@@ -359,14 +373,25 @@ class InputBuffer:
             if block:
                 self.queue_ready.wait(timeout)
         if self.queue is None:
-            raise Empty
-        buffered = self.queue.get(block=block, timeout=timeout)
+            buffered = self._unspill()
+        else:
+            try:
+                # Queued updates are older than spilled ones
+                buffered = self.queue.get(
+                    block=block and not self.spill, timeout=timeout
+                )
+            except Empty:
+                buffered = self._unspill()
         self.block_frames = max(1, len(buffered.update.array))
         self._update_queue_stats()
         return buffered
 
+    def close(self) -> None:
+        if self.spill is not None:
+            self.spill.close()
+
     def warnings(self, source_name: str, timestamp: float) -> list[str]:
-        warnings: list[str] = []
+        warnings, self.spill_warnings = self.spill_warnings, []
         if self.stats.dropped_frames > self.reported_dropped_frames:
             dropped = self.stats.dropped_frames - self.reported_dropped_frames
             warnings.append(
@@ -389,6 +414,46 @@ class InputBuffer:
             self.stats.max_queued_seconds,
             self.stats.queued_seconds,
         )
+        if self.spill is not None:
+            self.stats.spilled_seconds = (
+                len(self.spill) * self.block_frames / self.samplerate
+            )
+            self.stats.max_spilled_seconds = max(
+                self.stats.max_spilled_seconds,
+                self.stats.spilled_seconds,
+            )
+
+    def _make_pool(self, array: np.ndarray) -> SlabPool:
+        # Slabs are also held while their writes wait in the disk writer's queue
+        recording = self.cfg.recording
+        seconds = recording.audio_buffer_seconds + recording.write_queue_seconds
+        count = max(2, round(seconds * self.samplerate / len(array)))
+        return SlabPool(count, array.shape, array.dtype)
+
+    def _copy(self, array: np.ndarray) -> tuple[int | None, np.ndarray] | None:
+        if self.pool is None or not self.pool.fits(array):
+            # Blocks larger than the first one are rare enough to allocate
+            return None, array.copy()
+        return self.pool.put(array)
+
+    def _spill_or_drop(self, update: Update, start_frame: int) -> None:
+        if self.spill is not None:
+            # The array is only valid during the callback, so it's copied now,
+            # and written to disk later, off the callback's thread
+            info = BufferedUpdate(
+                update._replace(array=_SPILLED), start_frame, self.timeline_frames
+            )
+            if self.spill.put(update.array, info):
+                self.stats.spilled_blocks += 1
+                self._update_queue_stats()
+                return
+        self._drop(update, len(update.array))
+
+    def _unspill(self) -> BufferedUpdate:
+        if self.spill is None or (spilled := self.spill.get()) is None:
+            raise Empty
+        array, buffered = spilled
+        return buffered._replace(update=buffered.update._replace(array=array))
 
     def _drop(self, update: Update, frames: int) -> None:
         self.stats.dropped_blocks += 1
@@ -415,55 +480,64 @@ class SourceControlApplier:
             self.set_track_names,
             recorder.calibration.start,
             self.set_tracks,
+            self.capture,
         )
 
     def receive(self) -> None:
         self.handler.receive()
 
+    def capture(self) -> None:
+        self.recorder.pending_capture = True
+
     def set_track_names(self, track_names: SourceTrackNames) -> None:
-        for writer in self.recorder.channel_writers:
+        for writer in self.recorder.writers:
             writer.set_track_names(track_names)
 
     def set_session_directory(self, session_directory: Path) -> None:
         recorder = self.recorder
         recorder.session_directory = session_directory
-        for writer in recorder.channel_writers:
+        for writer in recorder.writers:
             writer.set_session_directory(session_directory)
 
     def set_cfg(self, cfg: Cfg, revision: int | None = None) -> None:
         recorder = self.recorder
         recorder.cfg = cfg
         recorder.buffer.cfg = cfg
+        recorder.disk_writer.max_seconds = cfg.recording.write_queue_seconds
         recorder.times = cfg.times.scale(recorder.source.samplerate)
-        for writer in recorder.channel_writers:
+        for writer in recorder.writers:
             writer.set_cfg(cfg, recorder.times)
+        recorder.set_poly_noise_floor()
         if revision is not None:
             recorder.pending_config_revisions.append(revision)
 
     def set_tracks(self, tracks: list[Track], track_names: SourceTrackNames) -> None:
         recorder = self.recorder
-        for writer in recorder.channel_writers:
+        for writer in recorder.writers:
             if writer.active == Active.active:
                 recorder.pending_active_channels.update(writer.track.channels)
             writer.stop()
-        recorder.file_events.remember_finished_files(recorder.channel_writers)
-        recorder.channel_writers = tuple(
-            ChannelWriter(
-                cfg=recorder.cfg,
-                times=recorder.times,
-                track=track,
-                session_directory=recorder.session_directory,
-            )
-            for track in tracks
-        )
+        recorder.file_events.remember_finished_files(recorder.writers)
+        # The old writers close their files on the disk writer, so their
+        # closes are collected until everything queued so far has run
+        drained = threading.Event()
+        recorder.retired_writers.append((recorder.writers, drained))
+        recorder.disk_writer.after(drained.set)
+        recorder.make_writers(tracks)
         self.set_track_names(track_names)
-        recorder.file_events.reset_writers(recorder.channel_writers)
-        recorder.runnables = recorder.input_stream, *recorder.channel_writers
+        recorder.file_events.reset_writers(recorder.file_writers, recorder.poly_tracks)
+        recorder.runnables = (
+            recorder.disk_writer,
+            recorder.input_stream,
+            *recorder.writers,
+        )
         recorder.pending_track_layout = [track.name for track in tracks]
 
 
 class SourceRecorder(Runnables):
     sample_count: int = 0
+    poly_writer: ChannelWriter | None = None
+    poly_tracks: dict[str, list[int]] | None = None
 
     def __init__(
         self,
@@ -474,11 +548,21 @@ class SourceRecorder(Runnables):
         tracks: Sequence[Track],
         update_transport: SourceUpdateTransport,
         track_names: SourceTrackNames | None = None,
+        meter_board_name: str | None = None,
     ) -> None:
         self.cfg = cfg
         self.session_directory = session_directory
         self.stop_event = stop_event
         self.update_transport = update_transport
+        self.meter_board = (
+            meter_board.MeterBoard(name=meter_board_name) if meter_board_name else None
+        )
+        self.meter_generation = 0
+        self.meter_totals = ChannelStates(())
+        self.held_update: SourceUpdate | None = None
+        self.last_published = 0.0
+        self.retired_writers: list[tuple[Sequence[ChannelWriter], threading.Event]] = []
+        self.pending_warnings: list[str] = []
 
         self.source = tracks[0].source
         assert all(t.source == self.source for t in tracks)
@@ -486,28 +570,37 @@ class SourceRecorder(Runnables):
         self.name = self.cfg.aliases.display_name(self.source)
         self.buffer = InputBuffer(self.cfg, self.source.samplerate)
         self.times = self.cfg.times.scale(self.source.samplerate)
-        self.channel_writers = tuple(
-            ChannelWriter(
-                cfg=self.cfg,
-                times=self.times,
-                track=t,
-                session_directory=self.session_directory,
-            )
-            for t in tracks
+        self.disk_writer = DiskWriter(
+            self.cfg.recording.write_queue_seconds, name=f'DiskWriter-{self.name}'
         )
-        self.file_events = SourceFileEvents(self.channel_writers)
+        self.make_writers(tracks)
+        self.file_events = SourceFileEvents(self.file_writers, self.poly_tracks)
         self.pending_active_channels: set[int] = set()
         self.pending_config_revisions: list[int] = []
         self.pending_track_layout: list[str] | None = None
+        self.pending_capture = False
+        self.retro = RetroCapture(
+            self.cfg.recording.retro_seconds,
+            self.source.samplerate,
+            self.source.channels,
+            self.cfg.recording.memory_reserve_megabytes * 1_000_000,
+            MAX_BATCH_SECONDS,
+        )
         self.calibration = SourceCalibration(self.source.samplerate)
+        self.tuner = StreamTuner(
+            self.cfg, self.source.samplerate, isinstance(self.source, InputDevice)
+        )
         self.control = SourceControlApplier(self, control_connection)
         self.control.set_track_names(track_names or {})
 
         self.input_stream = self.source.input_stream(
             sdtype=cast(SdType, self.cfg.audio.sdtype),
             update_callback=self.buffer.put,
+            blocksize=self.cfg.device.blocksize,
+            latency=self.cfg.device.latency,
         )
-        super().__init__(self.input_stream, *self.channel_writers)
+        # Runnables stop in reverse order, so the disk writer drains last
+        super().__init__(self.disk_writer, self.input_stream, *self.writers)
 
         with (
             raise_keyboard_interrupt_on_signal(),
@@ -519,17 +612,104 @@ class SourceRecorder(Runnables):
                     update = self.buffer.get(timeout=POLL_TIMEOUT)
                 except Empty:
                     self.control.receive()
+                    self._publish_held()
                     if not self.input_stream.running:
                         break
                 else:
                     self.control.receive()
-                    self._receive_update(update)
+                    self._process(update)
 
         with contextlib.suppress(Empty):
             while True:
                 update = self.buffer.get(block=False)
                 self.control.receive()
-                self._receive_update(update)
+                self._process(update)
+
+        self.buffer.close()
+        self._publish_final()
+        if self.meter_board is not None:
+            self.meter_board.close()
+
+        # Raise any error from the last writes
+        self.disk_writer.flush()
+
+    def make_writers(self, tracks: Sequence[Track]) -> None:
+        # With --poly-file, the tracks only meter and gate, and one writer
+        # records all the source's channels from the first track to the last
+        poly = (
+            self.cfg.recording.poly_file
+            and len(tracks) > 1
+            and all(t.channels for t in tracks)
+        )
+
+        def writer(track: Track, meter_only: bool = False) -> ChannelWriter:
+            return ChannelWriter(
+                cfg=self.cfg,
+                times=self.times,
+                track=track,
+                session_directory=self.session_directory,
+                disk_writer=self.disk_writer,
+                meter_only=meter_only,
+            )
+
+        poly_writer = writer(poly_track(tracks)) if poly else None
+        if poly_writer is not None and (too_many := _too_many_channels(poly_writer)):
+            # Found here, not as the first take opens its files and fails
+            self.pending_warnings.append(
+                f'Device {poly_writer.track.source.name}: '
+                f'{len(poly_writer.track.channels)} channels are too many '
+                f'for one {too_many} file, so each track gets its own files'
+            )
+            poly_writer = None
+
+        self.channel_writers = tuple(writer(t, poly_writer is not None) for t in tracks)
+        if poly_writer is not None:
+            self.poly_writer = poly_writer
+            self.poly_tracks = poly_track_map(poly_writer.track, tracks)
+            self.file_writers: tuple[ChannelWriter, ...] = (poly_writer,)
+            self.writers = (*self.channel_writers, self.poly_writer)
+            self.set_poly_noise_floor()
+        else:
+            self.poly_writer = self.poly_tracks = None
+            self.file_writers = self.writers = self.channel_writers
+        if self.disk_writer is not None:
+            self.disk_writer.tracks = len(self.file_writers)
+
+    def set_poly_noise_floor(self) -> None:
+        # The exact gate trims a take at the most sensitive track's floor
+        if self.poly_writer is not None:
+            floors = (w.noise_floor for w in self.channel_writers)
+            self.poly_writer.noise_floor = min(floors)
+
+    def _process(self, update: BufferedUpdate) -> None:
+        batch = [update]
+        if self._catching_up():
+            # Join the backlog into larger blocks, so that per-block costs
+            # are paid once per batch
+            limit = round(MAX_BATCH_SECONDS * self.source.samplerate)
+            frames = len(update.update.array)
+            with contextlib.suppress(Empty):
+                while frames < limit:
+                    u = self.buffer.get(block=False)
+                    if not _contiguous(batch[-1], u):
+                        self._process_batch(batch)
+                        batch, frames = [], 0
+                    batch.append(u)
+                    frames += len(u.update.array)
+        self._process_batch(batch)
+
+    def _catching_up(self) -> bool:
+        # File sources have no deadline, and must stay block accurate
+        return (
+            isinstance(self.source, InputDevice)
+            and self.buffer.stats.queued_seconds + self.buffer.stats.spilled_seconds
+            >= CATCH_UP_SECONDS
+        )
+
+    def _process_batch(self, batch: list[BufferedUpdate]) -> None:
+        self._receive_update(_join_updates(batch))
+        for u in batch:
+            self.disk_writer.after(partial(self.buffer.release, u))
 
     def _receive_update(self, u: BufferedUpdate) -> None:
         update = u.update
@@ -539,31 +719,63 @@ class SourceRecorder(Runnables):
             u = BufferedUpdate(update, u.start_frame, u.end_frame)
 
         end_timestamp = update.timestamp + len(update.array) / self.source.samplerate
-        cb = {c: c.to_block(update.array) for c in self.channel_writers}
+        levels = Levels.analyze(update.array)
+        cb = {c: c.to_block(update.array, levels) for c in self.channel_writers}
         should_record = {c: c.should_record(b) for c, b in cb.items()}
         band_should_record = self.cfg.recording.band_mode and any(
             should_record.values()
         )
-        msgs: dict[str, ChannelState] = {}
+        before = np.array([w.counters() for w in cb], dtype=float).reshape(-1, 3)
         for writer, block in cb.items():
             forced = bool(set(writer.track.channels) & self.pending_active_channels)
-            msgs[writer.track.name] = writer.receive_update(
+            writer.receive(
                 block,
                 end_timestamp,
                 should_record[writer] or band_should_record or forced,
                 u.end_frame,
             )
+        if poly := self.poly_writer:
+            # One file holds every track, so it records while any track would
+            poly_before = np.array(poly.counters(), dtype=float)
+            poly.receive(
+                poly.to_block(update.array, levels),
+                end_timestamp,
+                any(should_record.values()) or bool(self.pending_active_channels),
+                u.end_frame,
+            )
         self.pending_active_channels = set()
+        self.retro.append(update.array, end_timestamp, u.end_frame)
+        if self.pending_capture:
+            self.pending_capture = False
+            self._capture()
+        channels = _channel_states(cb, before)
+        if poly:
+            _show_poly_writer(channels, poly, poly_before)
         calibration = self.calibration.update(cb)
         files, file_records = self.file_events.new_files(
-            self.channel_writers, update.array.dtype.itemsize * 8
+            self.file_writers, update.array.dtype.itemsize * 8
         )
         stats = self.buffer.stats.model_copy()
-        stats.max_write_seconds = max(
-            stats.max_write_seconds,
-            *(state.max_write_seconds for state in msgs.values()),
+        stats.max_write_seconds = float(
+            channels.column('max_write_seconds').max(initial=stats.max_write_seconds)
+        )
+        stats.write_queue_blocks = self.disk_writer.queued_jobs
+        stats.write_queue_seconds = self.disk_writer.queued_seconds
+        stats.max_write_queue_seconds = self.disk_writer.max_queued_seconds
+        stats.max_write_latency_seconds = self.disk_writer.max_latency_seconds
+        stats.max_format_write_seconds = self.disk_writer.max_job_seconds
+        stats.max_rollover_seconds = max(
+            (w.max_rollover_seconds for w in self.writers),
+            default=stats.max_rollover_seconds,
+        )
+        stats.max_checkpoint_seconds = max(
+            (w.max_checkpoint_seconds for w in self.writers),
+            default=stats.max_checkpoint_seconds,
         )
         buffer_warnings = self.buffer.warnings(self.source.name, update.timestamp)
+        buffer_warnings.extend(self.retro.take_warnings())
+        buffer_warnings.extend(self.pending_warnings)
+        self.pending_warnings = []
         if update.status:
             if update.status == 'input overflow':
                 buffer_warnings.append(
@@ -578,11 +790,12 @@ class SourceRecorder(Runnables):
             self.pending_config_revisions,
             [],
         )
-        file_end_frames = self.file_events.end_frames(self.channel_writers)
-        file_end_timestamps = self.file_events.end_timestamps(self.channel_writers)
-        self.update_transport.publish(
+        file_end_frames = self.file_events.end_frames(self.writers)
+        file_end_timestamps = self.file_events.end_timestamps(self.writers)
+        files_closed = self._take_files_closed()
+        self._publish(
             SourceUpdate(
-                channels=msgs,
+                channels=channels,
                 files=files,
                 frames=len(update.array),
                 source_name=self.source.key,
@@ -596,6 +809,10 @@ class SourceRecorder(Runnables):
                 calibration=calibration,
                 track_layout=track_layout,
                 config_revisions_applied=config_revisions or None,
+                files_closed=files_closed or None,
+                stream=self.tuner.update(
+                    update.status, self.buffer.block_frames, stats.queued_seconds
+                ),
             )
         )
 
@@ -603,6 +820,154 @@ class SourceRecorder(Runnables):
         if (total := self.times.total_run_time) and self.sample_count >= total:
             self.running = False
 
+    def _take_files_closed(self) -> dict[Path, list[Format]]:
+        writers = list(self.writers)
+        retired = []
+        for old, drained in self.retired_writers:
+            # Checked before taking, so nothing closed after the fence is lost
+            if not drained.is_set():
+                retired.append((old, drained))
+            writers.extend(old)
+        self.retired_writers = retired
+        return {p: w.deferred_formats for w in writers for p in w.take_files_closed()}
+
+    def _capture(self) -> None:
+        if (taken := self.retro.take()) is None:
+            return
+        array, timestamp, start_frame = taken
+        for writer in self.writers:
+            writer.write_capture(array[:, writer.track.slice], timestamp, start_frame)
+
+    def _publish(self, update: SourceUpdate) -> None:
+        if not self.meter_board:
+            self.update_transport.publish(update)
+            return
+
+        # The meters go on the board, so the update only carries events
+        channels = cast(ChannelStates, update.channels)
+        if channels.names != self.meter_totals.names:
+            self.meter_totals = ChannelStates(channels.names)
+            self.meter_generation += 1
+        self.meter_totals += channels
+        self.meter_board.write(
+            self.meter_totals,
+            update.buffer_stats or BufferStats(),
+            self.meter_generation,
+            update.frame_count or 0,
+            update.timestamp or 0.0,
+        )
+
+        update = update._replace(channels=ChannelStates(()))
+        if self.held_update is not None:
+            update = _merge_updates(self.held_update, update)
+        now = monotonic()
+        if _has_events(update) or now - self.last_published >= HEARTBEAT_SECONDS:
+            self.update_transport.publish(update)
+            self.held_update = None
+            self.last_published = now
+        else:
+            self.held_update = update
+
+    def _publish_final(self) -> None:
+        # The last take of each track closes as the disk writer drains, after
+        # the last block was published
+        update = self.held_update
+        if files_closed := self._take_files_closed():
+            if update is None:
+                update = SourceUpdate(ChannelStates(()), [], 0, self.source.key)
+            closed = {**(update.files_closed or {}), **files_closed}
+            update = update._replace(files_closed=closed)
+        if update is not None:
+            self.update_transport.publish(update)
+        self.held_update = None
+
+    def _publish_held(self) -> None:
+        # The parent counts frames from updates, so a held update must not
+        # wait for a block which may never come
+        now = monotonic()
+        due = now - self.last_published >= HEARTBEAT_SECONDS
+        if self.held_update is not None and due:
+            self.update_transport.publish(self.held_update)
+            self.held_update = None
+            self.last_published = now
+
+
+def _has_events(u: SourceUpdate) -> bool:
+    return bool(
+        u.files
+        or u.file_records
+        or u.buffer_warnings
+        or u.files_closed
+        or u.config_revisions_applied
+        or u.calibration is not None
+        or u.track_layout is not None
+        or u.stream is not None
+    )
+
+
+def _channel_states(
+    blocks: Mapping['ChannelWriter', Block], before: np.ndarray
+) -> ChannelStates:
+    """Build one row per track, then subtract the counters from before the block"""
+    writers = list(blocks)
+    rows = [
+        (*w.row(), b.max.max() / b.scale, b.min.min() / b.scale)
+        for w, b in blocks.items()
+    ]
+    values = np.array(rows, dtype=float).reshape(len(rows), len(COLUMNS))
+    values[:, SUMMED] -= before
+    return ChannelStates(
+        [w.track.name for w in writers], values, [w.volume() for w in writers]
+    )
+
+
+def _show_poly_writer(
+    channels: ChannelStates, poly: ChannelWriter, before: np.ndarray
+) -> None:
+    """Count a poly file once, on the first track, and show it on every track"""
+    if channels.names:
+        channels.table[0, SUMMED] += np.array(poly.counters(), dtype=float) - before
+        channels.column('is_active')[:] = poly.active == Active.active
+        channels.column('max_write_seconds')[:] = poly.max_write_seconds
+
+
+def poly_track(tracks: Sequence[Track]) -> Track:
+    """A track over the channels from the first track's to the last track's"""
+    first = min(t.channels[0] for t in tracks)
+    last = max(t.channels[-1] for t in tracks)
+    return Track(tracks[0].source, tuple(range(first, last + 1)))
+
+
+def poly_track_map(poly: Track, tracks: Sequence[Track]) -> dict[str, list[int]]:
+    """Map each track's name to its channels in the poly file, counting from 1"""
+    offset = poly.channels[0] - 1
+    return {t.name: [c - offset for c in t.channels] for t in tracks}
+
+
+def _too_many_channels(writer: ChannelWriter) -> Format | None:
+    channels = len(writer.track.channels)
+    formats = (*writer.formats, *writer.deferred_formats)
+    return next((f for f in formats if channels > max_channels(f)), None)
+
+
+def _contiguous(first: BufferedUpdate, second: BufferedUpdate) -> bool:
+    a, b = first.update.array, second.update.array
+    return (
+        first.end_frame == second.start_frame
+        and not second.update.status
+        and a.dtype == b.dtype
+        and a.shape[1:] == b.shape[1:]
+    )
+
+
+def _join_updates(batch: list[BufferedUpdate]) -> BufferedUpdate:
+    first, *rest = batch
+    if not rest:
+        return first
+    array = np.concatenate([u.update.array for u in batch])
+    update = first.update._replace(array=array)
+    return BufferedUpdate(update, first.start_frame, rest[-1].end_frame)
+
 
 def _merge_updates(first: SourceUpdate, second: SourceUpdate) -> SourceUpdate:
     file_records = {r.path: r for r in first.file_records or []}
@@ -610,7 +975,7 @@ def _merge_updates(first: SourceUpdate, second: SourceUpdate) -> SourceUpdate:
     files = _merge_files(first.files, second.files)
     file_paths = set(files)
     return SourceUpdate(
-        channels=second.channels,
+        channels=_merge_channels(first.channels, second.channels),
         files=files,
         frames=first.frames + second.frames,
         source_name=second.source_name,
@@ -630,9 +995,24 @@ def _merge_updates(first: SourceUpdate, second: SourceUpdate) -> SourceUpdate:
             *(second.config_revisions_applied or []),
         ]
         or None,
+        files_closed={**(first.files_closed or {}), **(second.files_closed or {})}
+        or None,
+        stream=second.stream or first.stream,
     )
 
 
+def _merge_channels(
+    first: Mapping[str, ChannelState], second: Mapping[str, ChannelState]
+) -> Mapping[str, ChannelState]:
+    if (
+        isinstance(first, ChannelStates)
+        and isinstance(second, ChannelStates)
+        and first.names == second.names
+    ):
+        return first + second
+    return second
+
+
 def _merge_files(first: list[Path], second: list[Path]) -> list[Path]:
     return list(dict.fromkeys([*first, *second]))[-MAX_MERGED_FILES:]
 
@@ -0,0 +1,80 @@
+"""
+The messages a source process sends to the parent.
+
+They live here, apart from SourceRecorder, so that source_wire and
+meter_board can use them without importing the recorder.
+"""
+
+from collections.abc import Mapping
+from pathlib import Path
+from typing import NamedTuple
+
+from pydantic import BaseModel
+
+from recs.base.state import ChannelState
+from recs.base.types import Format
+from recs.cfg.device import StreamSettings
+
+
+class BufferStats(BaseModel):
+    queued_blocks: int = 0
+    queued_seconds: float = 0.0
+    max_queued_seconds: float = 0.0
+    dropped_blocks: int = 0
+    dropped_frames: int = 0
+    last_drop_timestamp: float = 0.0
+    max_write_seconds: float = 0.0
+    write_queue_blocks: int = 0
+    write_queue_seconds: float = 0.0
+    max_write_queue_seconds: float = 0.0
+    max_write_latency_seconds: float = 0.0
+    max_rollover_seconds: float = 0.0
+    max_checkpoint_seconds: float = 0.0
+    spilled_blocks: int = 0
+    spilled_seconds: float = 0.0
+    max_spilled_seconds: float = 0.0
+    max_format_write_seconds: dict[str, float] = {}
+    source_update_age_seconds: float = 0.0
+    max_source_update_age_seconds: float = 0.0
+    max_source_update_send_seconds: float = 0.0
+
+
+class SourceUpdate(NamedTuple):
+    channels: Mapping[str, ChannelState]
+    files: list[Path]
+    frames: int
+    source_name: str
+    timestamp: float | None = None
+    buffer_stats: BufferStats | None = None
+    buffer_warnings: list[str] | None = None
+    file_records: list['SourceFile'] | None = None
+    file_end_frames: dict[Path, int] | None = None
+    file_end_timestamps: dict[Path, float] | None = None
+    frame_count: int | None = None
+    calibration: dict[str, float] | None = None
+    track_layout: list[str] | None = None
+    config_revisions_applied: list[int] | None = None
+    files_closed: dict[Path, list[Format]] | None = None
+    stream: StreamSettings | None = None
+
+
+class SourceFailure(NamedTuple):
+    message: str
+    source_name: str
+    exception_type: str | None = None
+    exitcode: int | None = None
+    final_frame_count: int | None = None
+    last_callback_timestamp: float | None = None
+    stop_kind: str | None = None
+
+
+class SourceFile(NamedTuple):
+    path: Path
+    source_name: str
+    track: int
+    channels: int
+    sample_rate: int
+    bit_depth: int
+    start_frame: int | None = None
+    start_timestamp: float | None = None
+    tracks: dict[str, list[int]] | None = None
@@ -0,0 +1,185 @@
+"""
+A compact binary encoding for messages from a source process to the parent.
+
+Each block, a source sends its channel table, frame counts and buffer
+statistics.  These are packed as fixed-layout arrays after a short versioned
+header, so the parent's main loop, which is shared by every device, decodes
+them with a few `np.frombuffer` calls instead of unpickling pydantic models.
+
+The rest of a SourceUpdate - new files, warnings, layout changes and so on -
+is rare, and is pickled after the arrays only when present.  A SourceFailure
+is pickled whole.
+
+The encoding is smaller than a pickle at every track count.  It decodes a
+little more slowly at two tracks, about 40us against 31us, and faster from
+eight tracks on: see scripts/benchmark_source_wire.py.
+"""
+
+import functools
+import itertools
+import pickle
+import struct
+from typing import Any
+
+import numpy as np
+
+from recs.base.errors import RecsError
+from recs.base.state import COLUMNS, ChannelStates
+
+from .source_update import BufferStats, SourceFailure, SourceUpdate
+
+MAGIC = b'RS'
+VERSION = 1
+
+UPDATE = 0
+FAILURE = 1
+
+# Flags for SourceUpdate fields which may be None
+HAS_TIMESTAMP = 1
+HAS_FRAME_COUNT = 2
+HAS_STATS = 4
+
+# magic, version, kind, flags, tracks, formats, volumes, text, rest,
+# frames, frame_count, timestamp
+HEADER = struct.Struct('<2sBBBHHIIIqqd')
+
+# Fields sent in the fixed layout: the rest are pickled
+FIXED = 'channels', 'frames', 'source_name', 'timestamp', 'buffer_stats', 'frame_count'
+
+# These rare fields are sent even when empty, because None means something
+KEEP_EMPTY = 'calibration', 'track_layout'
+
+Message = SourceUpdate | SourceFailure
+
+
+def encode(message: Message) -> bytes:
+    if isinstance(message, SourceFailure):
+        rest = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+        header = HEADER.pack(MAGIC, VERSION, FAILURE, 0, 0, 0, 0, 0, len(rest), 0, 0, 0)
+        return header + rest
+
+    u = message
+    channels = ChannelStates.from_states(u.channels)
+    stats = u.buffer_stats
+    formats = stats.max_format_write_seconds if stats else {}
+    text = '\0'.join((u.source_name, channels.condition, *channels.names, *formats))
+    text_bytes = text.encode()
+
+    volume_counts = np.array([len(v) for v in channels.volumes], dtype='<u4')
+    volumes = np.array([x for v in channels.volumes for x in v], dtype='<f8')
+    stats_values = np.array(
+        [getattr(stats, f) for f in stats_fields()] + list(formats.values())
+        if stats
+        else [],
+        dtype='<f8',
+    )
+    rest = _rest(u)
+    flags = (
+        (u.timestamp is not None and HAS_TIMESTAMP)
+        | (u.frame_count is not None and HAS_FRAME_COUNT)
+        | (stats is not None and HAS_STATS)
+    )
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        UPDATE,
+        flags,
+        len(channels),
+        len(formats),
+        len(volumes),
+        len(text_bytes),
+        len(rest),
+        u.frames,
+        u.frame_count or 0,
+        u.timestamp or 0.0,
+    )
+    return b''.join(
+        (
+            header,
+            text_bytes,
+            channels.table.astype('<f8', copy=False).tobytes(),
+            volume_counts.tobytes(),
+            volumes.tobytes(),
+            stats_values.tobytes(),
+            rest,
+        )
+    )
+
+
+def decode(data: bytes) -> Message:
+    (
+        magic,
+        version,
+        kind,
+        flags,
+        tracks,
+        format_count,
+        volume_count,
+        text_length,
+        rest_length,
+        frames,
+        frame_count,
+        timestamp,
+    ) = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise RecsError(f'Unknown source message: {magic!r} version {version}')
+
+    offset = HEADER.size
+    if kind == FAILURE:
+        return pickle.loads(data[offset : offset + rest_length])
+
+    def read(count: int, dtype: str = '<f8') -> np.ndarray:
+        nonlocal offset
+        array = np.frombuffer(data, dtype, count, offset)
+        offset += array.nbytes
+        return array
+
+    text = data[offset : offset + text_length].decode()
+    offset += text_length
+    source_name, condition, *names = text.split('\0')
+    names, formats = names[:tracks], names[tracks:]
+
+    values = read(tracks * len(COLUMNS)).reshape(tracks, len(COLUMNS)).copy()
+    ends = list(itertools.accumulate(read(tracks, '<u4').tolist()))
+    flat = read(volume_count).tolist()
+    volumes = [flat[i:j] for i, j in zip([0, *ends], ends)]
+
+    stats = None
+    if flags & HAS_STATS:
+        fields = stats_fields()
+        stats_values = read(len(fields) + format_count).tolist()
+        stats_dict: dict[str, Any] = {
+            f: t(v) for (f, t), v in zip(fields.items(), stats_values)
+        }
+        stats_dict['max_format_write_seconds'] = dict(
+            zip(formats, stats_values[len(fields) :])
+        )
+        stats = BufferStats.model_construct(**stats_dict)
+
+    rest = pickle.loads(data[offset : offset + rest_length]) if rest_length else {}
+    return SourceUpdate(
+        channels=ChannelStates(names, values, volumes, condition),
+        files=rest.pop('files', []),
+        frames=frames,
+        source_name=source_name,
+        timestamp=timestamp if flags & HAS_TIMESTAMP else None,
+        buffer_stats=stats,
+        frame_count=frame_count if flags & HAS_FRAME_COUNT else None,
+        **rest,
+    )
+
+
+@functools.cache
+def stats_fields() -> dict[str, type]:
+    """The numeric fields of BufferStats, sent as a fixed-layout array"""
+    fields = BufferStats.model_fields.items()
+    return {k: f.annotation for k, f in fields if f.annotation in (int, float)}
+
+
+def _rest(u: SourceUpdate) -> bytes:
+    rest = {
+        k: v
+        for k, v in u._asdict().items()
+        if k not in FIXED and v is not None and (v or k in KEEP_EMPTY)
+    }
+    return pickle.dumps(rest, pickle.HIGHEST_PROTOCOL) if rest else b''
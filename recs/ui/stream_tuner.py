@@ -0,0 +1,47 @@
+"""
+Raise the block size and latency of an input stream which can't keep up.
+
+Host APIs tend to pick small blocks, which suit a fast interface but wake a
+slow machine too often.  With --tune-stream, an input overflow or an input
+queue that is half full moves a device one step towards larger blocks and
+more latency.  The new values take effect the next time the device's stream
+opens, and are saved in the settings, so later runs start tuned.
+"""
+
+from recs.cfg.cfg import Cfg
+from recs.cfg.device import StreamSettings
+
+OVERFLOW = 'input overflow'
+PRESSURE = 0.5  # The part of --audio-buffer-seconds which counts as pressure
+MAX_BLOCKSIZE = 0x2000
+MAX_LATENCY = 0.5
+
+
+class StreamTuner:
+    def __init__(self, cfg: Cfg, samplerate: int, enabled: bool = True) -> None:
+        self.samplerate = samplerate
+        self.enabled = enabled and cfg.device.tune_stream
+        self.blocksize = cfg.device.blocksize
+        self.latency = cfg.device.latency
+        self.pressure = cfg.recording.audio_buffer_seconds * PRESSURE
+        self.tuned: StreamSettings | None = None
+
+    def update(
+        self, status: str, block_frames: int, queued_seconds: float
+    ) -> StreamSettings | None:
+        """Return new settings the first time the stream falls behind"""
+        if not self.enabled or self.tuned is not None:
+            return None
+        if OVERFLOW not in status and queued_seconds < self.pressure:
+            return None
+
+        blocksize = min(MAX_BLOCKSIZE, 2 * max(self.blocksize, block_frames))
+        latency = min(MAX_LATENCY, 2 * max(self.latency, blocksize / self.samplerate))
+        if blocksize <= self.blocksize and latency <= self.latency:
+            return None  # As high as it goes
+
+        self.tuned = StreamSettings(
+            blocksize=max(blocksize, self.blocksize),
+            latency=max(latency, self.latency),
+        )
+        return self.tuned
@@ -0,0 +1,130 @@
+import shutil
+import subprocess
+import threading
+from collections.abc import Sequence
+from concurrent import futures
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from queue import Empty, SimpleQueue
+
+from recs.base import app_command, times
+from recs.base.types import Format
+from recs.cfg.cfg import Cfg
+
+from . import session_manifest
+
+NICENESS = '19'
+# The idle I/O class only gets the disk when nothing else wants it
+IONICE_CLASS = '3'
+
+
+class Transcoder:
+    """Make the deferred formats of each closed file in the background.
+
+    Each file is transcoded by a `recs transcode` subprocess at the lowest
+    CPU and I/O priority, with at most `transcode_workers` at a time.
+    Finished files come back as manifest records from `take_records`, and
+    failures as warning messages.
+
+    When recording stops, `finish` waits at most `transcode_timeout`.  Files
+    not done by then are stopped and listed in warnings, to be made later
+    with `recs transcode`.
+    """
+
+    stopping: bool = False
+
+    def __init__(self, cfg: Cfg) -> None:
+        self.cfg = cfg
+        self.submitted: set[Path] = set()
+        self.records: SimpleQueue[session_manifest.ManifestFile | str] = SimpleQueue()
+        self.futures: dict[Future[bool], Path] = {}
+        self.processes: set[subprocess.Popen[str]] = set()
+        self.executor = ThreadPoolExecutor(
+            max_workers=cfg.audio.transcode_workers,
+            thread_name_prefix='Transcoder',
+        )
+        self._lock = threading.Lock()
+
+    def submit(self, path: Path, formats: Sequence[Format]) -> None:
+        """Make `formats` from `path`, the formats its writer deferred"""
+        if path not in self.submitted:
+            self.submitted.add(path)
+            future = self.executor.submit(self._transcode, path, list(formats))
+            self.futures[future] = path
+
+    def finish(self) -> None:
+        futures.wait(self.futures, timeout=self.cfg.audio.transcode_timeout)
+        with self._lock:
+            self.stopping = True
+            for process in self.processes:
+                process.kill()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+        for future, path in self.futures.items():
+            if future.cancelled() or not future.result():
+                self.records.put(f'Not transcoded before the timeout: {path}')
+
+    def take_records(self) -> list[session_manifest.ManifestFile | str]:
+        records: list[session_manifest.ManifestFile | str] = []
+        while True:
+            try:
+                records.append(self.records.get_nowait())
+            except Empty:
+                return records
+
+    def _transcode(self, path: Path, formats: list[Format]) -> bool:
+        """Return False if the transcode was stopped before it finished"""
+        formats = [f for f in formats if f != path.suffix.removeprefix('.')]
+        if not formats:
+            return True
+        command = app_command.command('transcode', str(path))
+        for format in formats:
+            command += '--format', format
+        if subtype := self.cfg.audio.subtype:
+            command += '--subtype', subtype
+
+        with self._lock:
+            if self.stopping:
+                return False
+            try:
+                process = subprocess.Popen(
+                    _low_priority() + command,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    start_new_session=True,
+                    text=True,
+                )
+            except OSError as e:
+                self.records.put(f'Cannot transcode {path}: {e}')
+                return True
+            self.processes.add(process)
+        try:
+            stdout, stderr = process.communicate()
+        finally:
+            with self._lock:
+                self.processes.discard(process)
+
+        if process.returncode and self.stopping:
+            return False
+        if process.returncode:
+            self.records.put(stderr.strip() or f'Cannot transcode {path}')
+        timestamp = session_manifest.timestamp_to_json(times.timestamp())
+        for line in stdout.splitlines():
+            self.records.put(
+                session_manifest.ManifestFile(
+                    type='file_transcoded',
+                    timestamp=timestamp,
+                    path=Path(line).as_posix(),
+                    transcoded_from=path.as_posix(),
+                )
+            )
+        return True
+
+
+def _low_priority() -> list[str]:
+    prefix = []
+    if nice := shutil.which('nice'):
+        prefix += nice, '-n', NICENESS
+    if ionice := shutil.which('ionice'):
+        prefix += ionice, '-c', IONICE_CLASS
+    return prefix
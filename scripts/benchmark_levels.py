@@ -0,0 +1,52 @@
+"""Compare per-track level analysis with one source-wide analysis per block.
+
+Run with `python scripts/benchmark_levels.py`: it prints the CPU time per
+channel per PortAudio callback for each way of computing the levels.
+"""
+
+import time
+
+import numpy as np
+
+from recs.audio.block import Block
+from recs.audio.levels import Levels
+
+BLOCK_FRAMES = 256
+CALLBACKS = 2_000
+CHANNEL_COUNTS = 2, 8, 32, 64
+
+
+def per_track(array: np.ndarray, slices: list[slice]) -> None:
+    for s in slices:
+        b = Block(block=array[:, s])
+        b.volume, max(b.max) / b.scale, min(b.min) / b.scale
+
+
+def source_wide(array: np.ndarray, slices: list[slice]) -> None:
+    levels = Levels.analyze(array)
+    for s in slices:
+        b = Block.with_levels(array[:, s], levels.select(s))
+        b.volume, max(b.max) / b.scale, min(b.min) / b.scale
+
+
+def cpu_per_channel(analyze, array: np.ndarray, slices: list[slice]) -> float:
+    start = time.process_time()
+    for _ in range(CALLBACKS):
+        analyze(array, slices)
+    return (time.process_time() - start) / CALLBACKS / array.shape[1]
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    print(f'{BLOCK_FRAMES} frames per callback, microseconds per channel')
+    print(f'{"channels":>8} {"per-track":>10} {"source-wide":>12}')
+    for channels in CHANNEL_COUNTS:
+        array = rng.uniform(-1, 1, (BLOCK_FRAMES, channels)).astype('float32')
+        slices = [slice(i, i + 2) for i in range(0, channels, 2)]
+        before = cpu_per_channel(per_track, array, slices)
+        after = cpu_per_channel(source_wide, array, slices)
+        print(f'{channels:>8} {before * 1e6:>10.2f} {after * 1e6:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
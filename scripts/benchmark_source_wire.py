@@ -0,0 +1,60 @@
+"""Compare pickled SourceUpdates with the binary source wire format.
+
+Run with `python scripts/benchmark_source_wire.py`: it prints the bytes per
+steady-state update and the parent's decode time for each encoding.
+"""
+
+import pickle
+import time
+
+from recs.base.state import ChannelState
+from recs.ui import source_wire
+from recs.ui.source_update import BufferStats, SourceUpdate
+
+UPDATES = 2_000
+TRACK_COUNTS = 2, 8, 32, 64
+
+
+def make_update(tracks: int) -> SourceUpdate:
+    return SourceUpdate(
+        channels={
+            str(i): ChannelState(
+                file_count=1, file_size=4096, is_active=True, volume=[0.25]
+            )
+            for i in range(tracks)
+        },
+        files=[],
+        frames=256,
+        source_name='Mic',
+        timestamp=time.time(),
+        buffer_stats=BufferStats(max_format_write_seconds={'wav': 0.01}),
+        buffer_warnings=[],
+        file_records=[],
+        frame_count=1_000_000,
+    )
+
+
+def decode_seconds(decode, data: bytes) -> float:
+    start = time.perf_counter()
+    for _ in range(UPDATES):
+        decode(data)
+    return (time.perf_counter() - start) / UPDATES
+
+
+def main() -> None:
+    print('Steady-state updates: bytes, and microseconds to decode')
+    print(f'{"tracks":>6} {"pickle":>8} {"wire":>8} {"pickle":>8} {"wire":>8}')
+    for tracks in TRACK_COUNTS:
+        update = make_update(tracks)
+        pickled = pickle.dumps(update, pickle.HIGHEST_PROTOCOL)
+        wire = source_wire.encode(update)
+        before = decode_seconds(pickle.loads, pickled)
+        after = decode_seconds(source_wire.decode, wire)
+        print(
+            f'{tracks:>6} {len(pickled):>8} {len(wire):>8}'
+            f' {before * 1e6:>8.1f} {after * 1e6:>8.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,7 @@ import numpy as np
 import pytest
 
 from recs.audio.block import Block
+from recs.audio.levels import Levels
 
 
 def test_block1():
@@ -67,3 +68,27 @@ def test_rms2():
     print(b, b.asfloat)
     level = 1 / 6**0.5
     assert np.allclose(b.rms, [level, level])
+
+
+def test_slice_is_a_view():
+    array = np.array([[1, 2], [3, 4], [5, 6]], dtype='float32')
+    source = Block(block=array)
+    actual = source[1:]
+
+    assert np.shares_memory(actual.block, array)
+    assert list(actual.max) == [5, 6]
+
+
+def test_with_levels_uses_precomputed_levels():
+    array = np.array([[1, 2], [3, 4]], dtype='float32')
+    levels = Levels(np.array([8.0, 8.0]), np.array([-8.0, -8.0]), 1)
+    b = Block.with_levels(array, levels)
+
+    assert b.levels is levels
+    assert b.volume == 8
+
+
+def test_block_has_no_instance_dict():
+    b = Block(block=np.array(range(3)))
+
+    assert not hasattr(b, '__dict__')
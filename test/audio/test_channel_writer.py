@@ -1,4 +1,6 @@
 import signal
+import sys
+import threading
 from pathlib import Path
 from test import conftest
 
@@ -8,8 +10,10 @@ import soundfile
 import tdir
 from pydantic import BaseModel, ConfigDict
 
+from recs.audio import channel_writer
 from recs.audio.block import Block
 from recs.audio.channel_writer import ChannelWriter
+from recs.audio.disk_writer import DiskWriter
 from recs.base.signals import raise_keyboard_interrupt_on_signal
 from recs.base.types import SDTYPE, Format, SdType, Subtype
 from recs.cfg.cfg import Cfg
@@ -20,6 +24,8 @@ TIMES = {'quiet_before_start': 30, 'quiet_after_end': 40, 'stop_after_quiet': 50
 
 II = [np.array((1, -1, 1, -1), dtype=SDTYPE)]
 OO = [np.array((0, 0, 0, 0), dtype=SDTYPE)]
+ONSET = [np.array((0, 1, -1, 1), dtype=SDTYPE)]
+RELEASE = [np.array((1, -1, 0, 0), dtype=SDTYPE)]
 
 
 class Case(BaseModel):
@@ -30,6 +36,7 @@ class Case(BaseModel):
     format: Format = Format.wav
     longest_file_time: int = 0
     name: str = ''
+    sample_accurate_gate: bool = False
     sdtype: SdType | None = None
     shortest_file_time: int = 1
 
@@ -61,6 +68,17 @@ TEST_CASES = (
     LONGEST_FILE_TIME.model_copy(update={'format': Format.flac}),
     LONGEST_FILE_TIME.model_copy(update={'format': Format.wav}),
     LONGEST_FILE_TIME.model_copy(update={'format': Format.mp3}),
+    Case(
+        name='block gate',
+        arrays=(17 * OO) + ONSET + RELEASE + (51 * OO),
+        result=[[29, 5, 42]],
+    ),
+    Case(
+        name='sample accurate gate',
+        arrays=(17 * OO) + ONSET + RELEASE + (51 * OO),
+        result=[[30, 5, 40]],
+        sample_accurate_gate=True,
+    ),
 )
 
 
@@ -72,6 +90,7 @@ def test_channel_writer(case, mock_devices):
     times = TimeSettings[int](
         longest_file_time=case.longest_file_time,
         shortest_file_time=case.shortest_file_time,
+        sample_accurate_gate=case.sample_accurate_gate,
         **TIMES,
     )
 
@@ -245,7 +264,8 @@ def test_channel_writer_record_everything_keeps_short_file(
 def test_channel_writer_removes_discarded_short_file_from_state(
     mock_devices: None,
 ) -> None:
-    cfg = Cfg(formats=[Format.wav])
+    # Open files at once, so that the short one is written and then discarded
+    cfg = Cfg(formats=[Format.wav], defer_open_bytes=0)
     track = cfg.aliases.to_track('Ext+2')
     times = TimeSettings[int](
         quiet_before_start=0,
@@ -266,6 +286,61 @@ def test_channel_writer_removes_discarded_short_file_from_state(
     assert state.file_count == -1
 
 
+@tdir
+def test_channel_writer_never_opens_a_short_take(mock_devices: None) -> None:
+    cfg = Cfg(formats=[Format.wav])
+    track = cfg.aliases.to_track('Ext+2')
+    times = TimeSettings[int](
+        quiet_before_start=0,
+        quiet_after_end=0,
+        shortest_file_time=10,
+        stop_after_quiet=0,
+    )
+    block = Block(block=II[0])
+
+    with ChannelWriter(cfg, times=times, track=track) as writer:
+        state = writer.receive_update(block, conftest.TIMESTAMP, should_record=True)
+        assert state.is_active
+        state = writer.receive_update(block, conftest.TIMESTAMP, should_record=False)
+
+    assert not state.is_active
+    assert state.file_count == 0
+    assert writer.files_written == []
+    assert not list(Path().glob('**/*.wav'))
+
+
+@tdir
+def test_channel_writer_opens_a_held_take_once_it_is_long_enough(
+    mock_devices: None,
+) -> None:
+    cfg = Cfg(formats=[Format.wav])
+    track = cfg.aliases.to_track('Ext+2')
+    times = TimeSettings[int](
+        quiet_before_start=0,
+        quiet_after_end=0,
+        shortest_file_time=10,
+        stop_after_quiet=50,
+    )
+    block = Block(block=II[0])
+    timestamp = conftest.TIMESTAMP
+
+    with ChannelWriter(cfg, times=times, track=track) as writer:
+        for i in range(3):
+            writer.receive(block, timestamp, True, timeline_frame=4 * (i + 1))
+            assert len(writer.files_written) == (i == 2)
+            timestamp += len(block) / SAMPLERATE
+        (path,) = writer.files_written
+        assert writer.file_start_frames == {path: 0}
+        assert writer.file_start_timestamps == {
+            path: conftest.TIMESTAMP - 4 / SAMPLERATE
+        }
+        assert writer.take_file_ends()[0] == {path: 12}
+
+    with soundfile.SoundFile(path) as fp:
+        assert fp.frames == 12
+        assert np.array_equal(fp.read(dtype=SDTYPE), np.concatenate(3 * II))
+
+
 def test_channel_writer_uses_precomputed_recording_decision(
     monkeypatch: pytest.MonkeyPatch, mock_devices: None
 ) -> None:
@@ -288,7 +363,7 @@ def test_channel_writer_uses_precomputed_recording_decision(
 def test_channel_writer_records_max_write_seconds(
     monkeypatch: pytest.MonkeyPatch, mock_devices: None
 ) -> None:
-    cfg = Cfg(formats=[Format.wav])
+    cfg = Cfg(formats=[Format.wav], write_buffer_seconds=0)
     track = cfg.aliases.to_track('Ext+2')
     times = TimeSettings[int](
         quiet_before_start=0,
@@ -327,13 +402,13 @@ def test_channel_writer_trims_stored_quiet_without_delaying_close(
 
     writer.receive_update(block, conftest.TIMESTAMP, should_record=False)
     writer.receive_update(block, conftest.TIMESTAMP, should_record=False)
-    assert writer._blocks.duration == 4
+    assert len(writer._quiet) == 4
     assert writer.quiet_frames == 8
     assert writer._state().is_active
 
     writer.receive_update(block, conftest.TIMESTAMP, should_record=False)
 
-    assert writer._blocks.duration == 0
+    assert len(writer._quiet) == 0
     assert writer.quiet_frames == 12
     assert not writer._state().is_active
 
@@ -397,3 +472,242 @@ def _on_and_off_segments(it):
                 pb = b
                 pi = i
         yield i + 1 - pi
+
+
+@tdir
+def test_channel_writer_reports_each_file_end_once(mock_devices: None) -> None:
+    cfg = Cfg(formats=[Format.wav])
+    track = cfg.aliases.to_track('Ext+2')
+    times = TimeSettings[int](
+        quiet_before_start=0,
+        quiet_after_end=0,
+        shortest_file_time=0,
+        stop_after_quiet=50,
+    )
+    block = Block(block=II[0])
+
+    with ChannelWriter(cfg, times=times, track=track) as writer:
+        writer.receive(block, conftest.TIMESTAMP, True, timeline_frame=4)
+        (path,) = writer.files_written
+        frames, timestamps = writer.take_file_ends()
+        assert frames == {path: 4}
+        assert list(timestamps) == [path]
+        assert writer.take_file_ends() == ({}, {})
+
+        writer.receive(block, conftest.TIMESTAMP, True, timeline_frame=8)
+        assert writer.take_file_ends()[0] == {path: 8}
+
+    assert writer.take_files_closed() == [path]
+    assert path not in writer.file_start_frames
+
+
+@tdir
+def test_channel_writer_opens_next_file_before_rollover(mock_devices: None) -> None:
+    cfg = Cfg(formats=[Format.wav])
+    track = cfg.aliases.to_track('Ext+2')
+    times = TimeSettings[int](
+        longest_file_time=12,
+        quiet_before_start=0,
+        quiet_after_end=0,
+        shortest_file_time=0,
+        stop_after_quiet=50,
+    )
+    disk_writer = DiskWriter(max_seconds=1)
+    disk_writer.start()
+    writer = ChannelWriter(cfg, times=times, track=track, disk_writer=disk_writer)
+    block = Block(block=II[0])
+    timestamp = conftest.TIMESTAMP
+
+    writer.receive(block, timestamp, True)
+    assert writer._next is not None
+    (prepared,) = writer._next.sfs.result(timeout=5)
+
+    for _ in range(3):
+        timestamp += len(block) / SAMPLERATE
+        writer.receive(block, timestamp, True)
+    writer.stop()
+    disk_writer.stop()
+
+    _, second = writer.files_written
+    assert second == Path(prepared.name)
+    assert writer.max_rollover_seconds > 0
+    with soundfile.SoundFile(second) as fp:
+        assert fp.frames == 8
+        assert fp.tracknumber == '2'
+        assert fp.date.startswith('2023-10-15T16:49:21')
+
+
+@tdir
+def test_channel_writer_waits_for_a_next_file_still_opening(
+    mock_devices: None,
+) -> None:
+    cfg = Cfg(formats=[Format.wav])
+    track = cfg.aliases.to_track('Ext+2')
+    times = TimeSettings[int](
+        longest_file_time=12,
+        quiet_before_start=0,
+        quiet_after_end=0,
+        shortest_file_time=0,
+        stop_after_quiet=50,
+    )
+    disk_writer = DiskWriter(max_seconds=1)
+    disk_writer.start()
+    writer = ChannelWriter(cfg, times=times, track=track, disk_writer=disk_writer)
+    block = Block(block=II[0])
+    timestamp = conftest.TIMESTAMP
+
+    # The disk stalls, so the next file is not open when the rollover comes
+    stalled = threading.Event()
+    disk_writer.submit(stalled.wait, lane=channel_writer.OPEN_LANE)
+    writer.receive(block, timestamp, True)
+    prepared = writer._next
+    assert prepared is not None
+    threading.Timer(0.1, stalled.set).start()
+    for _ in range(3):
+        timestamp += len(block) / SAMPLERATE
+        writer.receive(block, timestamp, True)
+    writer.stop()
+    disk_writer.stop()
+
+    _, second = writer.files_written
+    (sf,) = prepared.sfs.result()
+    assert Path(sf.name) == second
+    with soundfile.SoundFile(second) as fp:
+        assert fp.frames == 8
+
+
+@tdir
+def test_channel_writer_discards_unused_next_file(mock_devices: None) -> None:
+    cfg = Cfg(formats=[Format.wav])
+    track = cfg.aliases.to_track('Ext+2')
+    times = TimeSettings[int](
+        longest_file_time=12,
+        quiet_before_start=0,
+        quiet_after_end=0,
+        shortest_file_time=0,
+        stop_after_quiet=0,
+    )
+    disk_writer = DiskWriter(max_seconds=1)
+    disk_writer.start()
+    writer = ChannelWriter(cfg, times=times, track=track, disk_writer=disk_writer)
+    block = Block(block=II[0])
+
+    writer.receive(block, conftest.TIMESTAMP, True)
+    assert writer._next is not None
+    (prepared,) = writer._next.sfs.result(timeout=5)
+    writer.receive(block, conftest.TIMESTAMP + len(block) / SAMPLERATE, False)
+    disk_writer.stop()
+
+    assert writer._next is None
+    assert not Path(prepared.name).exists()
+    assert len(writer.files_written) == 1
+
+
+@tdir
+def test_channel_writer_gathers_blocks_into_one_write(
+    monkeypatch: pytest.MonkeyPatch, mock_devices: None
+) -> None:
+    cfg = Cfg(formats=[Format.wav])
+    track = cfg.aliases.to_track('Ext+2')
+    times = TimeSettings[int](
+        quiet_before_start=0,
+        quiet_after_end=0,
+        shortest_file_time=0,
+        stop_after_quiet=50,
+    )
+    writes = []
+    write_file = ChannelWriter._write_file
+
+    def _write_file(self, opener, sf, array):
+        writes.append(len(array))
+        write_file(self, opener, sf, array)
+
+    monkeypatch.setattr(ChannelWriter, '_write_file', _write_file)
+    block = Block(block=II[0])
+    timestamp = conftest.TIMESTAMP
+
+    with ChannelWriter(cfg, times=times, track=track) as writer:
+        for _ in range(3):
+            writer.receive(block, timestamp, True)
+            timestamp += len(block) / SAMPLERATE
+        assert writes == []
+
+    assert writes == [12]
+    (path,) = writer.files_written
+    with soundfile.SoundFile(path) as fp:
+        assert fp.frames == 12
+
+
+@tdir
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='Uses fallocate')
+def test_channel_writer_preallocates_and_releases_space(mock_devices: None) -> None:
+    cfg = Cfg(formats=[Format.wav], preallocate=True, page_cache='drop')
+    track = cfg.aliases.to_track('Ext+2')
+    times = TimeSettings[int](
+        longest_file_time=2 * SAMPLERATE,
+        quiet_before_start=0,
+        quiet_after_end=0,
+        shortest_file_time=0,
+        stop_after_quiet=50,
+    )
+    block = Block(block=II[0])
+
+    with ChannelWriter(cfg, times=times, track=track) as writer:
+        writer.receive(block, conftest.TIMESTAMP, True)
+        (path,) = writer.files_written
+        # Capped at longest_file_time
+        assert writer.reserved_bytes < 3 * SAMPLERATE * writer.frame_size
+        assert path.stat().st_blocks * 512 >= writer.reserved_bytes
+
+    with soundfile.SoundFile(path) as fp:
+        assert fp.frames == 4
+    assert path.stat().st_blocks * 512 < 0x10000
+
+
+@tdir
+def test_channel_writer_checkpoints_headers(mock_devices: None) -> None:
+    cfg = Cfg(formats=[Format.wav], header_checkpoint_seconds=0.0001)
+    track = cfg.aliases.to_track('Ext+2')
+    times = TimeSettings[int](
+        quiet_before_start=0,
+        quiet_after_end=0,
+        shortest_file_time=0,
+        stop_after_quiet=50,
+    )
+    block = Block(block=II[0])
+    timestamp = conftest.TIMESTAMP
+
+    with ChannelWriter(cfg, times=times, track=track) as writer:
+        for _ in range(3):
+            writer.receive(block, timestamp, True)
+            timestamp += len(block) / SAMPLERATE
+        writer._flush()
+        (path,) = writer.files_written
+        assert soundfile.info(path).frames == 12
+        assert writer.max_checkpoint_seconds > 0
+
+
+@tdir
+def test_channel_writer_writes_a_capture_to_a_new_file(mock_devices: None) -> None:
+    cfg = Cfg(formats=[Format.wav])
+    track = cfg.aliases.to_track('Ext+2')
+    array = np.arange(100, dtype='int16').reshape(100, 1)
+
+    with ChannelWriter(cfg, times=TimeSettings[int](**TIMES), track=track) as writer:
+        writer.write_capture(array, conftest.TIMESTAMP, start_frame=12)
+
+    (path,) = writer.files_written
+    assert writer.file_start_frames[path] == 12
+    assert writer.file_end_frames[path] == 112
+    assert writer.files_closed == [path]
+    assert np.array_equal(soundfile.read(path, dtype='int16')[0], array[:, 0])
+
+
+def test_channel_writer_defers_only_its_own_formats(mock_devices: None) -> None:
+    cfg = Cfg(defer_transcoding=True, formats=[Format.flac, Format.wav, Format.mp3])
+    track = cfg.aliases.to_track('Ext+2')
+
+    writer = ChannelWriter(cfg, times=TimeSettings[int](**TIMES), track=track)
+
+    assert writer.formats == [Format.wav]
+    assert writer.deferred_formats == [Format.flac, Format.mp3]
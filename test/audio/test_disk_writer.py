@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+from recs.audio.disk_writer import DiskWriter
+
+
+def test_disk_writer_runs_jobs_in_order():
+    writer = DiskWriter(max_seconds=1)
+    results: list[int] = []
+    writer.start()
+
+    for i in range(100):
+        writer.submit(lambda i=i: results.append(i), seconds=0.01)
+    writer.stop()
+
+    assert results == list(range(100))
+    assert writer.queued_jobs == 0
+    assert writer.queued_seconds == pytest.approx(0)
+
+
+def test_disk_writer_runs_inline_when_not_started():
+    writer = DiskWriter(max_seconds=1)
+    results: list[str] = []
+
+    writer.submit(lambda: results.append(threading.current_thread().name))
+
+    assert results == [threading.current_thread().name]
+
+
+def test_disk_writer_waits_when_queue_is_full():
+    writer = DiskWriter(max_seconds=0.5)
+    release = threading.Event()
+    results: list[int] = []
+    writer.start()
+
+    writer.submit(release.wait, seconds=0.5)
+    submitted = threading.Event()
+
+    def submit() -> None:
+        writer.submit(lambda: results.append(1), seconds=0.25)
+        submitted.set()
+
+    thread = threading.Thread(target=submit)
+    thread.start()
+    assert not submitted.wait(0.05)
+
+    release.set()
+    thread.join()
+    writer.stop()
+
+    assert results == [1]
+    assert writer.max_queued_seconds == pytest.approx(0.5)
+    assert writer.max_latency_seconds > 0
+
+
+def test_disk_writer_bounds_seconds_of_the_source_not_of_each_track():
+    writer = DiskWriter(max_seconds=0.5, tracks=64)
+    release = threading.Event()
+    writer.start()
+
+    # One block of 0.25 seconds, written by each of 64 tracks
+    writer.submit(release.wait, seconds=0.25)
+    submitted = threading.Event()
+
+    def submit() -> None:
+        for _ in range(63):
+            writer.submit(lambda: None, seconds=0.25)
+        submitted.set()
+
+    thread = threading.Thread(target=submit)
+    thread.start()
+    assert submitted.wait(1)
+    assert writer.queued_seconds == pytest.approx(0.25)
+
+    release.set()
+    thread.join()
+    writer.stop()
+    assert writer.max_queued_seconds == pytest.approx(0.25)
+
+
+def test_disk_writer_raises_job_errors():
+    writer = DiskWriter(max_seconds=1)
+    writer.start()
+
+    def fail() -> None:
+        raise OSError('disk full')
+
+    writer.submit(fail)
+    with pytest.raises(OSError, match='disk full'):
+        writer.flush()
+    writer.stop()
+
+
+def test_disk_writer_lanes_run_in_parallel():
+    writer = DiskWriter(max_seconds=1)
+    release = threading.Event()
+    results: list[str] = []
+    writer.start()
+
+    writer.submit(release.wait, lane='mp3')
+    writer.submit(lambda: results.append('wav'), lane='wav')
+    writer.after(lambda: results.append('after'))
+    writer.submit(lambda: results.append('flac'), lane='flac')
+
+    while len(results) < 2:
+        time.sleep(0.001)
+    assert sorted(results) == ['flac', 'wav']
+
+    release.set()
+    writer.stop()
+
+    assert results[2:] == ['after']
+    assert set(writer.max_job_seconds) == {'flac', 'mp3', 'wav'}
@@ -1,11 +1,13 @@
 import os
 from test.cfg.test_metadata import METADATA, WAV_FILE, write_metadata
 
+import numpy as np
 import pytest
 import tdir
 
+from recs.audio.file_opener import FileOpener
 from recs.audio.header_size import header_size
-from recs.base.types import Format
+from recs.base.types import Format, Subtype
 
 TCS = {'title': 'Title', 'copyright': 'Copyright', 'software': 'Software'}
 
@@ -65,3 +67,25 @@ def test_header_size(filename, metadata, size, channels):
 
     if filename.endswith('wav'):
         assert size == header_size(metadata, Format.wav), str(metadata)
+
+
+@pytest.mark.parametrize('metadata', ({}, {'title': 'Tit'}, TCS))
+@pytest.mark.parametrize(
+    'format, rf64_continuation',
+    ((Format.wav, True), (Format.rf64, False), (Format.rf64, True)),
+)
+@tdir
+def test_rf64_header_size(metadata, format, rf64_continuation):
+    opener = FileOpener(
+        format=format,
+        channels=2,
+        samplerate=SAMPLERATE,
+        subtype=Subtype.pcm_32,
+        rf64_continuation=rf64_continuation,
+    )
+    with opener.open('header', metadata) as fp:
+        fp.write(np.zeros((SAMPLERATE, 2), 'int32'))
+        name = fp.name
+
+    actual_size = os.path.getsize(name) - SAMPLERATE * 4 * 2
+    assert actual_size == header_size(metadata, format, rf64_continuation)
@@ -0,0 +1,30 @@
+import numpy as np
+
+from recs.audio.block import Block
+from recs.audio.levels import Levels
+
+
+def test_levels_match_per_track_blocks():
+    array = np.array([[1, -2, 3], [-4, 5, -6], [7, -8, 9]], dtype='int16')
+    levels = Levels.analyze(array)
+
+    for index in (slice(0, 1), slice(1, 3)):
+        expected = Block(block=array[:, index])
+        actual = Block.with_levels(array[:, index], levels.select(index))
+        assert np.array_equal(actual.max, expected.max)
+        assert np.array_equal(actual.min, expected.min)
+        assert np.allclose(actual.amplitude, expected.amplitude)
+        assert actual.volume == expected.volume
+
+
+def test_levels_amplitude_does_not_overflow():
+    array = np.array([[0x7FFF], [-0x8000]], dtype='int16')
+
+    assert np.allclose(Levels.analyze(array).amplitude, [0xFFFF / 0x10000])
+
+
+def test_levels_float_scale():
+    levels = Levels.analyze(np.array([[0.5, 0.25], [-0.5, 0.0]], dtype='float32'))
+
+    assert levels.scale == 1
+    assert np.allclose(levels.amplitude, [0.5, 0.125])
@@ -2,6 +2,7 @@ import os
 from test.audio.test_channel_writer import TIMES
 
 import numpy as np
+import soundfile
 import tdir
 
 from recs.audio import channel_writer
@@ -66,6 +67,32 @@ def test_one_long_file(mock_input_streams, monkeypatch):
     assert 0 <= diff <= 0x10000
 
 
+@tdir
+def test_rf64_continuation_keeps_one_file(mock_devices, monkeypatch):
+    monkeypatch.setattr(channel_writer, 'MAX_WAV_SIZE', MAX_WAV_SIZE)
+    cfg = Cfg(
+        formats=[Format.wav],
+        metadata=[],
+        rf64_continuation=True,
+        sdtype=SdType.float32,
+    )
+    block = Block(block=np.full((MAX_WAV_SIZE // 16, 2), 0.5, 'float32'))
+    track = cfg.aliases.to_track('Ext + 1-2')
+    times = TimeSettings[int](**TIMES)
+
+    with channel_writer.ChannelWriter(cfg=cfg, times=times, track=track) as writer:
+        assert writer.largest_file_size == 0
+        for i in range(3):
+            writer._receive_block(block, i * len(block) / SAMPLERATE, True)
+
+    (file,) = writer.files_written
+    assert file.suffix == '.wav'
+    assert os.path.getsize(file) > MAX_WAV_SIZE
+    info = soundfile.info(file)
+    assert info.format == 'WAVEX'
+    assert info.frames == 3 * len(block)
+
+
 @tdir
 def test_file_header(mock_devices):
     fo = FileOpener(format=Format.wav)
@@ -0,0 +1,86 @@
+import numpy as np
+
+from recs.audio import retro_capture
+from recs.audio.retro_capture import RetroCapture
+from recs.base import memory
+
+
+def _block(start, frames=4):
+    return np.arange(start, start + frames, dtype='int16').reshape(frames, 1)
+
+
+def test_retro_capture_keeps_the_last_frames(monkeypatch):
+    monkeypatch.setattr(memory, 'available_bytes', lambda: None)
+    retro = RetroCapture(seconds=1, samplerate=6, channels=1, reserve_bytes=0)
+    assert retro.take() is None
+
+    for i in range(3):
+        retro.append(_block(4 * i), end_timestamp=10 + i, end_frame=4 * (i + 1))
+
+    array, timestamp, start_frame = retro.take()
+    assert array[:, 0].tolist() == list(range(6, 12))
+    assert timestamp == 11
+    assert start_frame == 6
+    assert retro.take_warnings() == []
+
+
+def test_retro_capture_shrinks_to_fit_in_memory(monkeypatch):
+    monkeypatch.setattr(memory, 'available_bytes', lambda: 1000 + 4 * 10)
+    retro = RetroCapture(seconds=100, samplerate=1, channels=2, reserve_bytes=1000)
+
+    assert retro.frames == 10
+    (warning,) = retro.take_warnings()
+    assert warning.startswith('Only 10 of 100 seconds')
+    assert retro.take_warnings() == []
+
+
+def test_retro_capture_takes_long_appends_without_growing(monkeypatch):
+    monkeypatch.setattr(memory, 'available_bytes', lambda: None)
+    retro = RetroCapture(
+        seconds=10, samplerate=1, channels=1, reserve_bytes=0, max_append_seconds=4
+    )
+    retro.append(_block(0), end_timestamp=4, end_frame=4)
+    ring = retro.ring._array
+
+    # A catch-up batch, longer than the headroom and the whole capture
+    retro.append(_block(4, frames=13), end_timestamp=17, end_frame=17)
+
+    assert retro.ring._array is ring
+    array, timestamp, start_frame = retro.take()
+    assert array[:, 0].tolist() == list(range(7, 17))
+    assert timestamp == 7
+    assert start_frame == 7
+
+
+def test_retro_capture_leaves_room_for_the_headroom(monkeypatch):
+    monkeypatch.setattr(memory, 'available_bytes', lambda: 1000 + 4 * 10)
+    retro = RetroCapture(
+        seconds=100,
+        samplerate=1,
+        channels=2,
+        reserve_bytes=1000,
+        max_append_seconds=4,
+    )
+
+    assert retro.frames == 6
+    (warning,) = retro.take_warnings()
+    assert warning.startswith('Only 6 of 100 seconds')
+
+
+def test_retro_capture_does_nothing_when_off():
+    retro = RetroCapture(seconds=0, samplerate=48_000, channels=2, reserve_bytes=0)
+    retro.append(_block(0), end_timestamp=1, end_frame=4)
+    assert retro.take() is None
+
+
+def test_to_int16():
+    floats = np.array([-2.0, -1.0, 0.0, 0.5, 1.0], dtype='float32')
+    assert retro_capture.to_int16(floats).tolist() == [
+        -0x7FFF,
+        -0x7FFF,
+        0,
+        0x3FFF,
+        0x7FFF,
+    ]
+    ints = np.array([0x10000, -0x10000], dtype='int32')
+    assert retro_capture.to_int16(ints).tolist() == [1, -1]
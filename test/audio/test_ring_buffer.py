@@ -0,0 +1,95 @@
+import numpy as np
+
+from recs.audio.ring_buffer import RingBuffer
+
+
+def _block(start, frames=4, channels=2):
+    return np.arange(start, start + frames * channels, dtype='float32').reshape(
+        frames, channels
+    )
+
+
+def _contents(ring):
+    views = ring.views()
+    assert len(views) <= 2
+    return np.concatenate(views) if views else np.empty((0, 2))
+
+
+def test_ring_buffer_keeps_newest_blocks():
+    ring = RingBuffer(8)
+    blocks = [_block(8 * i) for i in range(5)]
+    for b in blocks:
+        ring.append(b)
+        ring.clip(8, from_start=True)
+
+    assert len(ring) == 8
+    assert np.array_equal(_contents(ring), np.concatenate(blocks[-2:]))
+
+
+def test_ring_buffer_wraps_into_two_views():
+    ring = RingBuffer(4)
+    blocks = [_block(8 * i, frames=3) for i in range(4)]
+    for b in blocks:
+        ring.append(b)
+        ring.clip(6, from_start=True)
+
+    assert len(ring.views()) == 2
+    assert np.array_equal(_contents(ring), np.concatenate(blocks[-2:]))
+
+
+def test_ring_buffer_clips_from_end():
+    ring = RingBuffer(16)
+    blocks = [_block(8 * i) for i in range(3)]
+    for b in blocks:
+        ring.append(b)
+    ring.clip(5, from_start=False)
+
+    assert len(ring) == 4
+    assert np.array_equal(_contents(ring), blocks[0])
+
+
+def test_ring_buffer_does_not_reallocate_in_steady_state():
+    ring = RingBuffer(8)
+    ring.append(_block(0))
+    array = ring._array
+    for i in range(100):
+        ring.append(_block(i))
+        ring.clip(8, from_start=True)
+
+    assert ring._array is array
+
+
+def test_ring_buffer_grows_and_keeps_contents():
+    ring = RingBuffer(2)
+    blocks = [_block(8 * i) for i in range(4)]
+    for b in blocks:
+        ring.append(b)
+
+    assert np.array_equal(_contents(ring), np.concatenate(blocks))
+
+
+def test_ring_buffer_clear():
+    ring = RingBuffer(8)
+    ring.append(_block(0))
+    ring.clear()
+
+    assert not ring
+    assert ring.views() == ()
+
+
+def test_ring_buffer_exact_clip_cuts_blocks():
+    ring = RingBuffer(8)
+    blocks = [_block(8 * i) for i in range(3)]
+    for b in blocks:
+        ring.append(b)
+
+    ring.clip(6, from_start=True, exact=True)
+    assert np.array_equal(_contents(ring), np.concatenate(blocks)[-6:])
+
+    ring.clip(3, from_start=False, exact=True)
+    assert np.array_equal(_contents(ring), np.concatenate(blocks)[-6:-3])
+
+    ring.append(blocks[0])
+    assert np.array_equal(
+        _contents(ring), np.concatenate((blocks[1][2:], blocks[2][:1], blocks[0]))
+    )
@@ -0,0 +1,33 @@
+import numpy as np
+
+from recs.audio.slab_pool import SlabPool
+
+
+def test_slab_pool_copies_and_recycles():
+    pool = SlabPool(2, (4, 2), np.dtype('int16'))
+    array = np.arange(6, dtype='int16').reshape(3, 2)
+
+    result = pool.put(array)
+    assert result is not None
+    index, slab = result
+    assert np.array_equal(slab, array)
+    assert slab.base is pool.slabs
+    assert pool.free == 1
+
+    assert pool.put(array) is not None
+    assert pool.put(array) is None
+
+    pool.release(index)
+    assert pool.free == 1
+    reused = pool.put(array)
+    assert reused is not None
+    assert reused[0] == index
+
+
+def test_slab_pool_fits():
+    pool = SlabPool(1, (4, 2), np.dtype('float32'))
+
+    assert pool.fits(np.zeros((4, 2), dtype='float32'))
+    assert not pool.fits(np.zeros((5, 2), dtype='float32'))
+    assert not pool.fits(np.zeros((4, 3), dtype='float32'))
+    assert not pool.fits(np.zeros((4, 2), dtype='int16'))
@@ -0,0 +1,114 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from recs.audio.spill_file import SpillFile, SpillWriter
+
+
+def _block(start, frames=4, channels=2):
+    return np.arange(start, start + frames * channels, dtype='float32').reshape(
+        frames, channels
+    )
+
+
+def test_spill_file_returns_blocks_in_order(tmp_path):
+    spill = SpillFile(tmp_path, capacity=1000)
+    assert spill.get() is None
+
+    for i in range(3):
+        assert spill.put(_block(8 * i), i)
+    assert len(spill) == 3
+
+    for i in range(3):
+        array, info = spill.get()
+        assert np.array_equal(array, _block(8 * i))
+        assert info == i
+    assert spill.get() is None
+    spill.close()
+
+
+def test_spill_file_wraps_around_once_blocks_are_read(tmp_path):
+    block_bytes = _block(0).nbytes
+    spill = SpillFile(tmp_path, capacity=3 * block_bytes)
+
+    for i in range(3):
+        assert spill.put(_block(8 * i), i)
+    assert not spill.put(_block(24), 3)
+
+    spill.get()
+    assert spill.put(_block(24), 3)
+    assert not spill.put(_block(32), 4)
+
+    assert [spill.get()[1] for _ in range(3)] == [1, 2, 3]
+    assert spill.get() is None
+    spill.close()
+
+
+def test_spill_file_is_deleted_when_closed(tmp_path):
+    spill = SpillFile(tmp_path, capacity=1000)
+    spill.close()
+    assert not list(tmp_path.iterdir())
+
+
+def test_spill_file_reports_a_missing_directory(tmp_path):
+    with pytest.raises(OSError):
+        SpillFile(tmp_path / 'missing', capacity=1000)
+
+
+def _eventually(check):
+    deadline = time.monotonic() + 1
+    while not check():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_spill_writer_writes_staged_blocks_on_its_own_thread(tmp_path):
+    writer = SpillWriter(SpillFile(tmp_path, capacity=1000), stage_frames=8)
+
+    for i in range(3):
+        assert writer.put(_block(8 * i), i)
+        _eventually(lambda i=i: len(writer.spill) == i + 1)
+    assert len(writer) == 3
+    assert writer.pool.free == writer.pool.slabs.shape[0]
+
+    for i in range(3):
+        array, info = writer.get()
+        assert np.array_equal(array, _block(8 * i))
+        assert info == i
+    assert writer.get() is None
+    writer.close()
+    assert not list(tmp_path.iterdir())
+
+
+def test_spill_writer_reads_from_the_stage_when_the_file_is_full(tmp_path):
+    block_bytes = _block(0).nbytes
+    writer = SpillWriter(SpillFile(tmp_path, capacity=block_bytes), stage_frames=8)
+
+    assert writer.put(_block(0), 0)
+    _eventually(lambda: len(writer.spill) == 1)
+
+    # The file is full, so the next blocks wait in the stage's two slabs
+    assert writer.put(_block(8), 1)
+    assert writer.put(_block(16), 2)
+    assert not writer.put(_block(24), 3)
+
+    assert [writer.get()[1] for _ in range(3)] == [0, 1, 2]
+    assert writer.get() is None
+    writer.close()
+
+
+def test_spill_writer_put_never_waits_for_the_disk(tmp_path):
+    writer = SpillWriter(SpillFile(tmp_path, capacity=1000), stage_frames=8)
+    stalled = threading.Event()
+    spill_put = writer.spill.put
+    writer.spill.put = lambda *args: stalled.wait() and spill_put(*args)
+
+    assert writer.put(_block(0), 0)
+    assert writer.put(_block(8), 1)
+    assert len(writer) == 2
+
+    stalled.set()
+    assert [writer.get()[1] for _ in range(2)] == [0, 1]
+    writer.close()
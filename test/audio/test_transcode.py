@@ -0,0 +1,26 @@
+import numpy as np
+import soundfile
+
+from recs.audio import transcode
+from recs.base.types import Format
+
+
+def test_split_formats():
+    assert transcode.split_formats([Format.flac, Format.wav, Format.mp3]) == (
+        Format.wav,
+        [Format.flac, Format.mp3],
+    )
+    assert transcode.split_formats([Format.flac]) == (Format.wav, [Format.flac])
+
+
+def test_transcode_writes_each_format(tmp_path):
+    path = tmp_path / 'take.wav'
+    data = np.linspace(-0.5, 0.5, 2_000, dtype='float32').reshape(1_000, 2)
+    soundfile.write(path, data, 48_000, subtype='FLOAT')
+
+    assert transcode.main([str(path), '--format', 'flac']) == 0
+
+    flac, samplerate = soundfile.read(tmp_path / 'take.flac', dtype='float32')
+    assert samplerate == 48_000
+    assert np.allclose(flac, data, atol=1e-4)
+    assert transcode.main([str(path), '--format', 'flac']) == 1
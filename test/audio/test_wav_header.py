@@ -0,0 +1,49 @@
+import shutil
+
+import numpy as np
+import pytest
+import soundfile
+import tdir
+
+from recs.audio import wav_header
+from recs.audio.file_opener import FileOpener
+from recs.base.types import Format
+
+OPENERS = (
+    FileOpener(channels=2, format=Format.wav),
+    FileOpener(channels=2, format=Format.wav, subtype='pcm_24'),
+    FileOpener(channels=2, format=Format.wav, rf64_continuation=True),
+    FileOpener(channels=2, format=Format.rf64),
+)
+
+
+@tdir
+@pytest.mark.parametrize('opener', OPENERS)
+def test_checkpoint_makes_an_open_file_readable(opener: FileOpener) -> None:
+    array = np.linspace(-1, 1, 2000, dtype='float32').reshape(1000, 2)
+    fp = opener.open('file', {'title': 'hello'})
+    try:
+        fp.write(array)
+        assert wav_header.checkpoint(fp.name)
+        # Copy the file as a crash would leave it
+        shutil.copy(fp.name, 'crashed')
+    finally:
+        fp.close()
+
+    with soundfile.SoundFile('crashed') as crashed:
+        assert crashed.frames == 1000
+        assert crashed.title == 'hello'
+        assert np.allclose(crashed.read(dtype='float32'), array, atol=1e-6)
+
+
+def test_read_layout_rejects_other_files() -> None:
+    assert wav_header.read_layout(b'') is None
+    assert wav_header.read_layout(b'fLaC' + bytes(100)) is None
+    # A header which is cut off before its data chunk
+    assert wav_header.read_layout(b'RIFF\0\0\0\0WAVEfmt \x10\0\0\0') is None
+
+
+def test_size_fields_mark_a_large_wav_as_unknown() -> None:
+    layout = wav_header.Layout(rf64=False, block_align=4, data=44)
+    fields = dict(wav_header.size_fields(layout, 0x1_2000_0000))
+    assert fields == {4: b'\xff\xff\xff\xff', 40: b'\xff\xff\xff\xff'}
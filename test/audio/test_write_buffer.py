@@ -0,0 +1,46 @@
+import numpy as np
+
+from recs.audio.write_buffer import WriteBuffer
+
+
+def _block(start, frames=4, channels=2):
+    return np.arange(start, start + frames * channels, dtype='float32').reshape(
+        frames, channels
+    )
+
+
+def test_write_buffer_gathers_blocks_until_full():
+    buffer = WriteBuffer(8)
+    first, second = _block(0), _block(8)
+
+    assert buffer.append(first) == []
+    first[:] = -1  # The caller may reuse its block
+    assert len(buffer) == 4
+
+    (ready,) = buffer.append(second)
+    assert np.array_equal(ready, np.concatenate((_block(0), second)))
+    assert len(buffer) == 0
+    assert buffer.take() == []
+
+
+def test_write_buffer_writes_ahead_of_a_block_which_would_not_fit():
+    buffer = WriteBuffer(8)
+    buffer.append(_block(0, frames=6))
+
+    (ready,) = buffer.append(_block(12))
+    assert len(ready) == 6
+    assert len(buffer) == 4
+
+    (rest,) = buffer.take()
+    assert np.array_equal(rest, _block(12))
+
+
+def test_write_buffer_copies_large_blocks_through():
+    buffer = WriteBuffer(4)
+    buffer.append(_block(0, frames=2))
+    large = _block(4, frames=6)
+
+    small, ready = buffer.append(large)
+    assert np.array_equal(small, _block(0, frames=2))
+    assert np.array_equal(ready, large)
+    assert ready is not large
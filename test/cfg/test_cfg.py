@@ -67,6 +67,7 @@ def test_cfg_reports_mutable_attributes(mock_devices: None) -> None:
         'recording.quiet_after_end',
         'recording.quiet_before_start',
         'recording.record_everything',
+        'recording.sample_accurate_gate',
         'recording.shortest_file_time',
         'recording.stop_after_quiet',
         'recording.total_run_time',
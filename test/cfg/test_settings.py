@@ -6,6 +6,7 @@ import pytest
 from recs.base.errors import RecsError
 from recs.cfg import settings
 from recs.cfg.cfg import Cfg
+from recs.cfg.device import StreamSettings
 
 
 def test_settings_are_disabled_by_default(monkeypatch: pytest.MonkeyPatch) -> None:
@@ -34,10 +35,13 @@ def test_saved_settings_round_trip(
         ]
     }
 
-    settings.save(cfg, names, tracks)
+    streams = {'Ext': StreamSettings(blocksize=1024, latency=0.05)}
+
+    settings.save(cfg, names, tracks, streams)
     loaded = settings.load(Cfg(save_settings=True))
 
     assert loaded.cfg.recording.noise_floor == 42
+    assert loaded.streams == streams
     assert loaded.track_names == names
     assert loaded.tracks == tracks
     assert set(json.loads(path.read_text())['attributes']) == cfg.mutable_attributes
@@ -0,0 +1,81 @@
+import numpy as np
+
+from recs.audio.block import Block
+from recs.misc.counter import MovingBlock, RunningMax, RunningSum
+
+
+def test_running_sum_matches_window():
+    rng = np.random.default_rng(0)
+    arrays = rng.uniform(size=(1_000, 3))
+    running = RunningSum(7)
+
+    for i, a in enumerate(arrays):
+        running.append(a)
+        window = arrays[max(0, i - 6) : i + 1]
+        assert np.allclose(running.mean(), window.mean(0))
+
+
+def test_running_max_matches_window():
+    rng = np.random.default_rng(1)
+    arrays = rng.uniform(size=(500, 2))
+    running = RunningMax(5)
+
+    for i, a in enumerate(arrays):
+        running.append(a)
+        assert np.array_equal(running.max, arrays[max(0, i - 4) : i + 1].max(0))
+        assert len(running) == min(i + 1, 5)
+
+
+def test_moving_block():
+    meter = MovingBlock(8, rms=True, peak=True)
+    assert list(meter.mean()) == [0]
+
+    meter.accumulate(Block(block=np.array([[0.5, -0.25], [-0.5, 0.25]])))
+    meter.accumulate(Block(block=np.array([[0.0, -1.0], [0.0, 0.0]])))
+
+    assert np.allclose(meter.mean(), [0.25, 0.375])
+    assert np.allclose(meter.peak(), [0.5, 1.0])
+    assert np.allclose(meter.rms(), [np.sqrt(0.125), np.sqrt(0.5625 / 2)])
+
+
+def test_running_sum_weights_arrays():
+    running = RunningSum(4)
+    running.append(np.array([1.0]), 1)
+    running.append(np.array([2.0]), 1)
+    running.append(np.array([4.0]), 2)
+    assert np.allclose(running.mean(), [11 / 4])
+
+    # Longer than the window, so it is all that remains
+    running.append(np.array([8.0]), 6)
+    assert len(running) == 1
+    assert np.allclose(running.mean(), [8])
+
+
+def test_moving_block_weights_joined_batches_by_frames():
+    meter = MovingBlock(8, rms=True, peak=True)
+    for _ in range(4):
+        meter.accumulate(Block(block=np.array([[0.5], [-0.5]])))
+    assert np.allclose(meter.peak(), [0.5])
+
+    # A batch of four blocks, joined while catching up, fills the window
+    meter.accumulate(Block(block=np.tile([[0.25], [-0.25]], (4, 1))))
+
+    assert np.allclose(meter.mean(), [0.25])
+    assert np.allclose(meter.peak(), [0.25])
+    assert np.allclose(meter.rms(), [0.25])
+
+
+def test_moving_block_only_holds_a_peak_if_asked():
+    meter = MovingBlock(8)
+    meter.accumulate(Block(block=np.array([[0.5, -0.25], [-0.5, 0.25]])))
+
+    assert meter._peak is None
+    assert list(meter.peak()) == [0]
+
+
+def test_moving_block_short_window():
+    meter = MovingBlock(1)
+    meter.accumulate(Block(block=np.ones((4, 1))))
+
+    assert list(meter.mean()) == [0]
+    assert list(meter.rms()) == [0]
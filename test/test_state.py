@@ -1,4 +1,4 @@
-from recs.base.state import ChannelState
+from recs.base.state import ChannelState, ChannelStates
 
 TIMESTAMP = 1_700_000_000
 
@@ -18,3 +18,35 @@ def test_message():
     c = cm(11, 17, True, 0.5, -0.6, 12.5)
     assert a + b == c
     assert c - a == b.model_copy(update={'max_amp': 0.5})
+
+
+def test_channel_states():
+    a = cm(1, 2, False, 0.5, -0.4, 10)
+    b = cm(10, 15, True, 0.4, -0.6, 2.5, volume=[0.25])
+    table = ChannelStates.from_states({'1': a, '2-3': b})
+
+    assert list(table) == ['1', '2-3']
+    assert table['1'] == a
+    assert table['2-3'] == b
+    assert table.active() == {'1': False, '2-3': True}
+
+    total = table + table
+    assert total['1'] == a + a
+    assert total['2-3'] == b + b
+    assert table['1'] == a
+
+    total += ChannelStates.from_states({'2-3': a})
+    assert total['2-3'] == b + b + a
+    assert total['1'] == a + a
+
+    total.deactivate()
+    assert total.active() == {'1': False, '2-3': False}
+    assert total['2-3'].volume == []
+
+
+def test_channel_states_is_a_mapping():
+    a = cm(1, 2, False, 0.5, -0.4, 10)
+    table = ChannelStates.from_states({'1': a})
+
+    assert list(table.values()) == [a]
+    assert dict(table.items()) == {'1': a}
@@ -5,6 +5,7 @@ from recs.base.state import ChannelState
 from recs.cfg.cfg import Cfg
 from recs.cfg.device import InputDevice
 from recs.cfg.track import Track
+from recs.ui import source_wire
 from recs.ui.device_lifecycle import DeviceLifecycle
 from recs.ui.full_state import FullState
 from recs.ui.source_recorder import SourceUpdate
@@ -17,8 +18,8 @@ class DrainingConnection:
     def poll(self) -> bool:
         return bool(self.messages)
 
-    def recv(self) -> SourceUpdate:
-        return self.messages.pop(0)
+    def recv_bytes(self) -> bytes:
+        return source_wire.encode(self.messages.pop(0))
 
 
 class ReapedSource:
@@ -62,6 +63,9 @@ class ReapedSource:
     def take_updates(self) -> list[SourceUpdate]:
         return []
 
+    def read_meters(self) -> None:
+        return None
+
 
 class FakePoller:
     def poll(self) -> None:
@@ -87,6 +91,7 @@ def test_reap_drains_all_pending_source_messages() -> None:
         state,
         Path('session'),
         saved_tracks={},
+        saved_streams={},
         track_names={},
         initial_tracks=[(source, tracks)],
         warning=lambda message: None,
@@ -94,6 +99,7 @@ def test_reap_drains_all_pending_source_messages() -> None:
         file_update=lambda update, source: updates.append(update),
         calibration_update=lambda source, values: None,
         buffer_update=lambda source, stats: None,
+        stream_update=lambda source, stream: None,
         source_process=ReapedSource,
         device_poller=lambda interval: FakePoller(),
     )
@@ -1,11 +1,10 @@
-from test.conftest import DEVICES_FILE
-
-from recs.base.state import ChannelState
+from recs.base.state import ChannelState, ChannelStates
 from recs.base.types import Active
 from recs.cfg.cfg import Cfg
 from recs.cfg.device import InputDevice
 from recs.cfg.track import Track
 from recs.ui.full_state import FullState
+from test.conftest import DEVICES_FILE
 
 
 def test_offline_transition_preserves_cumulative_state() -> None:
@@ -61,3 +60,31 @@ def test_rows_use_aliases() -> None:
 
     assert rows[1]['device'] == 'm'
     assert rows[2]['channel'] == 'main'
+
+
+def test_update_merges_source_tables() -> None:
+    source = InputDevice(
+        {
+            'default_samplerate': 48_000,
+            'max_input_channels': 3,
+            'name': 'Mic',
+        }
+    )
+    tracks = [Track(source, '1'), Track(source, '2-3')]
+    state = FullState([(source, tracks)])
+    update = ChannelStates.from_states(
+        {
+            '1': ChannelState(file_count=1, recorded_time=2, max_amp=0.5),
+            '2-3': ChannelState(file_size=10, recorded_time=1, is_active=True),
+        }
+    )
+
+    state.update({source.name: update})
+    state.update({source.name: update})
+
+    assert state.state[source.name]['1'].file_count == 2
+    assert state.state[source.name]['2-3'].file_size == 20
+    assert state.state[source.name].active() == {'1': False, '2-3': True}
+    assert state.total.file_count == 2
+    assert state.total.recorded_time == 8
+    assert state.total.max_amp == 0.5
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from recs.base.state import ChannelStates
+from recs.cfg.device import InputDevice
+from recs.cfg.track import Track
+from recs.ui.full_state import FullState
+from recs.ui.meter_board import SEQUENCE, MeterBoard, name_size
+from recs.ui.source_update import BufferStats
+
+
+def _channels(recorded_time: float, *names: str) -> ChannelStates:
+    values = np.zeros((len(names), 8))
+    values[:, 0] = 1  # file_count
+    values[:, 2] = recorded_time
+    values[:, 3] = 1  # is_active
+    volumes = [[0.5, 0.25] if '-' in n else [0.5] for n in names]
+    return ChannelStates(names, values, volumes)
+
+
+def test_meter_board_round_trip() -> None:
+    board = MeterBoard(2)
+    try:
+        assert board.read() is None
+
+        channels = _channels(1.5, '1', '2-3')
+        stats = BufferStats(dropped_frames=3, queued_seconds=0.25)
+        board.write(channels, stats, 1, 4800, 12.5)
+
+        reader = MeterBoard(name=board.name)
+        reading = reader.read()
+        reader.close()
+    finally:
+        board.close(unlink=True)
+
+    assert reading is not None
+    assert reading.generation == 1
+    assert reading.frame_count == 4800
+    assert reading.timestamp == 12.5
+    assert reading.channels.names == ('1', '2-3')
+    assert reading.channels.volumes == [[0.5], [0.5, 0.25]]
+    assert np.array_equal(reading.channels.table, channels.table)
+    assert reading.buffer_stats.dropped_frames == 3
+    assert reading.buffer_stats.queued_seconds == 0.25
+
+
+def test_meter_board_read_gives_up_during_a_write() -> None:
+    board = MeterBoard(1)
+    try:
+        board.write(_channels(1, '1'), BufferStats(), 1, 0, 0)
+        board.header[SEQUENCE] += 1
+
+        assert board.read() is None
+    finally:
+        board.close(unlink=True)
+
+
+def test_meter_board_holds_names_of_the_size_it_was_made_for() -> None:
+    names = '127-128', '1023-1024'
+    board = MeterBoard(2, name_size=name_size(names))
+    try:
+        board.write(_channels(1, *names), BufferStats(), 1, 0, 0)
+        reading = board.read()
+
+        with pytest.raises(ValueError, match='longer than 9 bytes'):
+            board.write(_channels(1, '10000-10001'), BufferStats(), 2, 0, 0)
+        assert board.header[SEQUENCE] % 2 == 0
+    finally:
+        board.close(unlink=True)
+
+    assert reading is not None
+    assert reading.channels.names == names
+
+
+def test_update_meters_adds_changes_since_last_reading() -> None:
+    source = InputDevice(
+        {
+            'default_samplerate': 48_000,
+            'max_input_channels': 2,
+            'name': 'Mic',
+        }
+    )
+    state = FullState([(source, [Track(source, '1'), Track(source, '2')])])
+    board = MeterBoard(2)
+    try:
+        board.write(_channels(1, '1', '2'), BufferStats(), 1, 0, 0)
+        first = board.read()
+        board.write(_channels(3, '1', '2'), BufferStats(), 1, 0, 0)
+        second = board.read()
+        board.write(_channels(1, '1', '2'), BufferStats(), 2, 0, 0)
+        restarted = board.read()
+        board.write(_channels(1, '1-2'), BufferStats(), 3, 0, 0)
+        relaid = board.read()
+    finally:
+        board.close(unlink=True)
+
+    assert first and second and restarted and relaid
+    assert state.update_meters(source.name, first)
+    assert state.update_meters(source.name, second)
+    assert state.state[source.name]['1'].recorded_time == 3
+    assert state.total.recorded_time == 6
+
+    # A new generation starts its totals again from zero
+    assert state.update_meters(source.name, restarted)
+    assert state.state[source.name]['1'].recorded_time == 4
+    assert state.state[source.name]['1'].file_count == 2
+
+    # A track layout which FullState doesn't know yet is skipped
+    assert not state.update_meters(source.name, relaid)
+    assert source.name not in state.meter_readings
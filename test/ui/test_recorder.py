@@ -20,6 +20,7 @@ from recs.ui import (
     recorder,
     recording_paths,
     recording_track_config,
+    source_wire,
 )
 from recs.ui.key_events import KeyEvent
 from recs.ui.recorder import Recorder
@@ -58,8 +59,8 @@ class FakeConnection:
     def poll(self) -> bool:
         return bool(self.messages)
 
-    def recv(self) -> SourceUpdate:
-        return self.messages.pop(0)
+    def recv_bytes(self) -> bytes:
+        return source_wire.encode(self.messages.pop(0))
 
 
 class FakeSourceProcess:
@@ -136,6 +137,9 @@ class FakeSourceProcess:
         updates, self.pending_updates = self.pending_updates, []
         return updates
 
+    def read_meters(self) -> None:
+        return None
+
 
 class ClosedDisplay(Runnable):
     enabled = True
@@ -1469,11 +1473,14 @@ def test_save_settings_failure_records_warning(
     control.cfg = Cfg(save_settings=True)
     control.track_names = {}
     control.saved_tracks = {}
+    control.saved_streams = {}
     control.write_record = records.append
     monkeypatch.setattr(
         recording_track_config.settings,
         'save',
-        lambda cfg, track_names, tracks: _raise_recs_error('cannot save settings'),
+        lambda cfg, track_names, tracks, streams: _raise_recs_error(
+            'cannot save settings'
+        ),
     )
 
     recording_track_config.save_settings(control)
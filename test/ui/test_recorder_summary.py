@@ -63,6 +63,9 @@ class FakeSourceProcess:
     def take_updates(self) -> list[Any]:
         return []
 
+    def read_meters(self) -> None:
+        return None
+
 
 def _recorder(
     monkeypatch: pytest.MonkeyPatch,
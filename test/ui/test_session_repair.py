@@ -0,0 +1,59 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+import soundfile
+
+from recs.audio.file_opener import FileOpener
+from recs.base.types import Format
+from recs.ui import session_repair
+
+
+def _crashed_file(path: Path, format: Format = Format.wav) -> None:
+    opener = FileOpener(channels=2, format=format, samplerate=48_000)
+    with opener.open(path.with_name('open-' + path.name), {}) as fp:
+        fp.write(np.zeros((1000, 2), 'float32'))
+        # Copy the file as a crash would leave it, before its header is written
+        shutil.copy(fp.name, path)
+
+
+def _manifest(tmp_path: Path, *names: str, channels: int = 2) -> Path:
+    manifest = tmp_path / 'recs-session.jsonl'
+    lines = ['{"type":"header","version":2,"started_at":"start"}\n']
+    for name in names:
+        lines.append(
+            f'{{"type":"file_started","timestamp":"start","path":"{name}",'
+            f'"track":1,"channels":{channels},"sample_rate":48000,"bit_depth":32}}\n'
+        )
+    manifest.write_text(''.join(lines))
+    return manifest
+
+
+def test_repair_fixes_headers_of_started_files(tmp_path: Path) -> None:
+    _crashed_file(tmp_path / 'take.wav')
+    _crashed_file(tmp_path / 'long.rf64', Format.rf64)
+    _manifest(tmp_path, 'take.wav', 'long.rf64', 'discarded.wav')
+
+    results = session_repair.repair(tmp_path, jobs=2)
+
+    assert sorted(results) == [
+        session_repair.Repair(tmp_path / 'long.rf64', True),
+        session_repair.Repair(tmp_path / 'take.wav', True),
+    ]
+    for name in 'take.wav', 'long.rf64':
+        assert soundfile.info(tmp_path / name).frames == 1000
+
+    # Repairing again changes nothing
+    results = session_repair.repair(tmp_path / 'recs-session.jsonl', jobs=1)
+    assert not any(r.repaired or r.error for r in results)
+
+
+def test_repair_leaves_files_which_do_not_match_the_manifest(tmp_path: Path) -> None:
+    _crashed_file(tmp_path / 'take.wav')
+    _manifest(tmp_path, 'take.wav', channels=1)
+    before = (tmp_path / 'take.wav').read_bytes()
+
+    (result,) = session_repair.repair(tmp_path, jobs=1)
+
+    assert result.error.endswith('channels is 2, expected 1')
+    assert (tmp_path / 'take.wav').read_bytes() == before
@@ -9,10 +9,10 @@ import pytest
 import soundfile
 
 from recs.cfg.cfg import Cfg
-from recs.cfg.device import InputDevice
+from recs.cfg.device import InputDevice, StreamSettings
 from recs.cfg.file_source import FileSource
 from recs.cfg.track import Track
-from recs.ui import source_process
+from recs.ui import source_process, source_wire
 from recs.ui.source_process import SourceProcess
 from recs.ui.source_recorder import SourceControl, SourceFailure, SourceUpdate
 
@@ -32,6 +32,9 @@ class FakeConnection:
     def send(self, message: object) -> None:
         self.sent.append(message)
 
+    def send_bytes(self, data: bytes) -> None:
+        self.send(source_wire.decode(data))
+
 
 class BrokenPollConnection(FakeConnection):
     def poll(self) -> bool:
@@ -214,6 +217,36 @@ def test_source_process_applies_device_profile(
     assert recorder_cfg.recording.noise_floor == 42
 
 
+def test_source_process_raises_stream_settings_to_tuned_values(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    def pipe(*, duplex: bool = True) -> tuple[FakeConnection, FakeConnection]:
+        return FakeConnection(), FakeConnection()
+
+    profiles = tmp_path / 'profiles.json'
+    profiles.write_text('{"Mic": {"blocksize": 1024, "latency": 0.5}}')
+    monkeypatch.setattr(source_process.mp, 'Event', FakeEvent)
+    monkeypatch.setattr(source_process.mp, 'Pipe', pipe)
+    monkeypatch.setattr(source_process.mp, 'Process', FakeProcess)
+
+    source = InputDevice(
+        {
+            'default_samplerate': 48_000,
+            'max_input_channels': 1,
+            'name': 'Mic',
+        }
+    )
+    owner = SourceProcess(Cfg(profiles=profiles), [Track(source, '1')], Path('session'))
+
+    owner.stream = StreamSettings(blocksize=4096, latency=0.1)
+    owner.start()
+
+    recorder_cfg = owner.process.kwargs['cfg']
+    assert recorder_cfg.device.blocksize == 4096
+    assert recorder_cfg.device.latency == 0.5
+
+
 def test_source_process_updates_track_names(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
@@ -278,12 +311,9 @@ def test_source_process_requests_calibration(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
     parent = FakeSendConnection()
-    calls = 0
 
     def pipe(*, duplex: bool = True) -> tuple[FakeConnection, FakeSendConnection]:
-        nonlocal calls
-        calls += 1
-        return (FakeConnection(), parent) if calls == 2 else (FakeConnection(), parent)
+        return FakeConnection(), parent
 
     monkeypatch.setattr(source_process.mp, 'Event', FakeEvent)
     monkeypatch.setattr(source_process.mp, 'Pipe', pipe)
@@ -304,6 +334,33 @@ def test_source_process_requests_calibration(
     assert parent.sent == [SourceControl(calibration_tracks=['1'])]
 
 
+def test_source_process_sends_capture(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    parent = FakeSendConnection()
+
+    def pipe(*, duplex: bool = True) -> tuple[FakeConnection, FakeSendConnection]:
+        return FakeConnection(), parent
+
+    monkeypatch.setattr(source_process.mp, 'Event', FakeEvent)
+    monkeypatch.setattr(source_process.mp, 'Pipe', pipe)
+    monkeypatch.setattr(source_process.mp, 'Process', FakeProcess)
+    source = InputDevice(
+        {
+            'default_samplerate': 48_000,
+            'max_input_channels': 1,
+            'name': 'Mic',
+        }
+    )
+    owner = SourceProcess(Cfg(), [Track(source, '1')], Path('session'))
+
+    owner.start()
+    owner.capture()
+
+    assert parent.sent_event.wait(0.1)
+    assert parent.sent == [SourceControl(capture=True)]
+
+
 def test_source_process_updates_tracks(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
@@ -2,20 +2,23 @@ import threading
 import time
 from collections.abc import Callable
 from pathlib import Path
+from queue import Empty
 
 import numpy as np
 import pytest
+import soundfile
 from threa import Runnable
 
 from recs.audio.block import Block
-from recs.base.state import ChannelState
-from recs.base.types import Active
+from recs.audio.disk_writer import DiskWriter
+from recs.base.state import ChannelState, ChannelStates
+from recs.base.types import Active, Format
 from recs.cfg.cfg import Cfg
 from recs.cfg.device import InputDevice
 from recs.cfg.source import Update
 from recs.cfg.time_settings import amplitude_to_db
 from recs.cfg.track import Track
-from recs.ui import source_recorder
+from recs.ui import source_recorder, source_wire
 from recs.ui.source_recorder import (
     InputBuffer,
     SourceCalibration,
@@ -75,11 +78,54 @@ def test_input_buffer_waits_for_its_first_callback() -> None:
     )
     thread.start()
 
-    update = Update(np.zeros((512, 1)), 10.0)
+    update = Update(np.ones((512, 1)), 10.0)
     buffer.put(update)
     thread.join()
 
-    assert received == [update]
+    (result,) = received
+    assert result.timestamp == update.timestamp
+    assert np.array_equal(result.array, update.array)
+    assert result.array is not update.array
+
+
+def test_input_buffer_copies_into_recycled_slabs(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(source_recorder.memory, 'available_bytes', lambda: 400_000_000)
+    buffer = InputBuffer(
+        Cfg(memory_reserve_megabytes=200, write_queue_seconds=0.1), samplerate=1_000
+    )
+    buffer.put(Update(np.ones((100, 2)), 10.0))
+    first = buffer.get(block=False)
+    buffer.release(first)
+    buffer.put(Update(np.ones((50, 2)), 11.0))
+    second = buffer.get(block=False)
+
+    assert buffer.pool is not None
+    assert second.update.array.base is buffer.pool.slabs
+    assert len(second.update.array) == 50
+    assert second.slab != first.slab
+
+
+def test_input_buffer_drops_updates_when_slabs_are_in_use(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(source_recorder.memory, 'available_bytes', lambda: 400_000_000)
+    buffer = InputBuffer(
+        Cfg(
+            audio_buffer_seconds=0.1,
+            memory_reserve_megabytes=200,
+            write_queue_seconds=0.1,
+        ),
+        samplerate=1_000,
+    )
+    for i in range(3):
+        buffer.put(Update(np.zeros((100, 1)), float(i)))
+        if not buffer.stats.dropped_blocks:
+            buffer.get(block=False)  # Holds on to the slab
+
+    assert buffer.stats.dropped_blocks == 1
+    assert buffer.stats.last_drop_timestamp == 2.0
 
 
 def test_input_buffer_timeline_includes_dropped_updates(
@@ -212,7 +258,9 @@ def test_source_recorder_applies_control_updates_without_audio(
         source_recorder.SourceControl(cfg=cfg, cfg_revision=1),
         stop_event,
     )
-    source.input_stream = lambda sdtype, update_callback: IdleInputStream()
+    source.input_stream = lambda sdtype, update_callback, blocksize, latency: (
+        IdleInputStream()
+    )
     monkeypatch.setattr(source_recorder, 'InputBuffer', IdleInputBuffer)
 
     recorder = SourceRecorder(
@@ -229,6 +277,86 @@ def test_source_recorder_applies_control_updates_without_audio(
     assert recorder.pending_config_revisions == [1]
 
 
+def test_source_recorder_sends_a_held_update_without_more_audio() -> None:
+    recorder = object.__new__(SourceRecorder)
+    recorder.update_transport = PublishedUpdates()
+    held = SourceUpdate(ChannelStates(()), [], 100, 'Mic')
+    recorder.held_update = held
+    recorder.last_published = time.monotonic()
+
+    recorder._publish_held()
+    assert recorder.update_transport.updates == []
+
+    recorder.last_published -= source_recorder.HEARTBEAT_SECONDS
+    recorder._publish_held()
+    assert recorder.update_transport.updates == [held]
+    assert recorder.held_update is None
+
+
+def test_source_recorder_sends_the_last_take_to_be_transcoded(
+    mock_devices: None, tmp_path: Path
+) -> None:
+    source = InputDevice(
+        {
+            'default_samplerate': 48_000,
+            'max_input_channels': 2,
+            'name': 'Mic',
+        }
+    )
+    cfg = Cfg(
+        defer_transcoding=True,
+        formats=['wav', 'flac'],
+        output_directory=str(tmp_path),
+        record_everything=True,
+        total_run_time=0.08,
+    )
+    source.input_stream = lambda sdtype, update_callback, blocksize, latency: (
+        OneTakeInputStream(update_callback)
+    )
+    transport = PublishedUpdates()
+
+    SourceRecorder(
+        cfg,
+        EmptyControlConnection(),
+        tmp_path,
+        threading.Event(),
+        [Track(source, '1-2')],
+        transport,
+    )
+
+    # As the parent does with each update
+    transcoder = SubmittedFiles()
+    for update in transport.updates:
+        assert isinstance(update, SourceUpdate)
+        for path, formats in (update.files_closed or {}).items():
+            transcoder.submit(path, formats)
+
+    (path,) = tmp_path.rglob('*.wav')
+    assert transcoder.submitted == [(path, [Format.flac])]
+
+
+def test_source_recorder_takes_closes_from_replaced_writers() -> None:
+    recorder = object.__new__(SourceRecorder)
+    old, new = ClosingWriter(), ClosingWriter()
+    drained = threading.Event()
+    recorder.writers = (new,)
+    recorder.retired_writers = [((old,), drained)]
+
+    old.files_closed.append(Path('old.wav'))
+    new.files_closed.append(Path('new.wav'))
+    assert recorder._take_files_closed() == {
+        Path('old.wav'): [Format.flac],
+        Path('new.wav'): [Format.flac],
+    }
+    assert recorder.retired_writers == [((old,), drained)]
+
+    # The last close ran before the disk writer reached the fence
+    old.files_closed.append(Path('last.wav'))
+    drained.set()
+    assert recorder._take_files_closed() == {Path('last.wav'): [Format.flac]}
+    assert recorder.retired_writers == []
+
+
 def test_source_update_merge_summarizes_warning_backlog() -> None:
     first = SourceUpdate(
         channels={'1': ChannelState()},
@@ -252,6 +380,30 @@ def test_source_update_merge_summarizes_warning_backlog() -> None:
     assert result.buffer_warnings[-1] == 'warning 79'
 
 
+def test_source_update_merge_adds_channel_tables() -> None:
+    first = SourceUpdate(
+        channels=ChannelStates.from_states(
+            {'1': ChannelState(file_count=1, recorded_time=0.5, max_amp=0.25)}
+        ),
+        files=[],
+        frames=1,
+        source_name='Mic',
+    )
+    second = first._replace(
+        channels=ChannelStates.from_states(
+            {'1': ChannelState(recorded_time=0.5, is_active=True, max_amp=0.125)}
+        )
+    )
+
+    result = source_recorder._merge_updates(first, second)
+
+    channel = result.channels['1']
+    assert channel.file_count == 1
+    assert channel.recorded_time == 1
+    assert channel.is_active
+    assert channel.max_amp == 0.25
+
+
 def test_source_update_merge_bounds_file_metadata_backlog() -> None:
     files = [Path(f'{i}.wav') for i in range(source_recorder.MAX_MERGED_FILES + 2)]
     first_files = files[:400]
@@ -341,8 +493,10 @@ def test_source_track_change_closes_writers_before_next_buffer(
     recorder.session_directory = Path('session')
     recorder.times = recorder.cfg.times.scale(source.samplerate)
     recorder.input_stream = object()
+    recorder.disk_writer = DiskWriter(1)
     original = ReconfiguredWriter(recorder.cfg, recorder.times, Track(source, '1-2'))
-    recorder.channel_writers = (original,)
+    recorder.channel_writers = recorder.writers = (original,)
+    recorder.retired_writers = []
     recorder.file_counts = [0]
     recorder.file_events = source_recorder.SourceFileEvents(recorder.channel_writers)
     recorder.pending_active_channels = set()
@@ -354,11 +508,44 @@ def test_source_track_change_closes_writers_before_next_buffer(
     control.set_tracks([Track(source, '1'), Track(source, '2')], {'Mic': {'VL': 1}})
 
     assert original.stopped
+    ((retired, drained),) = recorder.retired_writers
+    assert retired == (original,)
+    assert drained.is_set()  # The disk writer isn't running, so it ran at once
     assert [writer.track.name for writer in recorder.channel_writers] == ['1', '2']
     assert recorder.pending_active_channels == {1, 2}
     assert recorder.pending_track_layout == ['1', '2']
 
 
+def test_source_recorder_joins_backlog_into_batches(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(source_recorder.memory, 'available_bytes', lambda: 400_000_000)
+    source = InputDevice(
+        {
+            'default_samplerate': 1_000,
+            'max_input_channels': 1,
+            'name': 'Mic',
+        }
+    )
+    recorder = object.__new__(SourceRecorder)
+    recorder.source = source
+    recorder.buffer = InputBuffer(Cfg(memory_reserve_megabytes=200), samplerate=1_000)
+    recorder.disk_writer = DiskWriter(max_seconds=1)
+    received: list[source_recorder.BufferedUpdate] = []
+    recorder._receive_update = received.append  # type: ignore[method-assign]
+
+    for i in range(8):
+        recorder.buffer.put(Update(np.full((100, 1), i), float(i)))
+    recorder._process(recorder.buffer.get(block=False))
+
+    (batch,) = received
+    assert (batch.start_frame, batch.end_frame) == (0, 500)
+    assert batch.update.timestamp == 0.0
+    assert list(batch.update.array[::100, 0]) == [0, 1, 2, 3, 4]
+    assert recorder.buffer.pool is not None
+    assert recorder.buffer.pool.free == len(recorder.buffer.pool.slabs) - 3
+
+
 def test_source_file_events_handles_discarded_candidate_files() -> None:
     source = InputDevice(
         {
@@ -382,6 +569,161 @@ def test_source_file_events_handles_discarded_candidate_files() -> None:
     assert events.new_files([writer], bit_depth=32)[0] == [second]
 
 
+def test_source_file_events_only_send_file_ends_which_moved() -> None:
+    source = InputDevice(
+        {
+            'default_samplerate': 48_000,
+            'max_input_channels': 2,
+            'name': 'Mic',
+        }
+    )
+    writer = EventWriter(Track(source, '1'))
+    events = source_recorder.SourceFileEvents([writer])
+    first = Path('first.wav')
+    second = Path('second.wav')
+
+    writer.add_file(first)
+    writer.file_end_frames[first] = 10
+    assert events.end_frames([writer]) == {first: 10}
+    assert events.end_frames([writer]) == {}
+
+    writer.add_file(second)
+    writer.file_end_frames[second] = 20
+    assert events.end_frames([writer]) == {second: 20}
+
+    # Ends from writers replaced by a new track layout are sent once
+    writer.file_end_frames[second] = 30
+    events.remember_finished_files([writer])
+    assert events.end_frames([]) == {second: 30}
+    assert events.end_frames([writer]) == {}
+
+
+def test_source_recorder_poly_file_records_all_tracks_in_one_writer(
+    mock_devices: None,
+) -> None:
+    source = InputDevice(
+        {
+            'default_samplerate': 48_000,
+            'max_input_channels': 4,
+            'name': 'Mic',
+        }
+    )
+    recorder = object.__new__(SourceRecorder)
+    recorder.cfg = Cfg(poly_file=True)
+    recorder.session_directory = Path('session')
+    recorder.times = recorder.cfg.times.scale(source.samplerate)
+    recorder.disk_writer = None
+    tracks = [Track(source, '1'), Track(source, '3-4')]
+
+    recorder.make_writers(tracks)
+
+    poly = recorder.poly_writer
+    assert poly is not None
+    assert poly.track.channels == (1, 2, 3, 4)
+    assert not poly.do_not_record
+    assert all(w.do_not_record for w in recorder.channel_writers)
+    assert recorder.file_writers == (poly,)
+    assert recorder.writers == (*recorder.channel_writers, poly)
+    assert recorder.poly_tracks == {'1': [1], '3-4': [3, 4]}
+
+    writer = EventWriter(poly.track)
+    events = source_recorder.SourceFileEvents([writer], recorder.poly_tracks)
+    writer.add_file(Path('poly.wav'))
+    _, (record,) = events.new_files([writer], 32)
+    assert (record.track, record.channels) == (1, 4)
+    assert record.tracks == {'1': [1], '3-4': [3, 4]}
+
+
+def test_source_recorder_poly_file_needs_two_tracks(mock_devices: None) -> None:
+    source = InputDevice(
+        {
+            'default_samplerate': 48_000,
+            'max_input_channels': 2,
+            'name': 'Mic',
+        }
+    )
+    recorder = object.__new__(SourceRecorder)
+    recorder.cfg = Cfg(poly_file=True)
+    recorder.session_directory = Path('session')
+    recorder.times = recorder.cfg.times.scale(source.samplerate)
+    recorder.disk_writer = None
+
+    recorder.make_writers([Track(source, '1-2')])
+
+    assert recorder.poly_writer is None
+    assert recorder.file_writers == recorder.writers == recorder.channel_writers
+    assert not recorder.channel_writers[0].do_not_record
+
+
+def test_source_recorder_poly_file_writes_every_channel(
+    mock_devices: None, tmp_path: Path
+) -> None:
+    source = InputDevice(
+        {
+            'default_samplerate': 48_000,
+            'max_input_channels': 4,
+            'name': 'Mic',
+        }
+    )
+    recorder = object.__new__(SourceRecorder)
+    recorder.cfg = Cfg(
+        formats=['wav'],
+        output_directory=str(tmp_path),
+        poly_file=True,
+        record_everything=True,
+    )
+    recorder.session_directory = tmp_path
+    recorder.times = recorder.cfg.times.scale(source.samplerate)
+    recorder.disk_writer = None
+    recorder.make_writers([Track(source, '1'), Track(source, '3-4')])
+    poly = recorder.poly_writer
+    assert poly is not None
+
+    # Each channel holds its own constant, so a swap or a drop shows
+    array = np.tile(np.array([1, 2, 3, 4], dtype=np.float32) / 8, (1024, 1))
+    poly.receive(poly.to_block(array), time.time(), True, 1024)
+    poly.stop()
+
+    (path,) = poly.files_written
+    data, samplerate = soundfile.read(path, dtype='float32', always_2d=True)
+    assert samplerate == 48_000
+    assert data.shape == (1024, 4)
+    np.testing.assert_allclose(data, array, atol=1e-4)
+
+
+@pytest.mark.parametrize(
+    ('channels', 'cfg'),
+    [
+        (9, {'formats': ['flac']}),
+        (3, {'formats': ['wav', 'mp3'], 'defer_transcoding': True}),
+    ],
+)
+def test_source_recorder_poly_file_too_wide_for_its_format_writes_tracks(
+    mock_devices: None, channels: int, cfg: dict[str, object]
+) -> None:
+    source = InputDevice(
+        {
+            'default_samplerate': 48_000,
+            'max_input_channels': channels,
+            'name': 'Mic',
+        }
+    )
+    recorder = object.__new__(SourceRecorder)
+    recorder.cfg = Cfg(poly_file=True, **cfg)
+    recorder.session_directory = Path('session')
+    recorder.times = recorder.cfg.times.scale(source.samplerate)
+    recorder.disk_writer = None
+    recorder.pending_warnings = []
+
+    recorder.make_writers([Track(source, '1'), Track(source, str(channels))])
+
+    assert recorder.poly_writer is None
+    assert recorder.file_writers == recorder.writers == recorder.channel_writers
+    assert not any(w.do_not_record for w in recorder.channel_writers)
+    (warning,) = recorder.pending_warnings
+    assert f'{channels} channels are too many' in warning
+
+
 class EventWriter:
     def __init__(self, track: Track) -> None:
         self.track = track
@@ -396,6 +738,11 @@ class EventWriter:
         self.file_start_frames[path] = len(self.files_written)
         self.file_start_timestamps[path] = float(len(self.files_written))
 
+    def take_file_ends(self) -> tuple[dict[Path, int], dict[Path, float]]:
+        frames, self.file_end_frames = self.file_end_frames, {}
+        timestamps, self.file_end_timestamps = self.file_end_timestamps, {}
+        return frames, timestamps
+
 
 class ReconfiguredWriter:
     def __init__(
@@ -404,6 +751,8 @@ class ReconfiguredWriter:
         times: object,
         track: Track,
         session_directory: Path | None = None,
+        disk_writer: object = None,
+        meter_only: bool = False,
     ) -> None:
         self.track = track
         self.session_directory = session_directory
@@ -418,12 +767,41 @@ class ReconfiguredWriter:
     def stop(self) -> None:
         self.stopped = True
 
+    def take_file_ends(self) -> tuple[dict[object, int], dict[object, float]]:
+        return self.file_end_frames, self.file_end_timestamps
+
 
 class CalibrationWriter:
     def __init__(self, track: Track) -> None:
         self.track = track
 
 
+class PublishedUpdates:
+    def __init__(self) -> None:
+        self.updates: list[object] = []
+
+    def publish(self, update: object) -> None:
+        self.updates.append(update)
+
+
+class SubmittedFiles:
+    def __init__(self) -> None:
+        self.submitted: list[tuple[Path, list[Format]]] = []
+
+    def submit(self, path: Path, formats: list[Format]) -> None:
+        self.submitted.append((path, formats))
+
+
+class ClosingWriter:
+    def __init__(self) -> None:
+        self.files_closed: list[Path] = []
+        self.deferred_formats = [Format.flac]
+
+    def take_files_closed(self) -> list[Path]:
+        closed, self.files_closed = self.files_closed, []
+        return closed
+
+
 class BlockingConnection:
     def __init__(self) -> None:
         self.started = threading.Event()
@@ -431,10 +809,10 @@ class BlockingConnection:
         self.finished = threading.Event()
         self.messages: list[object] = []
 
-    def send(self, message: object) -> None:
+    def send_bytes(self, data: bytes) -> None:
         self.started.set()
         self.release.wait()
-        self.messages.append(message)
+        self.messages.append(source_wire.decode(data))
         self.finished.set()
 
 
@@ -469,11 +847,25 @@ class IdleInputBuffer:
     def put(self, update: object) -> None:
         pass
 
+    def close(self) -> None:
+        pass
+
 
 class IdleInputStream(Runnable):
     pass
 
 
+class OneTakeInputStream(Runnable):
+    def __init__(self, update_callback: Callable[[Update], None]) -> None:
+        self.update_callback = update_callback
+
+    def start(self) -> None:
+        super().start()
+        array = np.full((1024, 2), 0.25, dtype=np.float32)
+        for i in range(4):
+            self.update_callback(Update(array, time.time() + i * 1024 / 48_000))
+
+
 def _eventually(check: Callable[[], bool]) -> bool:
     deadline = time.monotonic() + 1
     while time.monotonic() < deadline:
@@ -481,3 +873,38 @@ def _eventually(check: Callable[[], bool]) -> bool:
             return True
         time.sleep(0.01)
     return False
+
+
+def test_input_buffer_spills_instead_of_dropping(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(source_recorder.memory, 'available_bytes', lambda: 400_000_000)
+    buffer = InputBuffer(
+        Cfg(
+            audio_buffer_seconds=0.1,
+            memory_reserve_megabytes=200,
+            spill_directory=tmp_path,
+            spill_megabytes=1,
+        ),
+        samplerate=1_000,
+    )
+    for i in range(3):
+        buffer.put(Update(np.full((100, 1), i), float(i)))
+
+    assert buffer.stats.dropped_blocks == 0
+    assert buffer.stats.spilled_blocks == 2
+    assert buffer.stats.max_spilled_seconds == 0.2
+
+    # Spilled updates come after the queue, and new ones go to the queue
+    # again once the spill file is empty
+    results = [buffer.get(block=False) for _ in range(3)]
+    buffer.put(Update(np.full((100, 1), 3), 3.0))
+    results.append(buffer.get(block=False))
+
+    assert [r.update.timestamp for r in results] == [0.0, 1.0, 2.0, 3.0]
+    assert [r.update.array[0, 0] for r in results] == [0, 1, 2, 3]
+    assert [r.start_frame for r in results] == [0, 100, 200, 300]
+    assert [r.slab is None for r in results] == [False, True, True, False]
+    with pytest.raises(Empty):
+        buffer.get(block=False)
+    buffer.close()
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+
+from recs.base.errors import RecsError
+from recs.base.state import ChannelState, ChannelStates
+from recs.ui import source_wire
+from recs.ui.source_update import BufferStats, SourceFailure, SourceUpdate
+
+
+def test_update_round_trip() -> None:
+    channels = ChannelStates.from_states(
+        {
+            '1': ChannelState(file_count=2, max_amp=0.5, volume=[0.25]),
+            '2-3': ChannelState(is_active=True, recorded_time=1.5, volume=[0.5, 1]),
+        }
+    )
+    stats = BufferStats(
+        queued_blocks=3,
+        max_queued_seconds=0.25,
+        max_format_write_seconds={'wav': 0.125, 'flac': 0.5},
+    )
+    update = SourceUpdate(
+        channels=channels,
+        files=[Path('a.wav')],
+        frames=512,
+        source_name='Mic',
+        timestamp=10.5,
+        buffer_stats=stats,
+        file_end_frames={Path('a.wav'): 1024},
+        frame_count=2048,
+        calibration={},
+    )
+
+    actual = source_wire.decode(source_wire.encode(update))
+
+    assert isinstance(actual, SourceUpdate)
+    assert dict(actual.channels) == dict(channels)
+    assert actual._replace(channels=channels) == update
+    assert actual.buffer_stats == stats
+
+
+def test_steady_state_update_has_no_pickle() -> None:
+    update = SourceUpdate(
+        channels={'1': ChannelState()},
+        files=[],
+        frames=512,
+        source_name='Mic',
+        buffer_warnings=[],
+        file_records=[],
+    )
+    data = source_wire.encode(update)
+
+    assert source_wire.HEADER.unpack_from(data)[8] == 0
+    actual = source_wire.decode(data)
+    assert isinstance(actual, SourceUpdate)
+    assert actual.timestamp is None
+    assert actual.frame_count is None
+    assert actual.buffer_stats is None
+    assert actual.buffer_warnings is None
+
+
+def test_failure_round_trip() -> None:
+    failure = SourceFailure(message='oops', source_name='Mic', exitcode=1)
+
+    assert source_wire.decode(source_wire.encode(failure)) == failure
+
+
+def test_unknown_version() -> None:
+    data = bytearray(source_wire.encode(SourceFailure('oops', 'Mic')))
+    data[2] = source_wire.VERSION + 1
+
+    with pytest.raises(RecsError):
+        source_wire.decode(bytes(data))
@@ -0,0 +1,41 @@
+from recs.cfg.cfg import Cfg
+from recs.cfg.device import StreamSettings
+from recs.ui.stream_tuner import MAX_BLOCKSIZE, MAX_LATENCY, StreamTuner
+
+
+def test_stream_tuner_is_off_by_default() -> None:
+    tuner = StreamTuner(Cfg(), samplerate=48_000)
+
+    assert tuner.update('input overflow', 256, 0.0) is None
+
+
+def test_stream_tuner_raises_blocksize_and_latency_once() -> None:
+    tuner = StreamTuner(Cfg(tune_stream=True), samplerate=48_000)
+
+    assert tuner.update('', 256, 0.0) is None
+    assert tuner.update('input overflow', 256, 0.0) == StreamSettings(
+        blocksize=512, latency=2 * 512 / 48_000
+    )
+    # The new values only take effect when the stream opens again
+    assert tuner.update('input overflow', 256, 0.0) is None
+
+
+def test_stream_tuner_responds_to_queue_pressure() -> None:
+    cfg = Cfg(tune_stream=True, blocksize=1024, latency=0.1, audio_buffer_seconds=4)
+    tuner = StreamTuner(cfg, samplerate=48_000)
+
+    assert tuner.update('', 1024, 1.9) is None
+    assert tuner.update('', 1024, 2.0) == StreamSettings(blocksize=2048, latency=0.2)
+
+
+def test_stream_tuner_stops_at_its_limits() -> None:
+    cfg = Cfg(tune_stream=True, blocksize=MAX_BLOCKSIZE, latency=MAX_LATENCY)
+    tuner = StreamTuner(cfg, samplerate=48_000)
+
+    assert tuner.update('input overflow', MAX_BLOCKSIZE, 0.0) is None
+
+
+def test_stream_tuner_ignores_file_sources() -> None:
+    tuner = StreamTuner(Cfg(tune_stream=True), samplerate=48_000, enabled=False)
+
+    assert tuner.update('input overflow', 256, 100.0) is None
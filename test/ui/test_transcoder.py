@@ -0,0 +1,116 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from recs.base.types import Format
+from recs.cfg.cfg import Cfg
+from recs.ui import transcoder
+
+
+class FakeProcess:
+    def __init__(self, returncode: int = 0, stdout: str = '', stderr: str = '') -> None:
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.killed = threading.Event()
+
+    def communicate(self) -> tuple[str, str]:
+        return self.stdout, self.stderr
+
+    def kill(self) -> None:
+        self.killed.set()
+
+
+class HangingProcess(FakeProcess):
+    def communicate(self) -> tuple[str, str]:
+        self.killed.wait()
+        self.returncode = -9
+        return '', ''
+
+
+def test_transcoder_records_derived_files(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    commands: list[list[str]] = []
+
+    def popen(command: list[str], **kwargs: object) -> FakeProcess:
+        commands.append(command)
+        return FakeProcess(stdout='take.flac\n')
+
+    monkeypatch.setattr(transcoder.subprocess, 'Popen', popen)
+    path = tmp_path / 'take.wav'
+    path.touch()
+    t = transcoder.Transcoder(Cfg(defer_transcoding=True, formats=['wav', 'flac']))
+
+    t.submit(path, [Format.flac])
+    t.finish()
+
+    (command,) = commands
+    assert command[-3:] == [str(path), '--format', 'flac']
+    (record,) = t.take_records()
+    assert not isinstance(record, str)
+    assert record.type == 'file_transcoded'
+    assert record.path == 'take.flac'
+    assert record.transcoded_from == path.as_posix()
+
+
+def test_transcoder_reports_failures(monkeypatch: pytest.MonkeyPatch) -> None:
+    def popen(command: list[str], **kwargs: object) -> FakeProcess:
+        return FakeProcess(1, stderr='bad file')
+
+    monkeypatch.setattr(transcoder.subprocess, 'Popen', popen)
+    t = transcoder.Transcoder(Cfg(defer_transcoding=True, formats=['wav', 'mp3']))
+
+    t.submit(Path('take.wav'), [Format.mp3])
+    t.finish()
+
+    assert t.take_records() == ['bad file']
+
+
+def test_transcoder_uses_the_formats_of_each_file(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    commands: list[list[str]] = []
+
+    def popen(command: list[str], **kwargs: object) -> FakeProcess:
+        commands.append(command)
+        return FakeProcess()
+
+    monkeypatch.setattr(transcoder.subprocess, 'Popen', popen)
+    t = transcoder.Transcoder(
+        Cfg(defer_transcoding=True, formats=['wav', 'flac', 'mp3'])
+    )
+
+    # This source was set to record only flac, so it has no mp3 to make
+    t.submit(Path('take.wav'), [Format.flac])
+    t.submit(Path('other.wav'), [])
+    t.finish()
+
+    (command,) = commands
+    assert command[-3:] == ['take.wav', '--format', 'flac']
+
+
+def test_transcoder_stops_at_the_timeout(monkeypatch: pytest.MonkeyPatch) -> None:
+    processes: list[FakeProcess] = []
+
+    def popen(command: list[str], **kwargs: object) -> FakeProcess:
+        processes.append(HangingProcess())
+        return processes[-1]
+
+    monkeypatch.setattr(transcoder.subprocess, 'Popen', popen)
+    t = transcoder.Transcoder(
+        Cfg(defer_transcoding=True, formats=['wav', 'flac'], transcode_timeout=0.05)
+    )
+
+    t.submit(Path('first.wav'), [Format.flac])
+    t.submit(Path('second.wav'), [Format.flac])
+    t.finish()
+
+    # One worker: the first file is stopped, and the second never starts
+    (process,) = processes
+    assert process.killed.is_set()
+    assert t.take_records() == [
+        'Not transcoded before the timeout: first.wav',
+        'Not transcoded before the timeout: second.wav',
+    ]